@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import argparse
+import glob
+import os
+import tempfile
+import timeit
+
+# local imports
+from benchmarks.synthetic import synthetic_path
+from fault.io.fsp import read_from_file
+
+HOMEDIR = os.path.dirname(os.path.abspath(__file__))
+FSP_DIRECTORY = os.path.join(HOMEDIR, '..', 'tests', 'data', 'fsp')
+
+
+def get_parser():
+    description = '''Compare the streaming and memory mapped FSP readers.'''
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("-n", "--number", dest="number", type=int,
+                        default=5, help="Number of timed repetitions. "
+                        "Default is 5.")
+    parser.add_argument("-s", "--segments", dest="segments", type=int,
+                        default=100, help="Number of segments in the "
+                        "synthetic model. Default is 100.")
+    parser.add_argument("--nx", dest="nx", type=int, default=40,
+                        help="Subfaults along strike in each synthetic "
+                        "segment. Default is 40.")
+    parser.add_argument("--nz", dest="nz", type=int, default=25,
+                        help="Subfaults down dip in each synthetic "
+                        "segment. Default is 25.")
+    return parser
+
+
+def time_reader(fspfile, number, **kwargs):
+    """Return the best time of several reads of a file.
+
+    Args:
+        fspfile (str): Path to the FSP file.
+        number (int): Number of timed repetitions.
+        kwargs: Keyword arguments passed to read_from_file.
+
+    Returns:
+        float: Best time in seconds.
+    """
+    timer = timeit.Timer(lambda: read_from_file(fspfile, **kwargs))
+    return min(timer.repeat(repeat=number, number=1))
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tempdir:
+        files = sorted(glob.glob(os.path.join(FSP_DIRECTORY, '*.fsp')))
+        files += [synthetic_path(tempdir, args.segments, args.nx, args.nz)]
+        print('%-45s %12s %12s %8s' % ('file', 'stream (ms)', 'mmap (ms)',
+                                       'speedup'))
+        for fspfile in files:
+            stream = time_reader(fspfile, args.number)
+            mapped = time_reader(fspfile, args.number, memory_map=True)
+            print('%-45s %12.2f %12.2f %7.1fx' % (
+                os.path.basename(fspfile), stream * 1000, mapped * 1000,
+                stream / mapped))
+
+
+if __name__ == '__main__':
+    parser = get_parser()
+    pargs, unknown = parser.parse_known_args()
+    main(pargs)
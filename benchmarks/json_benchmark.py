@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import argparse
+import glob
+import json
+import os
+import tempfile
+import timeit
+
+# local imports
+from benchmarks.synthetic import synthetic_path
+from fault.fault import Fault
+from product import json_writer
+
+HOMEDIR = os.path.dirname(os.path.abspath(__file__))
+TIMESERIES_DIRECTORY = os.path.join(HOMEDIR, '..', 'tests', 'data',
+                                    'timeseries')
+
+
+def get_parser():
+    description = '''Compare json.dump with the product JSON writer for the
+    FFM.geojson and timeseries.geojson files.'''
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("-n", "--number", dest="number", type=int,
+                        default=5, help="Number of timed repetitions. "
+                        "Default is 5.")
+    parser.add_argument("-s", "--segments", dest="segments", type=int,
+                        default=10, help="Number of segments in the "
+                        "synthetic model. Default is 10.")
+    parser.add_argument("--nx", dest="nx", type=int, default=40,
+                        help="Subfaults along strike in each synthetic "
+                        "segment. Default is 40.")
+    parser.add_argument("--nz", dest="nz", type=int, default=25,
+                        help="Subfaults down dip in each synthetic "
+                        "segment. Default is 25.")
+    return parser
+
+
+def time_writer(function, number):
+    """Return the best time and output size of several writes to a file.
+
+    Args:
+        function (function): Function called with an open text file.
+        number (int): Number of timed repetitions.
+
+    Returns:
+        tuple: Best time in seconds and size of the output in bytes.
+    """
+    with tempfile.TemporaryFile('w+') as outfile:
+        def write():
+            outfile.seek(0)
+            outfile.truncate()
+            function(outfile)
+        timer = timeit.Timer(write)
+        best = min(timer.repeat(repeat=number, number=1))
+        return best, outfile.tell()
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tempdir:
+        fspfile = glob.glob(os.path.join(TIMESERIES_DIRECTORY, '*.fsp'))[0]
+        fault = Fault.fromFiles(fspfile, TIMESERIES_DIRECTORY)
+        fault.createGeoJSON()
+        synthetic = Fault.fromFiles(
+            synthetic_path(tempdir, args.segments, args.nx, args.nz),
+            TIMESERIES_DIRECTORY)
+        synthetic.createGeoJSON()
+        cases = [
+            ('timeseries', fault.timeseries_dict, None),
+            ('FFM', fault.corners, fault.grid),
+            ('FFM synthetic', synthetic.corners, synthetic.grid),
+        ]
+        print('%-28s %12s %12s %8s' % ('output', 'time (ms)', 'size (kB)',
+                                       'speedup'))
+        for name, obj, grid in cases:
+            base, size = time_writer(
+                lambda f: json.dump(obj, f, indent=4, sort_keys=True),
+                args.number)
+            print('%-28s %12.2f %12.1f' % (name + ' json', base * 1000,
+                                           size / 1000.))
+            writers = [
+                ('writer', lambda f: json_writer.dump(obj, f)),
+                ('compact', lambda f: json_writer.dump(obj, f, indent=None)),
+                ('compact 4f', lambda f: json_writer.dump(
+                    obj, f, indent=None, decimals=4)),
+            ]
+            if grid is not None:
+                writers += [('grid', lambda f: json_writer.dump_grid(
+                    grid, f))]
+            for label, function in writers:
+                best, size = time_writer(function, args.number)
+                print('%-28s %12.2f %12.1f %7.1fx' % (
+                    name + ' ' + label, best * 1000, size / 1000.,
+                    base / best))
+
+
+if __name__ == '__main__':
+    parser = get_parser()
+    pargs, unknown = parser.parse_known_args()
+    main(pargs)
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import argparse
+import cProfile
+import datetime
+import glob
+import json
+import os
+import platform
+import pstats
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+# local imports
+from benchmarks.synthetic import synthetic_path
+from fault.fault import Fault
+from fault.io.fsp import read_from_file
+from fault.io.timeseries import read_from_directory
+from product.constants import TIMEFMT
+from product.location import LocationResolver, get_resolver, set_resolver
+from product.web_product import WebProduct
+
+HOMEDIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIRECTORY = os.path.join(HOMEDIR, '..', 'tests', 'data')
+FSP_DIRECTORY = os.path.join(DATA_DIRECTORY, 'fsp')
+PRODUCT_DIRECTORY = os.path.join(DATA_DIRECTORY, 'products', '10004u1y_1')
+TIMESERIES_DIRECTORY = os.path.join(DATA_DIRECTORY, 'timeseries')
+HISTORY_FILE = os.path.join(HOMEDIR, 'history.jsonl')
+# Subfaults along strike and down dip in each synthetic segment
+SYNTHETIC_NX = 15
+SYNTHETIC_NZ = 7
+# Stages more than this many times slower than in the previous run are
+# reported as regressions
+DEFAULT_THRESHOLD = 1.25
+# Stages faster than this (in seconds) are too noisy to be compared
+MIN_SECONDS = 0.005
+
+
+def get_parser():
+    description = '''Time and profile the FSP to GeoJSON to product pipeline
+    on the bundled test data and on synthetic, scaled-up models, and record
+    the results in a JSON lines history.'''
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("-c", "--check", dest="check", action="store_true",
+                        default=False, help="Exit with status 1 if a stage "
+                        "is slower than in the previous run of the history "
+                        "on this platform by more than the threshold.")
+    parser.add_argument("-n", "--number", dest="number", type=int,
+                        default=3, help="Number of timed repetitions. "
+                        "Default is 3.")
+    parser.add_argument("-o", "--output", dest="output",
+                        default=HISTORY_FILE, metavar="HISTORY",
+                        help="JSON lines file the results are appended to. "
+                        "Default is benchmarks/history.jsonl.")
+    parser.add_argument("-p", "--profile", dest="profile", type=int,
+                        default=0, metavar="LINES", help="Print the "
+                        "functions with the most cumulative time of every "
+                        "stage. Default is 0, which does not profile.")
+    parser.add_argument("-s", "--scales", dest="scales", type=int,
+                        nargs='*', default=[1, 10, 100], help="Number of "
+                        "segments of each synthetic model, with %i by %i "
+                        "subfaults per segment. Default is 1 10 100." %
+                        (SYNTHETIC_NX, SYNTHETIC_NZ))
+    parser.add_argument("-t", "--threshold", dest="threshold", type=float,
+                        default=DEFAULT_THRESHOLD, help="Slowdown reported "
+                        "as a regression. Default is %g." %
+                        DEFAULT_THRESHOLD)
+    parser.add_argument("--no-history", dest="history",
+                        action="store_false", default=True,
+                        help="Do not append the results to the history.")
+    return parser
+
+
+def find_regressions(results, history, threshold=DEFAULT_THRESHOLD,
+                     platform_name=None):
+    """Compare the results of a run with the previous run of the history.
+
+    Args:
+        results (list): Results returned by run_stages.
+        history (list): Runs returned by read_history.
+        threshold (float): Slowdown reported as a regression. Default is
+                1.25.
+        platform_name (str): Only compare with runs on this platform.
+                Default is None, which compares with runs on any platform.
+
+    Returns:
+        list: Tuples of the case, stage, previous seconds and current
+                seconds of every regression.
+    """
+    if platform_name is not None:
+        history = [run for run in history
+                   if run.get('platform') == platform_name]
+    previous = get_previous(history)
+    regressions = []
+    for result in results:
+        key = (result['case'], result['stage'])
+        if key not in previous:
+            continue
+        seconds = previous[key]
+        if result['seconds'] < MIN_SECONDS:
+            continue
+        if result['seconds'] > threshold * seconds:
+            regressions += [(result['case'], result['stage'], seconds,
+                             result['seconds'])]
+    return regressions
+
+
+def get_cases(directory, scales):
+    """Create the product directories of the benchmark cases.
+
+    Args:
+        directory (str): Directory where the cases are created.
+        scales (list): Number of segments of each synthetic model.
+
+    Returns:
+        list: Dictionaries with the "name", "fspfile" (the model of the
+                fault), "fspfiles" (the files read by read_from_file),
+                "timeseries_directory" and "product_directory" of each case.
+    """
+    cases = [{
+        'name': 'bundled',
+        'fspfile': glob.glob(os.path.join(TIMESERIES_DIRECTORY, '*.fsp'))[0],
+        'fspfiles': sorted(glob.glob(os.path.join(FSP_DIRECTORY, '*.fsp'))),
+        'timeseries_directory': TIMESERIES_DIRECTORY,
+        'product_directory': _copy_product(directory, 'bundled'),
+    }]
+    for scale in scales:
+        name = 'synthetic %ix' % scale
+        fspfile = synthetic_path(directory, scale, SYNTHETIC_NX,
+                                 SYNTHETIC_NZ)
+        product_directory = _copy_product(directory, 'synthetic_%i' % scale)
+        for path in glob.glob(os.path.join(product_directory, '*.fsp')):
+            os.remove(path)
+        shutil.copy(fspfile, product_directory)
+        cases += [{
+            'name': name,
+            'fspfile': fspfile,
+            'fspfiles': [fspfile],
+            'timeseries_directory': TIMESERIES_DIRECTORY,
+            'product_directory': product_directory,
+        }]
+    return cases
+
+
+def get_commit():
+    """Get the commit of the repository.
+
+    Returns:
+        str: Commit hash or None if it cannot be found.
+    """
+    try:
+        output = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=HOMEDIR,
+            stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode().strip()
+
+
+def get_previous(history):
+    """Get the time of every stage in the latest run of the history.
+
+    Args:
+        history (list): Runs returned by read_history.
+
+    Returns:
+        dictionary: Seconds keyed by (case, stage). Stages missing from the
+                latest run are taken from the run before it.
+    """
+    previous = {}
+    for run in history:
+        for result in run.get('results', []):
+            previous[(result['case'], result['stage'])] = result['seconds']
+    return previous
+
+
+def get_stages(case, directory):
+    """Create the functions timed for a case.
+
+    Each stage is created by a setup function, which is not timed, that
+    returns the timed function.
+
+    Args:
+        case (dict): Case returned by get_cases.
+        directory (str): Directory where the outputs are written.
+
+    Returns:
+        list: Tuples of the stage name and its setup function.
+    """
+    fspfile = case['fspfile']
+    timeseries_directory = case['timeseries_directory']
+    product_directory = case['product_directory']
+
+    def read_files():
+        for path in case['fspfiles']:
+            read_from_file(path)
+
+    def read_timeseries():
+        read_from_directory(timeseries_directory)
+
+    def read_fault():
+        return Fault.fromFiles(fspfile, timeseries_directory)
+
+    def read_product():
+        return WebProduct.fromDirectory(product_directory, 'us', 'synthetic',
+                                        1)
+
+    def setup_rupture_grids():
+        fault = read_fault()
+
+        def rupture_grids():
+            for num in range(fault.getNumSegments()):
+                segment = fault.getSegment(num)
+                slip = fault.thresholdSlip(segment['slip'])
+                rows, columns = fault.autocorrelateSums(*fault.sumSlip(slip))
+                length, width = fault.getRuptureSize(rows, columns)
+                fault.getRuptureGrid(length, width, slip, segment['length'],
+                                     segment['width'])
+        return rupture_grids
+
+    def setup_write_grid():
+        product = read_product()
+        return lambda: product.writeGrid(directory)
+
+    return [
+        ('read_from_file', lambda: read_files),
+        ('read_from_directory', lambda: read_timeseries),
+        ('Fault.fromFiles', lambda: read_fault),
+        ('Fault.createGeoJSON', lambda: read_fault().createGeoJSON),
+        ('Fault.getRuptureGrid', setup_rupture_grids),
+        ('WebProduct.fromDirectory', lambda: read_product),
+        ('WebProduct.writeGrid', setup_write_grid),
+    ]
+
+
+def read_history(filename):
+    """Read the runs of a benchmark history.
+
+    Args:
+        filename (str): Path to the JSON lines history.
+
+    Returns:
+        list: Runs in the order they were recorded.
+    """
+    if not os.path.exists(filename):
+        return []
+    history = []
+    with open(filename, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                history += [json.loads(line)]
+    return history
+
+
+def run_stages(cases, directory, number, profile=0):
+    """Time every stage of every case.
+
+    Args:
+        cases (list): Cases returned by get_cases.
+        directory (str): Directory where the outputs are written.
+        number (int): Number of timed repetitions.
+        profile (int): Number of functions printed from the profile of
+                every stage. Default is 0, which does not profile.
+
+    Returns:
+        list: Dictionaries with the "case", "stage", best time in
+                "seconds" and "peak_memory" in bytes of every stage.
+    """
+    results = []
+    for case in cases:
+        for stage, setup in get_stages(case, directory):
+            function = setup()
+            timer = timeit.Timer(function)
+            seconds = min(timer.repeat(repeat=number, number=1))
+            tracemalloc.start()
+            try:
+                function()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            results += [{'case': case['name'], 'stage': stage,
+                         'seconds': seconds, 'peak_memory': peak}]
+            print('%-16s %-26s %10.2f ms %10.1f MB' % (
+                case['name'], stage, seconds * 1000, peak / 1e6))
+            if profile > 0:
+                profiler = cProfile.Profile()
+                profiler.runcall(function)
+                stats = pstats.Stats(profiler, stream=sys.stdout)
+                stats.sort_stats('cumulative').print_stats(profile)
+    return results
+
+
+def _copy_product(directory, name):
+    """Copy the bundled product directory.
+
+    Args:
+        directory (str): Directory where the copy is created.
+        name (str): Name of the copy.
+
+    Returns:
+        str: Path to the copy.
+    """
+    product_directory = os.path.join(directory, name)
+    shutil.copytree(PRODUCT_DIRECTORY, product_directory)
+    return product_directory
+
+
+def main(args):
+    history = read_history(args.output)
+    resolver = get_resolver()
+    # The event location is not requested from ComCat while timing
+    set_resolver(LocationResolver('file:///nonexistent/[EVENTID]'))
+    try:
+        with tempfile.TemporaryDirectory() as tempdir:
+            cases = get_cases(tempdir, args.scales)
+            print('%-16s %-26s %13s %13s' % ('case', 'stage', 'time',
+                                             'peak memory'))
+            results = run_stages(cases, tempdir, args.number, args.profile)
+    finally:
+        set_resolver(resolver)
+    regressions = find_regressions(results, history, args.threshold,
+                                   platform.platform())
+    for case, stage, previous, seconds in regressions:
+        print('Regression: %s %s took %.2f ms instead of %.2f ms.' % (
+            case, stage, seconds * 1000, previous * 1000))
+    if args.history:
+        run = {
+            'date': datetime.datetime.utcnow().strftime(TIMEFMT),
+            'commit': get_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'number': args.number,
+            'results': results,
+        }
+        with open(args.output, 'a') as f:
+            f.write(json.dumps(run, sort_keys=True) + '\n')
+    if args.check and len(regressions) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = get_parser()
+    pargs, unknown = parser.parse_known_args()
+    main(pargs)
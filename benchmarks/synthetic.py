@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import os
+
+# third party imports
+import numpy as np
+
+EVENT_HEADER = """\
+% ---------------------------------- FINITE-SOURCE RUPTURE MODEL --------------------------------
+%
+% Event : SYNTHETIC SUBDUCTION MODEL  2020/01/01 [Benchmark]
+% EventTAG: synthetic
+%
+% Loc  : LAT = -23.3600  LON = -70.3100  DEP = 36.0
+% Size : LEN = {length:g} km  WID = {width:g} km  Mw = 8.15  Mo = 2.1948157e+21 Nm
+% Mech : STRK = 6  DIP = 22  RAKE = 87  Htop = 11.51 km
+% Rupt : HypX = 172.5 km  Hypz = 15 km  avTr = 6.93 s  avVr = 2.27 km/s
+%
+% ---------------------------------- inversion-related parameters --------------------------------
+%
+% Invs : Nx = {nx}  Nz = {nz}  Fmin = 0.002 Hz  Fmax = 1 Hz
+% Invs : Dx = {dx:g} km  Dz = {dz:g} km
+% Invs : Ntw = 8  Nsg = {num_segments}    (# of time-windows,# of fault segments)
+% Invs : LEN = 3.6 s  SHF = 1.8 s    (time-window length and time-shift)
+% SVF  : Asymetriccosine    (type of slip-velocity function used)
+%
+%--------------------------------------------------------------------------------------------------
+%--------------------------- MULTISEGMENT MODEL ---------------------------------------------------
+%--------------------------------------------------------------------------------------------------
+"""
+
+SEGMENT_HEADER = """\
+% SEGMENT # {number}: STRIKE = {strike:g} deg DIP = {dip:g} deg
+% LEN = {length:g} km WID = {width:g} km
+% depth to top: Z2top = 11.83 km
+% Nsbfs = {num_subfaults} subfaults
+%--------------------------------------------------------------------------------------------------
+% LAT LON X==EW Y==NS Z SLIP RAKE TRUP RISE SF_MOMENT
+%--------------------------------------------------------------------------------------------------
+"""
+
+ROW_FORMAT = ('%9.4f %9.4f %9.4f %9.4f %8.4f %7.4f %9.4f %8.4f %7.4f '
+              '%9.2e')
+
+
+def write_fsp(fspfile, num_segments=1, nx=15, nz=7, dx=15.0, dz=10.0,
+              seed=0):
+    """Write a synthetic multi-segment FSP file.
+
+    Every segment has the same (nz, nx) grid of dynamic subfault rows with
+    smooth random slip, so the file exercises the same code paths as a real
+    multi-segment model of the requested size.
+
+    Args:
+        fspfile (str): Path to the output file.
+        num_segments (int): Number of segments. Default is 1.
+        nx (int): Number of subfaults along strike. Default is 15.
+        nz (int): Number of subfaults down dip. Default is 7.
+        dx (float): Subfault length in km. Default is 15.
+        dz (float): Subfault width in km. Default is 10.
+        seed (int): Seed of the random number generator. Default is 0.
+
+    Returns:
+        str: Path to the output file.
+    """
+    rng = np.random.RandomState(seed)
+    length = nx * dx
+    width = nz * dz
+    zz, xx = np.mgrid[0:nz, 0:nx]
+    with open(fspfile, 'w') as f:
+        f.write(EVENT_HEADER.format(length=length, width=width, nx=nx,
+                                    nz=nz, dx=dx, dz=dz,
+                                    num_segments=num_segments))
+        for number in range(1, num_segments + 1):
+            strike = (6 + 3 * number) % 360
+            dip = 10 + (number % 30)
+            f.write(SEGMENT_HEADER.format(number=number, strike=strike,
+                                          dip=dip, length=length,
+                                          width=width,
+                                          num_subfaults=nx * nz))
+            center_x = rng.uniform(0, nx)
+            center_z = rng.uniform(0, nz)
+            slip = 10 * np.exp(-((xx - center_x) / (0.3 * nx)) ** 2
+                               - ((zz - center_z) / (0.3 * nz)) ** 2)
+            lat = -23.36 + 0.1 * number + 0.09 * xx * np.cos(
+                np.radians(strike))
+            lon = -70.31 - 0.05 * number + 0.09 * zz * np.sin(
+                np.radians(dip))
+            table = np.column_stack([
+                lat.ravel(),
+                lon.ravel(),
+                (xx * dx).ravel(),
+                (zz * dz).ravel(),
+                (5 + zz * dz * np.sin(np.radians(dip))).ravel(),
+                slip.ravel(),
+                rng.uniform(60, 120, nx * nz),
+                rng.uniform(0, 100, nx * nz),
+                rng.uniform(1, 10, nx * nz),
+                1e18 * slip.ravel()])
+            np.savetxt(f, table, fmt=ROW_FORMAT)
+        f.write('%' + '-' * 98 + '\n')
+    return fspfile
+
+
+def synthetic_path(directory, num_segments, nx, nz):
+    """Create (or reuse) a synthetic FSP file in a directory.
+
+    Args:
+        directory (str): Directory where the file is written.
+        num_segments (int): Number of segments.
+        nx (int): Number of subfaults along strike.
+        nz (int): Number of subfaults down dip.
+
+    Returns:
+        str: Path to the FSP file.
+    """
+    name = 'synthetic_%iseg_%ix%i.fsp' % (num_segments, nz, nx)
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        write_fsp(path, num_segments=num_segments, nx=nx, nz=nz)
+    return path
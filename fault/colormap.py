@@ -0,0 +1,160 @@
+#!/usr/bin/env
+
+# stdlib imports
+import functools
+import os
+
+# third party imports
+import numpy as np
+
+homedir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CPT = os.path.join(homedir, 'fault2.cpt')
+
+
+class SlipColormap(object):
+    """Vectorized mapping of slip values to hex colors.
+
+    The hex colors of the palette are computed once per color palette file
+    and shared, while the data range belongs to each instance. Values are
+    mapped with the same indexing as matplotlib colormaps, so the colors are
+    identical to ColorPalette.getDataColor(value, color_format='hex').
+    """
+
+    def __init__(self, lut, vmin, vmax):
+        """
+        Args:
+            lut (nd.array): Hex colors of the colormap followed by the
+                    colors for values under the range, over the range and
+                    NaN.
+            vmin (float): Value mapped to the first color.
+            vmax (float): Value mapped to the last color.
+        """
+        self._lut = lut
+        self._vmin = vmin
+        self._vmax = vmax
+
+    @classmethod
+    def fromFile(cls, filename=DEFAULT_CPT, vmin=None, vmax=None):
+        """Create a colormap from a GMT color palette file.
+
+        Args:
+            filename (str): Path to the cpt file. Default is fault2.cpt.
+            vmin (float): Value mapped to the first color. Default is None,
+                    which uses the minimum of the palette.
+            vmax (float): Value mapped to the last color. Default is None,
+                    which uses the maximum of the palette.
+
+        Returns:
+            SlipColormap: Colormap for the palette.
+        """
+        lut, palette_min, palette_max = _load_palette(
+            os.path.abspath(filename))
+        if vmin is None:
+            vmin = palette_min
+        if vmax is None:
+            vmax = palette_max
+        return cls(lut, vmin, vmax)
+
+    def getHexColors(self, values):
+        """Get the hex color of each value.
+
+        Args:
+            values (array-like): Data values.
+
+        Returns:
+            nd.array: Array of hex color strings with the shape of values.
+        """
+        values = np.asarray(values, dtype='d')
+        normvalues = (values - self.vmin) / (self.vmax - self.vmin)
+        num_colors = len(self._lut) - 3
+        with np.errstate(invalid='ignore'):
+            scaled = normvalues * num_colors
+            scaled[scaled == num_colors] = num_colors - 1
+            under = scaled < 0
+            over = scaled >= num_colors
+            bad = np.isnan(scaled)
+            indices = np.zeros(scaled.shape, dtype=np.intp)
+            valid = ~(under | over | bad)
+            indices[valid] = scaled[valid].astype(np.intp)
+        indices[under] = num_colors
+        indices[over] = num_colors + 1
+        indices[bad] = num_colors + 2
+        return self._lut[indices]
+
+    @property
+    def vmax(self):
+        """
+        Helper to return the value mapped to the last color.
+
+        Returns:
+            float: Maximum value.
+        """
+        return self._vmax
+
+    @vmax.setter
+    def vmax(self, vmax):
+        """
+        Helper to set the value mapped to the last color.
+
+        vmax (float): Maximum value.
+        """
+        self._vmax = vmax
+
+    @property
+    def vmin(self):
+        """
+        Helper to return the value mapped to the first color.
+
+        Returns:
+            float: Minimum value.
+        """
+        return self._vmin
+
+    @vmin.setter
+    def vmin(self, vmin):
+        """
+        Helper to set the value mapped to the first color.
+
+        vmin (float): Minimum value.
+        """
+        self._vmin = vmin
+
+
+@functools.lru_cache(maxsize=None)
+def _load_palette(filename):
+    """Helper to read a color palette file and build its hex lookup table.
+
+    Args:
+        filename (str): Absolute path to the cpt file.
+
+    Returns:
+        tuple: Read only array of hex colors (colormap colors followed by the
+                under, over and bad colors), palette minimum and maximum.
+    """
+    # impactutils is only needed to build the table
+    from impactutils.colors.cpalette import ColorPalette
+
+    palette = ColorPalette.fromFile(filename)
+    cmap = palette.cmap
+    rgba = list(cmap(np.arange(cmap.N)))
+    rgba += [cmap(-1), cmap(cmap.N), cmap(np.nan)]
+    lut = np.array([_to_hex(color) for color in rgba])
+    lut.setflags(write=False)
+    return lut, palette.vmin, palette.vmax
+
+
+def _to_hex(color):
+    """Helper to format a color like ColorPalette.getDataColor.
+
+    The channels are truncated to integers from 0 to 255 and written as
+    uppercase hex.
+
+    Args:
+        color (tuple): RGBA color with channels from 0 to 1.
+
+    Returns:
+        str: Hex color.
+    """
+    color255 = [int(c * 255) for c in color]
+    return ('#%02x%02x%02x' % (color255[0], color255[1],
+                               color255[2])).upper()
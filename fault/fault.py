@@ -1,25 +1,25 @@
 #!/usr/bin/env
 
 # stdlib imports
-import copy
-from matplotlib import colors
-import matplotlib.cm as cm
-import matplotlib.colors as colors
+from collections import OrderedDict
 import os
+import warnings
 
 # third party imports
-from impactutils.colors.cpalette import ColorPalette
 import numpy as np
-from openquake.hazardlib.geo.geodetic import point_at
-from openquake.hazardlib.geo.utils import OrthographicProjection
 
 # local imports
-from fault.io.timeseries import read_from_directory
-from fault.io.fsp import read_from_file
+from fault.colormap import SlipColormap
+from fault.grid import SlipGrid
+from fault.io.timeseries import TimeseriesStore
+from fault.io.fsp import FaultModel
+from fault.parallel import map_ordered
+from fault.rupture import (autocorrelate, autocorrelate_profiles,
+        find_rupture_window, find_trapz_window, get_rupture_size,
+        get_rupture_sizes, threshold_slip)
 
 
 homedir = os.path.dirname(os.path.abspath(__file__))
-COLORS = ColorPalette.fromFile(os.path.join(homedir, 'fault2.cpt'))
 
 
 class Fault(object):
@@ -28,6 +28,7 @@ class Fault(object):
         self._event = None
         self._segments = None
         self._timeseries_dict = None
+        self._timeseries_store = None
 
     def autocorrelateSums(self, rows, columns):
         """Return slips summed along each axis and autocorrelated.
@@ -38,231 +39,87 @@ class Fault(object):
         Returns:
             tuple: autocorrelated rows and columns
         """
-        rows_copy = rows.copy()
-        columns_copy = columns.copy()
-        autocorrelated_rows = self._autocorrelate(rows_copy)
-        autocorrelated_columns = self._autocorrelate(columns_copy)
+        autocorrelated_rows, autocorrelated_columns = autocorrelate_profiles(
+                [rows, columns])
         return (autocorrelated_rows, autocorrelated_columns)
 
-    def createGeoJSON(self):
+    def createGeoJSON(self, max_workers=None):
         """
         Create the GeoJSON for the segment grid cells and earthquake point.
 
+        The GeoJSON is derived from the columnar grid created by createGrid
+        and stored in the corners attribute.
+
+        Args:
+            max_workers (int): Number of processes used to build the
+                    polygons of the segments. Default is None, which builds
+                    them serially.
+
         Returns:
             dictionary: GeoJSON formatted dictionary.
         """
-        segment_cells = []
+        self.createGrid(max_workers)
+        self.corners = self.grid.toGeoJSON()
+        return self.corners
+
+    def createGrid(self, max_workers=None):
+        """
+        Create the columnar grid of the segment grid cells.
+
+        The grid is stored in the grid attribute.
 
-        slips = np.asarray([])
-        for segment in self.segments:
-            slips = np.append(slips, segment['slip'].flatten())
+        Args:
+            max_workers (int): Number of processes used to build the
+                    polygons of the segments. Default is None, which builds
+                    them serially.
+
+        Returns:
+            SlipGrid: Polygons of every subfault with their properties.
+        """
+        slips = np.concatenate(
+            [segment['slip'].flatten() for segment in self.segments])
         max_slip = np.ceil(np.max(slips))
-        COLORS.vmax = max_slip
+        colormap = SlipColormap.fromFile(os.path.join(homedir, 'fault2.cpt'),
+                                         vmax=max_slip)
+
+        # The polygons of each segment are independent
+        arguments = [(segment['lon'], segment['lat'], segment['depth'],
+                      segment['strike'], segment['dip'], self.event['dx'],
+                      self.event['dz']) for segment in self.segments]
+        segment_rings = map_ordered(_get_subfault_rings, arguments,
+                                    max_workers, processes=True)
 
+        grids = []
         for num in range(self.getNumSegments()):
             # Get segment
             segment = self.getSegment(num)
-            arr_size = len(segment['lat'].flatten())
-            dx = [self.event['dx']/2] * arr_size
-            dy = [self.event['dz']/2] * arr_size
-            length = [self.event['dx']] * arr_size
-            width = [self.event['dz']] * arr_size
-            strike = [segment['strike']] * arr_size
-            dip = [segment['dip']] * arr_size
-            optional_properties = copy.deepcopy(segment)
-            for key in ['dip', 'strike', 'lon', 'depth',
-                    'slip', 'lat', 'length', 'width']:
-                del optional_properties[key]
-            for key in optional_properties:
-                optional_properties[key] = optional_properties[key].flatten()
-
-            px = segment['lon'].flatten()
-            py = segment['lat'].flatten()
-            pz = segment['depth'].flatten()
+            properties = OrderedDict()
+            for key in segment:
+                if key not in ['dip', 'strike', 'lon', 'depth',
+                        'slip', 'lat', 'length', 'width']:
+                    properties[key] = segment[key].flatten()
             slips = segment['slip'].flatten()
-
-            # Verify that all are numpy arrays
-            px = np.array(px, dtype='d')
-            py = np.array(py, dtype='d')
-            # depth should be in meters not in km
-            pz = np.array(pz, dtype='d') * 1000
-            dx = np.array(dx, dtype='d')
-            dy = np.array(dy, dtype='d')
-            length = np.array(length, dtype='d')
-            width = np.array(width, dtype='d')
-            strike = np.array(strike, dtype='d')
-            dip = np.array(dip, dtype='d')
-
-            # Get P1 and P2 (top horizontal points)
-            theta = np.rad2deg(np.arctan((dy * np.cos(np.deg2rad(dip))) / dx))
-            P1_direction = strike + 180 + theta
-            P1_distance = np.sqrt( dx**2 + (dy * np.cos(np.deg2rad(dip)))**2)
-            P2_direction = strike
-            P2_distance = length
-            P1_lon = np.asarray([])
-            P1_lat = np.asarray([])
-            P2_lon = np.asarray([])
-            P2_lat = np.asarray([])
-            for idx, value in enumerate(px):
-                P1_points = point_at(px[idx], py[idx],
-                        P1_direction[idx], P1_distance[idx])
-                P1_lon = np.append(P1_lon, P1_points[0])
-                P1_lat = np.append(P1_lat, P1_points[1])
-                P2_points = point_at(P1_points[0], P1_points[1],
-                        P2_direction[idx], P2_distance[idx])
-                P2_lon = np.append(P2_lon, P2_points[0])
-                P2_lat = np.append(P2_lat, P2_points[1])
-
-            # Get top depth
-            top_horizontal_depth = pz - 1000 * np.abs(dy * np.sin(np.deg2rad(dip)))
-
-            group_index = np.array(range(len(P1_lon)))
-
-            # Convert dip to radians
-            dip = np.radians(dip)
-
-
-            # Get a projection object
-            west = np.min((P1_lon.min(), P2_lon.min()))
-            east = np.max((P1_lon.max(), P2_lon.max()))
-            south = np.min((P1_lat.min(), P2_lat.min()))
-            north = np.max((P1_lat.max(), P2_lat.max()))
-
-            # Projected coordinates are in km
-            proj = OrthographicProjection(west, east, north, south)
-            xp2 = np.zeros_like(P1_lon)
-            xp3 = np.zeros_like(P1_lon)
-            yp2 = np.zeros_like(P1_lon)
-            yp3 = np.zeros_like(P1_lon)
-            zpdown = np.zeros_like(top_horizontal_depth)
-            for i, p1lon in enumerate(P1_lon):
-                # Project the top edge coordinates
-                p0x, p0y = proj(p1lon, P1_lat[i])
-                p1x, p1y = proj(P2_lon[i], P2_lat[i])
-
-                # Get the rotation angle defined by these two points
-                if strike is None:
-                    dx = p1x - p0x
-                    dy = p1y - p0y
-                    theta = np.arctan2(dx, dy)  # theta is angle from north
-                elif len(strike) == 1:
-                    theta = np.radians(strike[0])
-                else:
-                    theta = np.radians(strike[i])
-
-                R = np.array([[np.cos(theta), -np.sin(theta)],
-                              [np.sin(theta), np.cos(theta)]])
-
-                # Rotate the top edge points into a new coordinate system (vertical
-                # line)
-                p0 = np.array([p0x, p0y])
-                p1 = np.array([p1x, p1y])
-                p0p = np.dot(R, p0)
-                p1p = np.dot(R, p1)
-
-                # Get right side coordinates in project, rotated system
-                dz = np.sin(dip[i]) * width[i] * 1000
-                dx = np.cos(dip[i]) * width[i]
-                p3xp = p0p[0] + dx
-                p3yp = p0p[1]
-                p2xp = p1p[0] + dx
-                p2yp = p1p[1]
-
-                # Get right side coordinates in un-rotated projected system
-                p3p = np.array([p3xp, p3yp])
-                p2p = np.array([p2xp, p2yp])
-                Rback = np.array([[np.cos(-theta), -np.sin(-theta)],
-                                  [np.sin(-theta), np.cos(-theta)]])
-                p3 = np.dot(Rback, p3p)
-                p2 = np.dot(Rback, p2p)
-                p3x = np.array([p3[0]])
-                p3y = np.array([p3[1]])
-                p2x = np.array([p2[0]])
-                p2y = np.array([p2[1]])
-
-                # project lower edge points back to lat/lon coordinates
-                lon3, lat3 = proj(p3x, p3y, reverse=True)
-                lon2, lat2 = proj(p2x, p2y, reverse=True)
-
-                xp2[i] = lon2
-                xp3[i] = lon3
-                yp2[i] = lat2
-                yp3[i] = lat3
-                zpdown[i] = top_horizontal_depth[i] + dz
-
-            # ---------------------------------------------------------------------
-            # Create GeoJSON object
-            # ---------------------------------------------------------------------
-
-            u_groups = np.unique(group_index)
-            n_groups = len(u_groups)
-            polygons = []
-
-            for i in range(n_groups):
-                ind = np.where(u_groups[i] == group_index)[0]
-                lons = np.concatenate(
-                    [P1_lon[ind[0]].reshape((1,)),
-                     P2_lon[ind], xp2[ind][::-1],
-                     xp3[ind][::-1][-1].reshape((1,)),
-                     P1_lon[ind[0]].reshape((1,))
-                     ])
-                lats = np.concatenate(
-                    [P1_lat[ind[0]].reshape((1,)),
-                     P2_lat[ind],
-                     yp2[ind][::-1],
-                     yp3[ind][::-1][-1].reshape((1,)),
-                     P1_lat[ind[0]].reshape((1,))
-                     ])
-                deps = np.concatenate(
-                    [top_horizontal_depth[ind[0]].reshape((1,)),
-                     top_horizontal_depth[ind],
-                     zpdown[ind][::-1],
-                     zpdown[ind][::-1][-1].reshape((1,)),
-                     top_horizontal_depth[ind[0]].reshape((1,))])
-
-                poly = []
-                for lon, lat, dep in zip(lons, lats, deps):
-                    lon = np.around(lon, decimals=4)
-                    lat = np.around(lat, decimals=4)
-                    deps = np.around(deps, decimals=4)
-                    coordinates = np.around(np.asarray([lon, lat, dep]),
-                            decimals=5)
-                    poly.append(coordinates.tolist())
-
-                properties = {}
-                for property in optional_properties:
-                    properties[property] = optional_properties[property][i]
-                h = COLORS.getDataColor(slips[i], color_format='hex')
-                properties["slip"] = slips[i]
-                properties["fill"] = h
-                properties["stroke-width"] = 1.5
-                properties["fill-opacity"] = 1
-                d = {
-                         "type": "Feature",
-                         "properties": properties,
-                         "geometry": {
-                             "type": "Polygon",
-                             "coordinates": [poly]
-                         }
-                     }
-                polygons += [d]
-            segment_cells += polygons
-        features = {"type": "FeatureCollection",
-             "metadata": {
-                'epicenter': {
-                 'location': self.event['location'],
-                 'date': self.event['date'].strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
-                 'depth': self.event['depth'],
-                 'moment': self.event['moment'],
-                 'mag': self.event['mag'],
-                 'lon': self.event['lon'],
-                 'lat': self.event['lat']
-                 }
-             },
-             "features": segment_cells
-             }
-        self.corners = features
-
+            properties["slip"] = slips
+            properties["fill"] = colormap.getHexColors(slips)
+            properties["stroke-width"] = np.full(len(slips), 1.5)
+            properties["fill-opacity"] = np.ones(len(slips), dtype=int)
+            rings = segment_rings[num]
+            ring_offsets = np.arange(0, rings.shape[0] * 5 + 1, 5)
+            grids += [SlipGrid(rings.reshape(-1, 3), ring_offsets,
+                               properties)]
+        metadata = {
+            'epicenter': {
+                'location': self.event['location'],
+                'date': self.event['date'].strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+                'depth': self.event['depth'],
+                'moment': self.event['moment'],
+                'mag': self.event['mag'],
+                'lon': self.event['lon'],
+                'lat': self.event['lat']
+            }
+        }
+        self.grid = SlipGrid.concatenate(grids, metadata)
+        return self.grid
 
     @property
     def event(self):
@@ -284,73 +141,48 @@ class Fault(object):
         self._event = event
 
     @classmethod
-    def fromFiles(cls, fault_file, timeseries_directory):
+    def fromFiles(cls, fault_file, timeseries_directory, max_workers=None):
         """Creates class instance with a fault model and time series.
 
         Args:
             fault_file (str): Path to finite fault (.fsp) file.
             input_directory (str): Path to directory of files.
+            max_workers (int): Number of threads used to read the time series
+                    and size the segments. Default is None, which processes
+                    them serially.
 
         Returns:
             Fault: Fault object with all information set.
         """
         fault = cls()
-        event, segments = read_from_file(fault_file)
+        model = FaultModel.fromFile(fault_file)
         try:
-            timeseries_dict = read_from_directory(timeseries_directory)
-            fault.timeseries_dict = timeseries_dict
+            fault.timeseries_store = TimeseriesStore.fromDirectory(
+                    timeseries_directory, max_workers)
         except:
             warnings.warn('Time series files unavailable.')
-        fault.segments = segments
-        fault.event = event
-        fault._segment_sizes = {}
-        for num in range(fault.getNumSegments()):
-            # Get segment
-            segment = fault.getSegment(num)
-            # Threshold slip
-            thresholded_slip = fault.thresholdSlip(segment['slip'])
-            # Sum rows and columns
-            sum_rows, sum_columns = fault.sumSlip(thresholded_slip)
-            # Autocorrelate summed rows and columns
-            arows, acolumns = fault.autocorrelateSums(sum_rows,sum_columns)
-            # Get rupture dimensions
-            length, width = fault.getRuptureSize(arows, acolumns)
-            area = length * width
-            fault._segment_sizes[num] = {'length': length,
-                    'width': width,
-                    'area': area}
+        fault.segments = model.segments
+        fault.event = model.event
+        fault._setSegmentSizes(max_workers)
         return fault
 
     @classmethod
-    def fromFsp(cls, fault_file):
+    def fromFsp(cls, fault_file, max_workers=None):
         """Creates class instance with a fault model.
 
         Args:
             fault_file (str): Path to finite fault (.fsp) file.
+            max_workers (int): Number of threads used to size the segments.
+                    Default is None, which sizes them serially.
 
         Returns:
             Fault: Fault object with fault model information set.
         """
-        event, segments = read_from_file(fault_file)
+        model = FaultModel.fromFile(fault_file)
         fault = cls()
-        fault.segments = segments
-        fault.event = event
-        fault._segment_sizes = {}
-        for num in range(fault.getNumSegments()):
-            # Get segment
-            segment = fault.getSegment(num)
-            # Threshold slip
-            thresholded_slip = fault.thresholdSlip(segment['slip'])
-            # Sum rows and columns
-            sum_rows, sum_columns = fault.sumSlip(thresholded_slip)
-            # Autocorrelate summed rows and columns
-            arows, acolumns = fault.autocorrelateSums(sum_rows,sum_columns)
-            # Get rupture dimensions
-            length, width = fault.getRuptureSize(arows, acolumns)
-            area = length * width
-            fault._segment_sizes[num] = {'length': length,
-                    'width': width,
-                    'area:': area}
+        fault.segments = model.segments
+        fault.event = model.event
+        fault._setSegmentSizes(max_workers)
         return fault
 
     @classmethod
@@ -363,9 +195,9 @@ class Fault(object):
         Returns:
             Fault: Fault object with time series information set.
         """
-        timeseries_dict = read_from_directory(timeseries_directory)
+        timeseries_store = TimeseriesStore.fromDirectory(timeseries_directory)
         fault = cls()
-        fault.timeseries_dict = timeseries_dict
+        fault.timeseries_store = timeseries_store
         return fault
 
     def getRuptureSize(self, rows, columns):
@@ -377,68 +209,23 @@ class Fault(object):
         Returns:
             tuple: rupture length and width
         """
-        dx = self.event['dx']
-        dz = self.event['dz']
-        rows_copy = rows.copy()
-        columns_copy = columns.copy()
-
-        # Integrate to get the area under the curve
-        row_area = np.trapz(rows_copy, dx=dx)
-        column_area = np.trapz(columns_copy, dx=dz)
-
-        # Normalize by the t=0 (or maximum) value
-        rupture_length = row_area / rows_copy.max()
-        rupture_width = column_area / columns_copy.max()
-        return (rupture_length, rupture_width)
+        return get_rupture_size(rows, columns, self.event['dx'],
+                self.event['dz'])
 
     def getRuptureGrid(self, length, width, thresholded_slip, fault_length, fault_width):
-        dx = self.event['dx']
-        dz = self.event['dz']
-
-        # Initialize values
-        left_location = 0
-        right_location = left_location + length
-        top_location = 0
-        bottom_location = top_location + width
-        max_left = -1
-        max_right = -1
-        max_top = -1
-        max_bottom = -1
-        max_area = -1
-
-        # Find maximum area within a grid
-        while right_location < fault_length :
-            top_location = 0
-            bottom_location = top_location + width
-
-            # Get indices of min an max length
-            left_idx = int(np.floor(left_location / dx))
-            right_idx = int(np.floor(right_location / dx))
-            left_location += dx
-            right_location += dx
-            while bottom_location < fault_width:
-                # Get indices of min an max width
-                top_idx = int(np.floor(top_location / dz))
-                bottom_idx = int(np.floor(bottom_location / dz))
-                top_location += dz
-                bottom_location += dz
-
-                # Sum subarray of the thesholded slip
-                subarray = thresholded_slip[top_idx : bottom_idx, left_idx : right_idx]
-                area = np.sum(subarray)
-                if area > max_area:
-                    max_left = left_idx
-                    max_right = right_idx
-                    max_top = top_idx
-                    max_bottom = bottom_idx
-                    max_area = area
-
-        # Set final min and max values in both directions
-        left = max_left
-        right = max_right
-        top = max_top
-        bottom = max_bottom
-        return left, right, top, bottom
+        """Return the indices of the rupture window with the most slip.
+
+        Args:
+            length (float): Rupture length.
+            width (float): Rupture width.
+            thresholded_slip (nd.array): Array of thresholded slips.
+            fault_length (float): Length defined in the file.
+            fault_width (float): Width defined in the file.
+        Returns:
+            tuple: left, right, top and bottom indices.
+        """
+        return find_rupture_window(thresholded_slip, length, width,
+                self.event['dx'], self.event['dz'], fault_length, fault_width)
 
     def getRuptureCorners(self, window, dd, length, sum_rows, sum_columns):
         """Return rupture length and width.
@@ -452,26 +239,7 @@ class Fault(object):
         Returns:
             Tuple: Indices of min and max locations in a given direction.
         """
-        # Initialize values
-        first_location = 0
-        last_location = first_location + window
-        max_first = -1
-        max_last = -1
-        max_area = -1
-
-        # Find min and max values in two directions
-        while last_location < length:
-            first_idx = int(np.floor(first_location/dd))
-            last_idx = int(np.floor(last_location/dd))
-            first_location += dd
-            last_location += dd
-            subarray = sum_rows[first_idx:last_idx]
-            area = np.trapz(subarray,dx=dd)
-            if area > max_area:
-                max_first = first_idx
-                max_last = last_idx
-                max_area = area
-        return (max_first, max_last)
+        return find_trapz_window(sum_rows, window, dd, length)
 
     def getCornerCoordinates(self, left, right, top, bottom, lon, lat):
         """Return rupture length and width.
@@ -518,7 +286,8 @@ class Fault(object):
         Args:
             idx (int): Desired segment number (0 offset).
         Returns:
-            dict: Segment dictionary, containing fields:
+            dict: Segment dictionary (or dictionary-like Segment),
+                  containing fields:
                   - strike Along-strike axis direction.
                   - dip Dip angle.
                   - lat 2D numpy array of latitudes.
@@ -567,9 +336,8 @@ class Fault(object):
         Returns:
             tuple: summed rows and summed columns
         """
-        slip_copy = slip.copy()
-        sum_rows = slip_copy.sum(axis=0)
-        sum_columns = slip_copy.sum(axis=1)
+        sum_rows = slip.sum(axis=0)
+        sum_columns = slip.sum(axis=1)
         return (sum_rows, sum_columns)
 
     def thresholdSlip(self, slip):
@@ -580,25 +348,21 @@ class Fault(object):
         Returns:
             nd.array: Array of thresholded slips
         """
-        thresholded_slip = slip.copy()
-        slip_thresh = slip.max()*0.1
-        if slip_thresh < 1:
-            slip_thresh=1.0
-        if thresholded_slip.max() <1:
-            slip_thresh=0.2
-        if thresholded_slip.max() < 3:
-            slip_thresh=0.5
-        thresholded_slip[thresholded_slip < slip_thresh] = 0
-        return thresholded_slip
+        return threshold_slip(slip)
 
     @property
     def timeseries_dict(self):
         """
         Helper to return time series dictionary.
 
+        The dictionary is created from the time series store the first
+        time it is requested.
+
         Returns:
             dictionary: Dictionary of time series for each station.
         """
+        if self._timeseries_dict is None and self.timeseries_store is not None:
+            self._timeseries_dict = self.timeseries_store.toDict()
         return self._timeseries_dict
 
     @timeseries_dict.setter
@@ -610,6 +374,27 @@ class Fault(object):
                 each station.
     """
         self._timeseries_dict = timeseries_dict
+        self._timeseries_store = None
+
+    @property
+    def timeseries_store(self):
+        """
+        Helper to return the time series store.
+
+        Returns:
+            TimeseriesStore: Time series for each station.
+        """
+        return self._timeseries_store
+
+    @timeseries_store.setter
+    def timeseries_store(self, timeseries_store):
+        """
+        Helper to set the time series store.
+
+        timeseries_store (TimeseriesStore): Time series for each station.
+        """
+        self._timeseries_store = timeseries_store
+        self._timeseries_dict = None
 
     def _autocorrelate(self, x):
         """Autocorrelate a 1D array.
@@ -620,5 +405,128 @@ class Fault(object):
         Returns:
             nd.array: autocorrelated data
         """
-        result = np.correlate(x,x,mode='full')[len(x)//2:]
-        return result
+        return autocorrelate(x)
+
+    def _setSegmentSizes(self, max_workers=None):
+        """Helper to compute the rupture length, width and area of every
+        segment.
+
+        Args:
+            max_workers (int): Number of threads used to size the segments.
+                    Default is None, which sizes them serially.
+        """
+        slips = [segment['slip'] for segment in self.segments]
+        sizes = get_rupture_sizes(slips, self.event['dx'], self.event['dz'],
+                                  max_workers)
+        self._segment_sizes = {}
+        for num, (length, width) in enumerate(sizes):
+            self._segment_sizes[num] = {'length': length,
+                    'width': width,
+                    'area': length * width}
+
+
+def _get_subfault_rings(lon, lat, depth, strike, dip, dx, dz):
+    """Helper to compute the corner coordinates of every subfault.
+
+    All subfaults of a segment are processed at once: the top edge is found
+    with forward geodesics from the subfault centers and the bottom edge by
+    offsetting the projected, rotated top edge down dip.
+
+    Args:
+        lon (nd.array): Longitudes of the subfault centers.
+        lat (nd.array): Latitudes of the subfault centers.
+        depth (nd.array): Depths of the subfault centers in km.
+        strike (float): Segment strike.
+        dip (float): Segment dip.
+        dx (float): Subfault length in km.
+        dz (float): Subfault width in km.
+
+    Returns:
+        nd.array: Array of shape (subfaults, 5, 3) with the closed ring of
+                (lon, lat, depth in m) coordinates of each subfault, rounded
+                as in the GeoJSON output.
+    """
+    # openquake takes seconds to import and is only needed for the geometry
+    from openquake.hazardlib.geo.geodetic import point_at
+    from openquake.hazardlib.geo.utils import OrthographicProjection
+
+    px = np.array(lon, dtype='d').flatten()
+    py = np.array(lat, dtype='d').flatten()
+    # depth should be in meters not in km
+    pz = np.array(depth, dtype='d').flatten() * 1000
+    arr_size = len(px)
+    dy = np.full(arr_size, dz/2, dtype='d')
+    width = np.full(arr_size, dz, dtype='d')
+    length = np.full(arr_size, dx, dtype='d')
+    dx = np.full(arr_size, dx/2, dtype='d')
+    strike = np.full(arr_size, strike, dtype='d')
+    dip = np.full(arr_size, dip, dtype='d')
+
+    # Get P1 and P2 (top horizontal points)
+    theta = np.rad2deg(np.arctan((dy * np.cos(np.deg2rad(dip))) / dx))
+    P1_direction = strike + 180 + theta
+    P1_distance = np.sqrt(dx**2 + (dy * np.cos(np.deg2rad(dip)))**2)
+    P2_direction = strike
+    P2_distance = length
+    P1_lon, P1_lat = point_at(px, py, P1_direction, P1_distance)
+    P2_lon, P2_lat = point_at(P1_lon, P1_lat, P2_direction, P2_distance)
+
+    # Get top depth
+    top_horizontal_depth = pz - 1000 * np.abs(dy * np.sin(np.deg2rad(dip)))
+
+    # Convert dip to radians
+    dip = np.radians(dip)
+
+    # Get a projection object
+    west = np.min((P1_lon.min(), P2_lon.min()))
+    east = np.max((P1_lon.max(), P2_lon.max()))
+    south = np.min((P1_lat.min(), P2_lat.min()))
+    north = np.max((P1_lat.max(), P2_lat.max()))
+
+    # Projected coordinates are in km
+    proj = OrthographicProjection(west, east, north, south)
+
+    # Project the top edge coordinates
+    p0x, p0y = proj(P1_lon, P1_lat)
+    p1x, p1y = proj(P2_lon, P2_lat)
+
+    # Rotate the top edge points into a new coordinate system (vertical
+    # line)
+    theta = np.radians(strike)
+    cos_theta = np.cos(theta)
+    sin_theta = np.sin(theta)
+    p0xp = cos_theta * p0x - sin_theta * p0y
+    p0yp = sin_theta * p0x + cos_theta * p0y
+    p1xp = cos_theta * p1x - sin_theta * p1y
+    p1yp = sin_theta * p1x + cos_theta * p1y
+
+    # Get right side coordinates in project, rotated system
+    dz = np.sin(dip) * width * 1000
+    dx = np.cos(dip) * width
+    p3xp = p0xp + dx
+    p3yp = p0yp
+    p2xp = p1xp + dx
+    p2yp = p1yp
+
+    # Get right side coordinates in un-rotated projected system
+    cos_back = np.cos(-theta)
+    sin_back = np.sin(-theta)
+    p3x = cos_back * p3xp - sin_back * p3yp
+    p3y = sin_back * p3xp + cos_back * p3yp
+    p2x = cos_back * p2xp - sin_back * p2yp
+    p2y = sin_back * p2xp + cos_back * p2yp
+
+    # project lower edge points back to lat/lon coordinates
+    xp3, yp3 = proj(p3x, p3y, reverse=True)
+    xp2, yp2 = proj(p2x, p2y, reverse=True)
+    zpdown = top_horizontal_depth + dz
+
+    # Close each ring: top left, top right, bottom right, bottom left
+    lons = np.column_stack([P1_lon, P2_lon, xp2, xp3, P1_lon])
+    lats = np.column_stack([P1_lat, P2_lat, yp2, yp3, P1_lat])
+    deps = np.column_stack([top_horizontal_depth, top_horizontal_depth,
+                            zpdown, zpdown, top_horizontal_depth])
+    lons = np.around(np.around(lons, decimals=4), decimals=5)
+    lats = np.around(np.around(lats, decimals=4), decimals=5)
+    deps = np.around(deps, decimals=5)
+    return np.stack([lons, lats, deps], axis=-1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env
+
+# stdlib imports
+from collections import OrderedDict
+import json
+
+# third party imports
+import numpy as np
+
+
+class SlipGrid(object):
+    """Columnar representation of the subfault polygons of a fault model.
+
+    The polygons are stored as flat arrays instead of one GeoJSON feature
+    per subfault:
+        - coordinates: (vertices, 3) array of lon, lat and depth (m).
+        - ring_offsets: (polygons + 1,) array of the index of the first
+          vertex of each polygon ring, followed by the number of vertices.
+        - properties: ordered mapping of property name to an array with one
+          value per polygon.
+    The GeoJSON feature collection is only built when toGeoJSON is called.
+    """
+
+    def __init__(self, coordinates, ring_offsets, properties, metadata=None):
+        """
+        Args:
+            coordinates (nd.array): Array of (lon, lat, depth) vertices.
+            ring_offsets (nd.array): Offset of the first vertex of each ring
+                    and the total number of vertices.
+            properties (OrderedDict): Property name and per-polygon values.
+            metadata (dict): Feature collection metadata. Default is None.
+        """
+        self._coordinates = np.asarray(coordinates, dtype='d').reshape(-1, 3)
+        self._ring_offsets = np.asarray(ring_offsets, dtype=np.int64)
+        self._properties = OrderedDict(
+            (key, np.asarray(value)) for key, value in properties.items())
+        if metadata is None:
+            metadata = {}
+        self._metadata = metadata
+        if (len(self._ring_offsets) < 1 or
+                self._ring_offsets[-1] != len(self._coordinates)):
+            raise ValueError('Ring offsets do not match the number of '
+                             'coordinates.')
+        for key, value in self._properties.items():
+            if len(value) != self.num_polygons:
+                raise ValueError('Property %r has %i values for %i polygons.'
+                                 % (key, len(value), self.num_polygons))
+
+    @property
+    def coordinates(self):
+        """
+        Helper to return the vertex coordinates.
+
+        Returns:
+            nd.array: Array of (lon, lat, depth) vertices.
+        """
+        return self._coordinates
+
+    @classmethod
+    def concatenate(cls, grids, metadata=None):
+        """Join several grids into one.
+
+        Args:
+            grids (list): List of SlipGrid with the same properties.
+            metadata (dict): Feature collection metadata. Default is None.
+
+        Returns:
+            SlipGrid: Grid with the polygons of every grid, in order.
+        """
+        coordinates = np.concatenate([grid.coordinates for grid in grids])
+        offsets = [np.zeros(1, dtype=np.int64)]
+        total = 0
+        for grid in grids:
+            offsets += [grid.ring_offsets[1:] + total]
+            total += len(grid.coordinates)
+        properties = OrderedDict()
+        for key in grids[0].properties:
+            properties[key] = np.concatenate(
+                [grid.properties[key] for grid in grids])
+        return cls(coordinates, np.concatenate(offsets), properties,
+                   metadata)
+
+    @classmethod
+    def fromFile(cls, filename):
+        """Load a grid written with save.
+
+        Args:
+            filename (str): Path to the grid file.
+
+        Returns:
+            SlipGrid: Grid read from the file.
+        """
+        with np.load(filename, allow_pickle=False) as data:
+            header = json.loads(str(data['header']))
+            properties = OrderedDict()
+            for idx, key in enumerate(header['properties']):
+                properties[key] = data['property_%i' % idx]
+            return cls(data['coordinates'], data['ring_offsets'],
+                       properties, header['metadata'])
+
+    @property
+    def metadata(self):
+        """
+        Helper to return the feature collection metadata.
+
+        Returns:
+            dict: Metadata.
+        """
+        return self._metadata
+
+    @property
+    def num_polygons(self):
+        """
+        Helper to return the number of polygons.
+
+        Returns:
+            int: Number of polygons.
+        """
+        return len(self._ring_offsets) - 1
+
+    @property
+    def properties(self):
+        """
+        Helper to return the polygon properties.
+
+        Returns:
+            OrderedDict: Property name and per-polygon values.
+        """
+        return self._properties
+
+    @property
+    def ring_offsets(self):
+        """
+        Helper to return the ring offsets.
+
+        Returns:
+            nd.array: Offset of the first vertex of each ring and the total
+                    number of vertices.
+        """
+        return self._ring_offsets
+
+    def save(self, filename, compressed=False):
+        """Write the grid to a NumPy .npz container.
+
+        Args:
+            filename (str): Path to the output file.
+            compressed (bool): Compress the arrays. Default is False.
+        """
+        header = {'metadata': self.metadata,
+                  'properties': list(self.properties)}
+        arrays = {'header': np.array(json.dumps(header)),
+                  'coordinates': self.coordinates,
+                  'ring_offsets': self.ring_offsets}
+        for idx, key in enumerate(self.properties):
+            arrays['property_%i' % idx] = self.properties[key]
+        with open(filename, 'wb') as f:
+            if compressed:
+                np.savez_compressed(f, **arrays)
+            else:
+                np.savez(f, **arrays)
+
+    def toGeoJSON(self):
+        """Create the GeoJSON feature collection of the polygons.
+
+        Returns:
+            dictionary: GeoJSON formatted dictionary.
+        """
+        coordinates = self.coordinates.tolist()
+        offsets = self.ring_offsets.tolist()
+        properties = [(key, value.tolist())
+                      for key, value in self.properties.items()]
+        features = []
+        for i in range(self.num_polygons):
+            features += [{
+                "type": "Feature",
+                "properties": dict((key, value[i])
+                                   for key, value in properties),
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [coordinates[offsets[i]:offsets[i + 1]]]
+                }
+            }]
+        return {"type": "FeatureCollection",
+                "metadata": self.metadata,
+                "features": features}
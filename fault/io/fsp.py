@@ -1,7 +1,16 @@
 #!/usr/bin/env
 
 # Standard library imports
+from collections.abc import MutableMapping
+import functools
+import hashlib
+from itertools import islice
+import json
+import mmap
+import os
 import re
+import struct
+import tempfile
 from datetime import datetime
 
 # Third party imports
@@ -11,41 +20,519 @@ DYNAMIC_HEADERS = ['LAT', 'LON', 'X==EW', 'Y==NS', 'Z', 'SLIP', 'RAKE',
                    'TRUP', 'RISE', 'SF_MOMENT']
 STATIC_HEADERS = ['LAT', 'LON', 'X==EW', 'Y==NS', 'Z', 'SLIP', 'RAKE']
 
+CACHE_EXTENSION = '.fspc'
+CACHE_INDEX = 'index.json'
+CACHE_MAGIC = b'FSPCACHE1\n'
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
 
-def read_from_file(fspfile):
+_CACHE = None
+_PENDING = object()
+
+
+class FSPCache(object):
+    """Size bounded on-disk cache of parsed FSP models.
+
+    Every entry holds the event dictionary and segment information of one
+    FSP file as a JSON header followed by the raw float64 segment arrays.
+    Entries are named after the SHA-1 hash of the FSP file and an index
+    maps each file path, size and modification time to its hash, so an
+    unchanged file is found without being read. Loading an entry memory
+    maps the arrays instead of parsing text. When the cache grows beyond
+    its maximum size, the least recently used entries are removed along
+    with the paths of the index that point to them. New paths are added to
+    the index in memory and written with the next stored entry.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            directory (str): Cache directory. Created if it does not exist.
+            max_size (int): Maximum total size of the cache entries in
+                    bytes. Default is 256 MB.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._index = None
+        self._max_size = max_size
+        self._pending = {}
+
+    def clear(self):
+        """Remove all entries and the index."""
+        for name in os.listdir(self.directory):
+            if name.endswith(CACHE_EXTENSION) or name == CACHE_INDEX:
+                _remove(os.path.join(self.directory, name))
+        self._index = {}
+        self._pending = {}
+
+    @property
+    def directory(self):
+        """
+        Helper to return the cache directory.
+
+        Returns:
+            str: Cache directory.
+        """
+        return self._directory
+
+    def load(self, fspfile):
+        """Load a parsed FSP file from the cache.
+
+        Args:
+            fspfile (str): Path to the FSP file.
+
+        Returns:
+            tuple: (Event dictionary, list of segment dictionaries) or None
+                if the file is not cached.
+        """
+        path = self._getEntryPath(self._getHash(fspfile))
+        if not os.path.exists(path):
+            return None
+        try:
+            event, segments = _read_cache_entry(path)
+        except (OSError, ValueError):
+            _remove(path)
+            return None
+        # Mark the entry as recently used
+        os.utime(path)
+        if self._pending:
+            self._writeIndex()
+        return event, segments
+
+    @property
+    def max_size(self):
+        """
+        Helper to return the maximum size of the cache.
+
+        Returns:
+            int: Maximum total size of the cache entries in bytes.
+        """
+        return self._max_size
+
+    def store(self, fspfile, event, segments):
+        """Store a parsed FSP file in the cache.
+
+        Args:
+            fspfile (str): Path to the FSP file.
+            event (dict): Event dictionary.
+            segments (list): List of segment dictionaries.
+        """
+        path = self._getEntryPath(self._getHash(fspfile))
+        _write_cache_entry(path, event, segments)
+        self._evict()
+
+    def _evict(self):
+        """Helper to remove least recently used entries over the size limit.
+
+        The index is written without the paths of the removed entries.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(CACHE_EXTENSION):
+                stat = entry.stat()
+                entries += [(stat.st_mtime, stat.st_size, entry.path)]
+        total = sum(entry[1] for entry in entries)
+        evicted = set()
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            _remove(path)
+            evicted.add(os.path.basename(path)[:-len(CACHE_EXTENSION)])
+            total -= size
+        self._writeIndex(evicted)
+
+    def _getEntryPath(self, file_hash):
+        """Helper to return the path of an entry.
+
+        Args:
+            file_hash (str): Hash of the FSP file.
+
+        Returns:
+            str: Path to the entry.
+        """
+        return os.path.join(self.directory, file_hash + CACHE_EXTENSION)
+
+    def _getHash(self, fspfile):
+        """Helper to get the hash of a file, using the index when possible.
+
+        Args:
+            fspfile (str): Path to the FSP file.
+
+        Returns:
+            str: SHA-1 hash of the file contents.
+        """
+        key = os.path.realpath(fspfile)
+        stat = os.stat(key)
+        if self._index is None:
+            self._index = self._readIndex()
+        index = self._index
+        if index.get(key, [None])[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return index[key][2]
+        sha1 = hashlib.sha1()
+        with open(key, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(chunk)
+        index[key] = [stat.st_size, stat.st_mtime_ns, sha1.hexdigest()]
+        self._pending[key] = index[key]
+        return sha1.hexdigest()
+
+    def _readIndex(self):
+        """Helper to read the index.
+
+        Returns:
+            dictionary: Size, modification time and hash keyed by path.
+        """
+        index_path = os.path.join(self.directory, CACHE_INDEX)
+        try:
+            with open(index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(index, dict):
+            return {}
+        return index
+
+    def _writeIndex(self, evicted=()):
+        """Helper to write the new paths to the index.
+
+        The index is read again first, so paths added by other processes
+        sharing the cache are kept.
+
+        Args:
+            evicted (set): Hashes of removed entries, whose paths are
+                    removed from the index. Default is an empty tuple.
+        """
+        index = self._readIndex()
+        index.update(self._pending)
+        index = dict((key, value) for key, value in index.items()
+                     if value[2] not in evicted)
+        index_path = os.path.join(self.directory, CACHE_INDEX)
+        _atomic_write(index_path, json.dumps(index).encode())
+        self._index = index
+        self._pending = {}
+
+
+class FaultModel(object):
+    """Finite fault model with segments that are decoded on demand.
+
+    Opening a model reads the event header and locates the subfault rows of
+    every segment without decoding them. The segments are dictionary-like
+    Segment objects, so they can be used wherever the segment dictionaries
+    returned by read_from_file are expected.
+    """
+
+    def __init__(self, event, segments):
+        """
+        Args:
+            event (dict): Event dictionary.
+            segments (list): List of segments (dict or Segment).
+        """
+        self._event = event
+        self._segments = segments
+
+    def __getitem__(self, idx):
+        return self._segments[idx]
+
+    def __iter__(self):
+        return iter(self._segments)
+
+    def __len__(self):
+        return len(self._segments)
+
+    @property
+    def event(self):
+        """
+        Helper to return event dictionary.
+
+        Returns:
+            dictionary: Event information.
+        """
+        return self._event
+
+    @classmethod
+    def fromFile(cls, fspfile, cache=None):
+        """Open a FSP file without decoding its subfault rows.
+
+        The file is memory mapped and stays open while any of its segments
+        still has columns to decode. When a cache is in use, cached models
+        are memory mapped from the cache and uncached files are read and
+        stored in full.
+
+        Args:
+            fspfile (str): Path to the FSP file.
+            cache (FSPCache): Cache of parsed files. Default is None, which
+                    uses the cache set with set_cache (if any).
+
+        Returns:
+            FaultModel: Fault model.
+        """
+        if cache is None:
+            cache = _CACHE
+        if cache is not None:
+            event, segments = read_from_file(fspfile, cache=cache)
+            return cls(event, segments)
+        with open(fspfile, 'rb') as _fspfile:
+            buffer = mmap.mmap(_fspfile.fileno(), 0, access=mmap.ACCESS_READ)
+        event, blocks = _index_blocks(buffer)
+        segments = []
+        for block in blocks:
+            segments.append(Segment(
+                block['strike'], block['dip'], block['length'],
+                block['width'], _get_headers(block['num_columns']),
+                functools.partial(_split_block, buffer, block)))
+        return cls(event, segments)
+
+    @property
+    def segments(self):
+        """
+        Helper to return list of segments.
+
+        Returns:
+            list: List of segments (Segment or dict)
+        """
+        return self._segments
+
+
+class Segment(MutableMapping):
+    """Dictionary-like fault segment with lazily decoded subfault columns.
+
+    The strike, dip, length and width are available immediately. The
+    subfault rows are split into text values the first time any subfault
+    column (lat, lon, depth, slip, ...) is accessed, and each column is
+    converted to numbers only when it is accessed itself.
+    """
+
+    def __init__(self, strike, dip, length, width, headers, loader):
+        """
+        Args:
+            strike (float): Segment strike.
+            dip (float): Segment dip.
+            length (float): Segment length.
+            width (float): Segment width.
+            headers (list): Column headers of the subfault rows.
+            loader (callable): Function returning the text values of the
+                    subfault rows as an array of shape (nz, nx, columns).
+        """
+        self._items = {'strike': strike,
+                       'dip': dip,
+                       'length': length,
+                       'width': width}
+        self._columns = [_column_key(header) for header in headers]
+        for key in self._columns:
+            self._items[key] = _PENDING
+        self._loader = loader
+        self._tokens = None
+
+    def __delitem__(self, key):
+        del self._items[key]
+
+    def __getitem__(self, key):
+        value = self._items[key]
+        if value is _PENDING:
+            value = self._load(key)
+        return value
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return 'Segment(%r)' % dict(
+            (key, value) for key, value in self._items.items()
+            if value is not _PENDING)
+
+    def __setitem__(self, key, value):
+        self._items[key] = value
+
+    @property
+    def loaded(self):
+        """
+        Helper to return whether the subfault columns have been decoded.
+
+        Returns:
+            bool: True if no column is left to decode.
+        """
+        return not any(value is _PENDING for value in self._items.values())
+
+    def _load(self, key):
+        """Helper to decode a subfault column.
+
+        Args:
+            key (str): Key of the column.
+
+        Returns:
+            numpy.ndarray: Array of shape (nz, nx).
+        """
+        if self._tokens is None:
+            self._tokens = self._loader()
+            self._loader = None
+        value = self._tokens[..., self._columns.index(key)].astype(float)
+        self._items[key] = value
+        if self.loaded:
+            self._tokens = None
+        return value
+
+
+def get_cache():
+    """Return the cache used by read_from_file by default.
+
+    Returns:
+        FSPCache: Default cache or None if caching is disabled.
+    """
+    return _CACHE
+
+
+def set_cache(cache):
+    """Set the cache used by read_from_file by default.
+
+    Args:
+        cache (FSPCache): Cache to use or None to disable caching.
+    """
+    global _CACHE
+    _CACHE = cache
+
+
+def read_from_file(fspfile, memory_map=False, cache=None):
     """
     Read all relevant data from Finite Fault FSP file.
 
+    The file is read in a single pass. Header lines are parsed as they are
+    encountered and each block of subfault rows is decoded as soon as the
+    preceding header has defined its size.
+
     Args:
-        fspfile (str or file-like object): Input FSP file.
+        fspfile (str or file-like object): Input FSP file path, open file
+                object or in-memory buffer (io.StringIO or io.BytesIO).
+        memory_map (bool): Memory map the file and decode each block of
+                subfault rows from its byte range in one vectorized call.
+                Only used when fspfile is a path. Default is False.
+        cache (FSPCache): Cache of parsed files. Only used when fspfile is
+                a path. Default is None, which uses the cache set with
+                set_cache (if any).
+
+    Returns:
+        tuple: (Event dictionary, list of segment dictionaries)
     """
-    if isinstance(fspfile, str):
-        _fspfile = open(fspfile, 'r')
+    if not isinstance(fspfile, (str, os.PathLike)):
+        return _read_lines(_decode_lines(fspfile))
+    if cache is None:
+        cache = _CACHE
+    if cache is not None:
+        cached = cache.load(fspfile)
+        if cached is not None:
+            return cached
+    if memory_map:
+        event, segments = _read_mapped(fspfile)
     else:
-        _fspfile = fspfile
+        with open(fspfile, 'r') as _fspfile:
+            event, segments = _read_lines(_fspfile)
+    if cache is not None:
+        cache.store(fspfile, event, segments)
+    return event, segments
 
-    # create an event dictionary with:
-    # location
-    # date (no time)
-    # lat
-    # lon
-    # depth
-    # magnitude
-    # moment
-    event = {}
-    is_multi = False
-    lc = 0
 
-    # Read event information
-    for line in _fspfile.readlines():
-        lc += 1
-        if not line.startswith('%'):
-            break
+def _atomic_write(path, data):
+    """Helper to replace a file with new contents in one step.
+
+    Args:
+        path (str): Path to the file.
+        data (bytes): New contents.
+    """
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except:
+        _remove(temp_path)
+        raise
+
+
+def _column_key(header):
+    """Helper to return the segment key of a column header.
+
+    Args:
+        header (str): Column header.
+
+    Returns:
+        str: Segment key.
+    """
+    if header.lower() == 'z':
+        return 'depth'
+    return header.lower()
+
+
+def _decode_lines(fspfile):
+    """Helper to yield text lines from a text or binary file object.
+
+    Args:
+        fspfile (file-like object): Open file object or in-memory buffer.
+
+    Yields:
+        str: Line of the file.
+    """
+    for line in fspfile:
+        if isinstance(line, bytes):
+            line = line.decode()
+        yield line
+
+
+def _get_headers(num_columns):
+    """Helper to pick the column headers of a subfault table.
+
+    Args:
+        num_columns (int): Number of columns in the table.
+
+    Returns:
+        list: Column headers.
+    """
+    if num_columns == 7:
+        return STATIC_HEADERS
+    elif num_columns == 10:
+        return DYNAMIC_HEADERS
+    raise ValueError(
+        'Data structure does not fit dynamic or static format.')
+
+
+def _get_shape(length, width, dx, dz):
+    """Helper to get the (nz, nx) dimensions of a segment grid.
+
+    Args:
+        length (float): Segment length.
+        width (float): Segment width.
+        dx (float): Subfault length.
+        dz (float): Subfault width.
+
+    Returns:
+        tuple: Number of subfaults down dip and along strike.
+    """
+    nx = int(np.round(length/dx, 2))
+    nz = int(np.round(width/dz, 2))
+    return nz, nx
+
+
+def _parse_event_header(header, event):
+    """Helper to read event information from the FSP header.
+
+    Args:
+        header (list): Header lines (str) preceding the first segment.
+        event (dict): Event dictionary to fill.
+
+    Returns:
+        tuple: (Whether the model has multiple segments (bool),
+            strike of the first segment (float), dip of the first segment
+            (float))
+    """
+    is_multi = False
+    strike = None
+    dip = None
+    for line in header:
         if line.startswith('% Event :'):
             # remove stuff in between []
             try:
-                newline = re.sub("([\(\[]).*?([\)\]])", "\g<1>\g<2>", line)
-                newline = re.sub('[^a-zA-Z0-9\s\:]*', '', newline)
+                newline = re.sub(r"([\(\[]).*?([\)\]])", r"\g<1>\g<2>", line)
+                newline = re.sub(r'[^a-zA-Z0-9\s\:]*', '', newline)
                 # get date string
                 datestring = re.search('[0-9]{8}', newline).group()
                 newline = newline.replace(datestring, '')
@@ -60,18 +547,14 @@ def read_from_file(fspfile):
             event['depth'] = float(parts[8])
         if 'Size' in line:
             parts = line.split(':')[1].strip().split()
-            length = float(parts[2])
-            width = float(parts[6])
-            event['length'] = length
-            event['width'] = width
+            event['length'] = float(parts[2])
+            event['width'] = float(parts[6])
             event['mag'] = float(parts[10])
             event['moment'] = float(parts[13])
         if 'Dx' in line:
             parts = line.split(':')[1].strip().split()
-            dx = float(parts[2])
-            dz = float(parts[6])
-            event['dx'] = dx
-            event['dz'] = dz
+            event['dx'] = float(parts[2])
+            event['dz'] = float(parts[6])
         if 'MULTISEGMENT' in line:
             is_multi = True
         if 'Mech' in line:
@@ -103,80 +586,390 @@ def read_from_file(fspfile):
     if is_multi == False:
         strike = event['strike']
         dip = event['dip']
+    return is_multi, strike, dip
+
+
+def _parse_segment_header(header, strike, dip, length, width):
+    """Helper to read segment information from a segment header.
+
+    Values that are not present in the header are carried over from the
+    previous segment.
+
+    Args:
+        header (list): Header lines (str) preceding the segment data.
+        strike (float): Strike of the previous segment.
+        dip (float): Dip of the previous segment.
+        length (float): Length of the previous segment.
+        width (float): Width of the previous segment.
+
+    Returns:
+        tuple: strike, dip, length and width of the segment.
+    """
+    for line in header:
+        if 'SEGMENT' in line:
+            parts = line.split(':')[1].strip().split()
+            strike = float(parts[2])
+            dip = float(parts[6])
+        if 'LEN' in line:
+            parts = line.split()
+            length = float(parts[3])
+            width = float(parts[7])
+    return strike, dip, length, width
+
+
+def _read_cache_entry(path):
+    """Helper to load the event and segments stored in a cache entry.
+
+    Args:
+        path (str): Path to the cache entry.
+
+    Returns:
+        tuple: (Event dictionary, list of segment dictionaries)
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+            raise ValueError('Not a FSP cache entry: %s' % path)
+        header_size, = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_size).decode())
+    event = header['event']
+    if 'date' in event and event['date'] != 'UNK':
+        event['date'] = datetime.strptime(event['date'], '%Y-%m-%dT%H:%M:%S')
+    if header['size'] > 0:
+        values = np.memmap(path, dtype='<f8', mode='c',
+                           offset=header['data_offset'],
+                           shape=(header['size'],)).view(np.ndarray)
+    else:
+        values = np.empty(0)
+    segments = []
+    for info in header['segments']:
+        shape = info.pop('shape')
+        offset = info.pop('offset')
+        data = values[offset:offset + int(np.prod(shape))].reshape(shape)
+        segments.append(_store_segment(data, **info))
+    return event, segments
+
+
+def _remove(path):
+    """Helper to remove a file that may already be gone or in use.
+
+    Args:
+        path (str): Path to the file.
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _decode_block(buffer, block):
+    """Helper to decode a block of subfault rows from its byte range.
+
+    Args:
+        buffer (buffer): Contents of the file.
+        block (dict): Block information returned by _index_blocks.
+
+    Returns:
+        numpy.ndarray: Array of shape (columns, nz, nx).
+
+    Raises:
+        ValueError: A value of the block is not a number or the block does
+                not have nz*nx rows.
+    """
+    values = np.array(buffer[block['start']:block['end']].split(),
+                      dtype=float)
+    return _to_columns(values, block['num_columns'], block['nz'],
+                       block['nx'])
+
+
+def _split_block(buffer, block):
+    """Helper to split a block of subfault rows into text values.
+
+    Args:
+        buffer (buffer): Contents of the file.
+        block (dict): Block information returned by _index_blocks.
+
+    Returns:
+        numpy.ndarray: Array of bytes of shape (nz, nx, columns).
+
+    Raises:
+        ValueError: The block does not have nz*nx rows.
+    """
+    tokens = np.array(buffer[block['start']:block['end']].split())
+    num_columns, nz, nx = block['num_columns'], block['nz'], block['nx']
+    if len(tokens) != num_columns*nz*nx:
+        raise ValueError('Expected %i values in a %i by %i segment, found %i.'
+                         % (num_columns*nz*nx, nz, nx, len(tokens)))
+    return tokens.reshape(nz, nx, num_columns)
+
+
+def _index_blocks(buffer):
+    """Helper to read the headers and locate the subfault rows of a file.
+
+    Args:
+        buffer (buffer): Contents of the file.
+
+    Returns:
+        tuple: (Event dictionary, list of block dictionaries with the
+            segment strike, dip, length and width, the start and end byte
+            offsets of its rows, the number of columns and the nz and nx
+            dimensions)
+    """
+    starts, ends, is_header, is_blank = _index_lines(buffer)
+    data_lines = np.flatnonzero(~is_header & ~is_blank)
+
+    def header_lines(first, last):
+        return [buffer[starts[idx]:ends[idx]].decode()
+                for idx in range(first, last)]
+
+    event = {}
+    line = data_lines[0] if len(data_lines) > 0 else len(starts)
+    is_multi, strike, dip = _parse_event_header(header_lines(0, line), event)
+    length = event['length']
+    width = event['width']
+    dx = event['dx']
+    dz = event['dz']
+
+    blocks = []
+    # position of the first row of the block in data_lines
+    first = 0
+    while line < len(starts):
+        nz, nx = _get_shape(length, width, dx, dz)
+        # blank lines inside the block are skipped, as np.genfromtxt does
+        first_next = min(first + nz*nx, len(data_lines))
+        last = data_lines[first_next - 1] + 1
+        blocks += [{'strike': strike,
+                    'dip': dip,
+                    'length': length,
+                    'width': width,
+                    'start': starts[line],
+                    'end': ends[last - 1],
+                    'num_columns': len(
+                        buffer[starts[line]:ends[line]].split()),
+                    'nz': nz,
+                    'nx': nx}]
+        if not is_multi:
+            break
+        # Get the next segment
+        first = first_next
+        if first < len(data_lines):
+            line = data_lines[first]
+        else:
+            line = len(starts)
+        strike, dip, length, width = _parse_segment_header(
+            header_lines(last, line), strike, dip, length, width)
+    return event, blocks
+
+
+def _index_lines(buffer):
+    """Helper to find the byte offsets of every line in a buffer.
+
+    Args:
+        buffer (buffer): Contents of the file.
+
+    Returns:
+        tuple: (Array of line start offsets, array of line end offsets,
+            boolean array flagging header lines, boolean array flagging
+            blank lines)
+    """
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    ends = np.flatnonzero(raw == ord('\n')) + 1
+    if len(raw) > 0 and raw[-1] != ord('\n'):
+        ends = np.append(ends, len(raw))
+    starts = np.concatenate(([0], ends[:-1]))
+    is_header = raw[starts] == ord('%')
+    # whitespace and control characters are at most a space (32), so a line
+    # without a larger byte is blank
+    is_blank = np.maximum.reduceat(raw, starts) <= ord(' ')
+    return starts, ends, is_header, is_blank
+
 
-    # Get segment dimensions
-    _fspfile.close()
-    nx = int(np.round_(length/dx, 2))
-    nz = int(np.round_(width/dz, 2))
-    # in some versions of numpy, you can't read open text files.
-    data = np.genfromtxt(fspfile, max_rows=nx*nz, skip_header=lc-1).T
-    lc += (nx*nz)-1
-    _fspfile = open(fspfile, 'r')
-    for _ in range(lc):
-        line = next(_fspfile)
-
-    # Store segment
+def _read_block(first_line, lines, nz, nx):
+    """Helper to decode a block of subfault rows.
+
+    Blank lines are skipped, as np.genfromtxt does.
+
+    Args:
+        first_line (str): First row of the block.
+        lines (iterator): Iterator positioned at the second row of the
+                block.
+        nz (int): Number of subfaults down dip.
+        nx (int): Number of subfaults along strike.
+
+    Returns:
+        numpy.ndarray: Array of shape (columns, nz, nx).
+    """
+    rows = [first_line]
+    rows.extend(islice((line for line in lines if line.strip()),
+                       nz*nx - 1))
+    values = np.array(' '.join(rows).split(), dtype=float)
+    return _to_columns(values, len(first_line.split()), nz, nx)
+
+
+def _read_header(lines):
+    """Helper to collect header lines up to the next block of data.
+
+    Blank lines are skipped.
+
+    Args:
+        lines (iterator): Iterator over the lines of the file.
+
+    Returns:
+        tuple: (List of header lines (str), first data line (str) or None
+            when the end of the file is reached)
+    """
+    header = []
+    for line in lines:
+        if not line.strip():
+            continue
+        if not line.startswith('%'):
+            return header, line
+        header.append(line)
+    return header, None
+
+
+def _read_lines(lines):
+    """Helper to read the event and segments from the lines of a FSP file.
+
+    Args:
+        lines (iterable): Lines (str) of the FSP file.
+
+    Returns:
+        tuple: (Event dictionary, list of segment dictionaries)
+    """
+    # create an event dictionary with:
+    # location
+    # date (no time)
+    # lat
+    # lon
+    # depth
+    # magnitude
+    # moment
+    event = {}
+    lines = iter(lines)
+    header, first_line = _read_header(lines)
+    is_multi, strike, dip = _parse_event_header(header, event)
+    length = event['length']
+    width = event['width']
+    dx = event['dx']
+    dz = event['dz']
+
+    segments = []
+    while first_line is not None:
+        nz, nx = _get_shape(length, width, dx, dz)
+        data = _read_block(first_line, lines, nz, nx)
+        segments.append(
+            _store_segment(data, strike, dip, length, width))
+        if not is_multi:
+            break
+        # Get the next segment
+        header, first_line = _read_header(lines)
+        strike, dip, length, width = _parse_segment_header(
+            header, strike, dip, length, width)
+    return event, segments
+
+
+def _read_mapped(fspfile):
+    """Helper to read the event and segments from a memory mapped FSP file.
+
+    Header lines are decoded as text while every block of subfault rows is
+    parsed directly from its byte range.
+
+    Args:
+        fspfile (str): Path to the FSP file.
+
+    Returns:
+        tuple: (Event dictionary, list of segment dictionaries)
+    """
+    with open(fspfile, 'rb') as _fspfile:
+        with mmap.mmap(_fspfile.fileno(), 0,
+                       access=mmap.ACCESS_READ) as buffer:
+            event, blocks = _index_blocks(buffer)
+            segments = []
+            for block in blocks:
+                segments.append(_store_segment(
+                    _decode_block(buffer, block), block['strike'],
+                    block['dip'], block['length'], block['width']))
+    return event, segments
+
+
+def _store_segment(data, strike, dip, length, width):
+    """Helper to create a segment dictionary from a block of data.
+
+    Args:
+        data (numpy.ndarray): Array of shape (columns, nz, nx).
+        strike (float): Segment strike.
+        dip (float): Segment dip.
+        length (float): Segment length.
+        width (float): Segment width.
+
+    Returns:
+        dict: Segment dictionary.
+    """
+    headers = _get_headers(data.shape[0])
     segment = {'strike': strike,
                'dip': dip,
                'length': length,
                'width': width}
+    for idx, header in enumerate(headers):
+        segment[_column_key(header)] = data[idx]
+    return segment
 
-    # Pick the right headers
-    if data.shape[0] == 7:
-        headers = STATIC_HEADERS
-    elif data.shape[0] == 10:
-        headers = DYNAMIC_HEADERS
-    else:
-        raise ValueError(
-            'Data structure does not fit dynamic or static format.')
 
-    for idx, header in enumerate(headers):
-        if header.lower() == 'z':
-            header = 'depth'
-        segment[header.lower()] = data[idx].reshape(nz, nx).copy()
-    segments = [segment]
-
-    # Get multiple segments
-    if is_multi:
-        while True:
-            for line in _fspfile.readlines():
-                lc += 1
-                if not line.startswith('%'):
-                    break
-                if 'SEGMENT' in line:
-                    parts = line.split(':')[1].strip().split()
-                    strike = float(parts[2])
-                    dip = float(parts[6])
-                if 'LEN' in line:
-                    parts = line.split()
-                    length = float(parts[3])
-                    width = float(parts[7])
-            else:
-                break
-            _fspfile.close()
-            nx = int(np.round_(length/dx, 2))
-            nz = int(np.round_(width/dz, 2))
+def _write_cache_entry(path, event, segments):
+    """Helper to write the event and segments to a cache entry.
 
-            # Import data
-            data = np.genfromtxt(fspfile, max_rows=nx*nz, skip_header=lc-1).T
-            lc += (nx*nz)-1
+    Args:
+        path (str): Path to the cache entry.
+        event (dict): Event dictionary.
+        segments (list): List of segment dictionaries.
+    """
+    event = dict(event)
+    if isinstance(event.get('date'), datetime):
+        event['date'] = event['date'].strftime('%Y-%m-%dT%H:%M:%S')
+    infos = []
+    arrays = []
+    offset = 0
+    for segment in segments:
+        headers = _get_headers(len(segment) - 4)
+        data = np.stack([segment[_column_key(header)]
+                         for header in headers])
+        infos += [{'strike': segment['strike'],
+                   'dip': segment['dip'],
+                   'length': segment['length'],
+                   'width': segment['width'],
+                   'shape': list(data.shape),
+                   'offset': offset}]
+        arrays += [data.astype('<f8').ravel()]
+        offset += data.size
+    header = {'event': event, 'segments': infos, 'size': offset,
+              'data_offset': 0}
+    # Align the arrays so the header size must be known first
+    prefix_size = len(CACHE_MAGIC) + 8
+    header_size = len(json.dumps(header)) + 32
+    header['data_offset'] = -(-(prefix_size + header_size) // 64) * 64
+    encoded = json.dumps(header).encode().ljust(
+        header['data_offset'] - prefix_size)
+    values = np.concatenate(arrays) if arrays else np.empty(0)
+    _atomic_write(path, CACHE_MAGIC + struct.pack('<Q', len(encoded)) +
+                  encoded + values.tobytes())
 
-            # Reshape data into the proper dimensions
-            _fspfile = open(fspfile, 'r')
-            for _ in range(lc):
-                next(_fspfile)
 
-            # Store segment
-            segment = {'strike': strike,
-                       'dip': dip,
-                       'length': length,
-                       'width': width}
-            for idx, header in enumerate(headers):
-                if header.lower() == 'z':
-                    header = 'depth'
-                segment[header.lower()] = data[idx].reshape(nz, nx).copy()
-            segments.append(segment)
-
-    # close fspfile object when done
-    _fspfile.close()
-    return event, segments
+def _to_columns(values, num_columns, nz, nx):
+    """Helper to arrange the values of a subfault table into columns.
+
+    Args:
+        values (numpy.ndarray): Flat array of the table values, row by row.
+        num_columns (int): Number of columns in the table.
+        nz (int): Number of subfaults down dip.
+        nx (int): Number of subfaults along strike.
+
+    Returns:
+        numpy.ndarray: Array of shape (columns, nz, nx).
+    """
+    if len(values) != num_columns*nz*nx:
+        raise ValueError('Expected %i values in a %i by %i segment, found %i.'
+                         % (num_columns*nz*nx, nz, nx, len(values)))
+    columns = np.empty((num_columns, nz, nx))
+    columns.reshape(num_columns, nz*nx)[:] = values.reshape(
+        nz*nx, num_columns).T
+    return columns
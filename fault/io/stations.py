@@ -0,0 +1,80 @@
+#!/usr/bin/env
+
+# stdlib imports
+from collections import OrderedDict
+
+# third party imports
+import numpy as np
+
+# Number of header lines before the station rows of a Readlp.das file
+READLP_HEADER_LINES = 5
+
+
+def get_station_coordinates(stations, lon, lat):
+    """Locate stations from their distance and azimuth to the epicenter.
+
+    The stations are located along great circles of a spherical Earth.
+
+    Args:
+        stations (OrderedDict): Station table returned by read_readlp.
+        lon (float): Longitude of the epicenter.
+        lat (float): Latitude of the epicenter.
+
+    Returns:
+        OrderedDict: (Longitude, latitude) of each station, rounded to four
+                decimal places.
+    """
+    names = list(stations)
+    if len(names) == 0:
+        return OrderedDict()
+    distance = np.radians([stations[name]['distance'] for name in names])
+    azimuth = np.radians([stations[name]['azimuth'] for name in names])
+    lat1 = np.radians(lat)
+    lon1 = np.radians(lon)
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(distance) +
+                     np.cos(lat1) * np.sin(distance) * np.cos(azimuth))
+    lon2 = lon1 + np.arctan2(
+        np.sin(azimuth) * np.sin(distance) * np.cos(lat1),
+        np.cos(distance) - np.sin(lat1) * np.sin(lat2))
+    # wrap the longitudes to [-180, 180)
+    lon2 = (np.degrees(lon2) + 180) % 360 - 180
+    lat2 = np.degrees(lat2)
+    coordinates = OrderedDict()
+    for name, station_lon, station_lat in zip(names, lon2, lat2):
+        coordinates[name] = (round(float(station_lon), 4),
+                             round(float(station_lat), 4))
+    return coordinates
+
+
+def read_readlp(filename):
+    """Read the station table of a Readlp.das file.
+
+    Each row of the file describes a waveform with the station code in the
+    fourth column and the epicentral distance and azimuth, in degrees, in
+    the sixth and seventh columns. Stations with several waveforms are only
+    listed once.
+
+    Args:
+        filename (str): Path to the Readlp.das file.
+
+    Returns:
+        OrderedDict: Dictionary with the "distance" and "azimuth" of each
+                station, keyed by station code in the order of the file.
+    """
+    with open(filename, 'rt') as f:
+        lines = f.readlines()
+    stations = OrderedDict()
+    for line in lines[READLP_HEADER_LINES:]:
+        parts = line.split()
+        if len(parts) < 7:
+            continue
+        station = parts[3]
+        if station in stations:
+            continue
+        try:
+            distance = float(parts[5])
+            azimuth = float(parts[6])
+        except ValueError:
+            continue
+        stations[station] = {'distance': distance, 'azimuth': azimuth}
+    return stations
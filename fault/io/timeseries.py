@@ -2,81 +2,315 @@
 
 # stdlib imports
 from collections import OrderedDict
-import glob
+import fnmatch
 import json
 import os
 
 # third party imports
 import numpy as np
 
+# local imports
+from fault.parallel import map_ordered
 
-def read_from_directory(input_directory):
+# Glob patterns of the data and synthetic files of each phase
+FILE_PATTERNS = OrderedDict([
+    ('s_data', '*.S.dat'),
+    ('s_synth', '*.S.syn'),
+    ('p_data', '*.P.dat'),
+    ('p_synth', '*.P.syn'),
+    ('z_data', '*.Z.swave.dat'),
+    ('z_synth', '*.Z.swave.syn'),
+    ('t_data', '*.T.swave.dat'),
+    ('t_synth', '*.T.swave.syn'),
+])
+
+
+# Array fields of each waveform record, in output order
+ARRAY_FIELDS = ['time', 'displacement', 'synthetic-time',
+                'synthetic-displacement']
+# Array fields rounded when they are converted
+ROUNDED_FIELDS = ['displacement', 'synthetic-displacement']
+
+
+class TimeseriesStore(object):
+    """Time series of every station held in one contiguous buffer.
+
+    The time, displacement and synthetic arrays of all waveforms are stored
+    back to back in a single float64 array. An index keyed by station holds
+    the station metadata and, for each waveform, its id, component, type and
+    the (start, stop) offsets of its arrays in the buffer. Lists are only
+    created when the store is converted with toDict.
+    """
+
+    def __init__(self, buffer, stations):
+        """
+        Args:
+            buffer (nd.array): 1D array with the values of every waveform.
+            stations (OrderedDict): Index keyed by station code. Each value
+                    is a dictionary with the 'metadata' dictionary and a
+                    'data' list of (record, offsets) tuples, where offsets
+                    maps the array fields to (start, stop) in the buffer.
+        """
+        self._buffer = buffer
+        self._stations = stations
+
+    @property
+    def buffer(self):
+        """
+        Helper to return the buffer with the values of every waveform.
+
+        Returns:
+            nd.array: Read only 1D array.
+        """
+        return self._buffer
+
+    @classmethod
+    def fromDirectory(cls, input_directory, max_workers=None):
+        """Read the time series files of a directory.
+
+        Args:
+            input_directory (str): Path to finite fault files.
+            max_workers (int): Number of threads used to read the files.
+                    Default is None, which reads them serially.
+
+        Returns:
+            TimeseriesStore: Store with the time series of every station.
+        """
+        if not os.path.exists(input_directory):
+            raise Exception('Input directory does not exist: %s' %
+                            input_directory)
+        paths = scan_directory(input_directory)
+        return cls.fromPaths(paths['s_data'], paths['s_synth'],
+                             paths['p_data'], paths['p_synth'],
+                             paths['z_data'], paths['z_synth'],
+                             paths['t_data'], paths['t_synth'],
+                             max_workers=max_workers)
+
+    @classmethod
+    def fromPaths(cls, s_data_paths, s_synth_paths, p_data_paths,
+                  p_synth_paths, z_data_paths, z_synth_paths, t_data_paths,
+                  t_synth_paths, max_workers=None):
+        """Read time series files of each phase.
+
+        Args:
+            s_data_paths (list): List of paths (str) to s time series data.
+            s_synth_paths (list): List of paths (str) to s synthetic.
+            p_data_paths (list): List of paths (str) to p time series data.
+            p_synth_paths (list): List of paths (str) to p synthetic.
+            z_data_paths (list): List of paths (str) to z time series data.
+            z_synth_paths (list): List of paths (str) to z synthetic.
+            t_data_paths (list): List of paths (str) to t time series data.
+            t_synth_paths (list): List of paths (str) to t synthetic.
+            max_workers (int): Number of threads used to read the files.
+                    Default is None, which reads them serially.
+
+        Returns:
+            TimeseriesStore: Store with the time series of every station.
+        """
+        phases = [('S', s_data_paths, s_synth_paths),
+                  ('P', p_data_paths, p_synth_paths),
+                  ('Z', z_data_paths, z_synth_paths),
+                  ('T', t_data_paths, t_synth_paths)]
+        # Pair every data file with its synthetic
+        pairs = []
+        for wave_type, data_paths, synth_paths in phases:
+            synth_paths = set(synth_paths)
+            for data_path in data_paths:
+                syn_path = data_path.replace('.dat', '.syn')
+                if syn_path not in synth_paths:
+                    syn_path = None
+                pairs += [(wave_type, data_path, syn_path)]
+        # Read every file that is used up front
+        read_paths = []
+        for wave_type, data_path, syn_path in pairs:
+            read_paths += [data_path]
+            if syn_path is not None:
+                read_paths += [syn_path]
+        read_paths = list(OrderedDict.fromkeys(read_paths))
+        results = map_ordered(read_file, [(path,) for path in read_paths],
+                              max_workers)
+        files = dict(zip(read_paths, results))
+
+        arrays = []
+        offset = 0
+        stations = OrderedDict()
+        for wave_type, data_path, syn_path in pairs:
+            station, time, displacement = files[data_path]
+            record = OrderedDict()
+            record['id'] = station + '_' + wave_type
+            record['component'] = wave_type
+            if wave_type == 'T' or wave_type == 'Z':
+                record['waveform-type'] = 'long period surface wave'
+            else:
+                record['waveform-type'] = 'teleseismic broadband body wave'
+            values = [time, displacement]
+            if syn_path is not None:
+                station, syn_time, syn_displacement = files[syn_path]
+                values += [syn_time, syn_displacement]
+            offsets = OrderedDict()
+            for field, value in zip(ARRAY_FIELDS, values):
+                value = np.asarray(value, dtype='d').ravel()
+                offsets[field] = (offset, offset + len(value))
+                offset += len(value)
+                arrays += [value]
+            if station not in stations:
+                stations[station] = {'metadata': _get_metadata(station),
+                                     'data': []}
+            stations[station]['data'] += [(record, offsets)]
+        if arrays:
+            buffer = np.concatenate(arrays)
+        else:
+            buffer = np.zeros(0)
+        buffer.setflags(write=False)
+        return cls(buffer, stations)
+
+    def getArray(self, station, index, field):
+        """Return an array of a waveform.
+
+        Args:
+            station (str): Station code.
+            index (int): Index of the waveform of the station.
+            field (str): One of ARRAY_FIELDS.
+
+        Returns:
+            nd.array: Read only view of the buffer.
+        """
+        record, offsets = self._stations[station]['data'][index]
+        start, stop = offsets[field]
+        return self._buffer[start:stop]
+
+    def getMetadata(self, station):
+        """Return the metadata of a station.
+
+        Args:
+            station (str): Station code.
+
+        Returns:
+            OrderedDict: Station metadata.
+        """
+        return OrderedDict(self._stations[station]['metadata'])
+
+    def getNumWaveforms(self, station):
+        """Return the number of waveforms of a station.
+
+        Args:
+            station (str): Station code.
+
+        Returns:
+            int: Number of waveforms.
+        """
+        return len(self._stations[station]['data'])
+
+    def getWaveform(self, station, index, as_arrays=False):
+        """Return a waveform record.
+
+        Args:
+            station (str): Station code.
+            index (int): Index of the waveform of the station.
+            as_arrays (bool): Return the values as arrays instead of lists.
+                    Default is False.
+
+        Returns:
+            OrderedDict: Waveform id, component, waveform-type and arrays.
+                    Displacements are rounded to 6 decimal places.
+        """
+        record, offsets = self._stations[station]['data'][index]
+        waveform = OrderedDict(record)
+        for field, (start, stop) in offsets.items():
+            values = self._buffer[start:stop]
+            if field in ROUNDED_FIELDS:
+                values = np.around(values, decimals=6)
+            if as_arrays:
+                waveform[field] = values
+            else:
+                waveform[field] = values.tolist()
+        return waveform
+
+    @property
+    def nbytes(self):
+        """
+        Helper to return the size of the buffer.
+
+        Returns:
+            int: Number of bytes.
+        """
+        return self._buffer.nbytes
+
+    @property
+    def stations(self):
+        """
+        Helper to return the station codes.
+
+        Returns:
+            list: Station codes in the order they were read.
+        """
+        return list(self._stations)
+
+    def toDict(self, as_arrays=False):
+        """Convert the store to the time series dictionary.
+
+        Args:
+            as_arrays (bool): Use arrays instead of lists for the values.
+                    Default is False.
+
+        Returns:
+            OrderedDict: Dictionary of time series data, see
+                    create_wave_dict.
+        """
+        wave_dict = OrderedDict()
+        for station in self._stations:
+            wave_dict[station] = OrderedDict()
+            wave_dict[station]['metadata'] = self.getMetadata(station)
+            wave_dict[station]['data'] = [
+                self.getWaveform(station, index, as_arrays)
+                for index in range(self.getNumWaveforms(station))]
+        return wave_dict
+
+
+def read_from_directory(input_directory, max_workers=None):
     """Collects directory of finite fault time series data into JSON.
 
     Args:
         input_directory (str): Path to finite fault files.
-        output_file (str): Path to output JSON file.
+        max_workers (int): Number of threads used to read the files. Default
+                is None, which reads them serially.
+
+    Returns:
+        dictionary: Dictionary of time series data, see create_wave_dict.
     """
-    if not os.path.exists(input_directory):
-        raise Exception('Input directory does not exist: %s' % input_directory)
-
-    s_data_paths = glob.glob(os.path.join(input_directory, '*.S.dat'))
-    s_synth_paths = glob.glob(os.path.join(input_directory, '*.S.syn'))
-    p_data_paths = glob.glob(os.path.join(input_directory, '*.P.dat'))
-    p_synth_paths = glob.glob(os.path.join(input_directory, '*.P.syn'))
-    z_data_paths = glob.glob(os.path.join(input_directory, '*.Z.swave.dat'))
-    z_synth_paths = glob.glob(os.path.join(input_directory, '*.Z.swave.syn'))
-    t_data_paths = glob.glob(os.path.join(input_directory, '*.T.swave.dat'))
-    t_synth_paths = glob.glob(os.path.join(input_directory, '*.T.swave.syn'))
-
-    wave_dict = create_wave_dict(s_data_paths, s_synth_paths, p_data_paths,
-                     p_synth_paths, z_data_paths, z_synth_paths,
-                     t_data_paths, t_synth_paths)
-    return wave_dict
+    store = TimeseriesStore.fromDirectory(input_directory, max_workers)
+    return store.toDict()
 
-def _add_data(data_paths, synth_paths, wave_type, wave_dict):
-    """Helper to read data from finite fault files into a dictionary.
+
+def scan_directory(input_directory):
+    """Find the time series files of every phase with one directory scan.
+
+    The files matching each pattern in FILE_PATTERNS are returned in the
+    same order as glob.glob would return them.
 
     Args:
-        data_paths (list): List of paths (str) to time series data.
-        synth_paths (list): List of paths (str) to synthetic time series.
-        wave_type (str): Phase of time series.
-        wave_dict (list): Dictionary or time series.
+        input_directory (str): Path to finite fault files.
+
+    Returns:
+        dictionary: Lists of paths (str) keyed by the FILE_PATTERNS keys.
     """
-    wave_type = wave_type.upper()
-    # Loop through all data paths of a certain type
-    for idx, data_path in enumerate(data_paths):
-        data_station, time, displacement = read_file(data_path)
-        data_dict = OrderedDict()
-        data_dict['id'] = data_station + '_' + wave_type.upper()
-        data_dict['component'] =  wave_type.upper()
-        if wave_type == 'T' or wave_type == 'Z':
-            data_dict['waveform-type'] = 'long period surface wave'
-        elif wave_type == 'S' or wave_type == 'P':
-            data_dict['waveform-type'] = 'teleseismic broadband body wave'
-        data_dict['time'] = time.tolist()
-        data_dict['displacement'] = np.around(displacement,
-                decimals=6).tolist()
-        syn_path = data_path.replace('.dat', '.syn')
-        if syn_path in synth_paths:
-            data_station, syn_time, syn_displacement = read_file(syn_path)
-            data_dict['synthetic-time'] = syn_displacement.tolist()
-            data_dict['synthetic-displacement'] = np.around(syn_displacement,
-                    decimals=6).tolist()
-        # Check if the station key already exists in the dictionary
-        if data_station not in wave_dict:
-            wave_dict[data_station] =  OrderedDict()
-            metadata = _get_metadata(data_station)
-            wave_dict[data_station]['metadata'] = metadata
-        if 'data' not in wave_dict[data_station]:
-            wave_dict[data_station]['data'] = []
-        wave_dict[data_station]['data'] += [data_dict]
-    return wave_dict
+    try:
+        with os.scandir(input_directory) as entries:
+            names = [entry.name for entry in entries
+                     if not entry.name.startswith('.')]
+    except OSError:
+        # Like glob, a path that cannot be listed has no matches
+        names = []
+    paths = OrderedDict()
+    for key, pattern in FILE_PATTERNS.items():
+        paths[key] = [os.path.join(input_directory, name)
+                      for name in fnmatch.filter(names, pattern)]
+    return paths
 
 
 def create_wave_dict(s_data_paths, s_synth_paths, p_data_paths,
                      p_synth_paths, z_data_paths, z_synth_paths,
-                     t_data_paths, t_synth_paths):
+                     t_data_paths, t_synth_paths, max_workers=None):
     """Stores data from finite fault files into a dictionary.
 
     Args:
@@ -88,6 +322,8 @@ def create_wave_dict(s_data_paths, s_synth_paths, p_data_paths,
         z_synth_paths (list): List of paths (str) to z synthetic.
         t_data_paths (list): List of paths (str) to t time series data.
         t_synth_paths (list): List of paths (str) to t synthetic.
+        max_workers (int): Number of threads used to read the files. Default
+                is None, which reads them serially.
 
     Returns:
         dictionary: Dictionary of time series data.
@@ -118,16 +354,12 @@ def create_wave_dict(s_data_paths, s_synth_paths, p_data_paths,
             ...
         }
     """
-    wave_dict = OrderedDict()
-    # Add S-Data
-    wave_dict = _add_data(s_data_paths, s_synth_paths, 'S', wave_dict)
-    # Add P-Data
-    wave_dict = _add_data(p_data_paths, p_synth_paths, 'P', wave_dict)
-    # Add Z-Data
-    wave_dict = _add_data(z_data_paths, z_synth_paths, 'Z', wave_dict)
-    # Add T-Data
-    wave_dict = _add_data(t_data_paths, t_synth_paths, 'T', wave_dict)
-    return wave_dict
+    store = TimeseriesStore.fromPaths(s_data_paths, s_synth_paths,
+                                      p_data_paths, p_synth_paths,
+                                      z_data_paths, z_synth_paths,
+                                      t_data_paths, t_synth_paths,
+                                      max_workers=max_workers)
+    return store.toDict()
 
 def _get_metadata(station):
     """Helper to get the metadata for a specific station.
@@ -155,6 +387,37 @@ def read_file(path):
     filename = os.path.basename(path)
     station_idx =  filename.find('.')
     station_name = filename[0 : station_idx]
-    time, displacement = np.genfromtxt(path, usecols=(0,1),
-            dtype=float, unpack=True)
+    time, displacement = _read_columns(path)
     return station_name, time, displacement
+
+
+def _read_columns(path):
+    """Helper to read the first two columns of a whitespace delimited file.
+
+    Files with a fixed number of columns are converted straight from the
+    split lines. Anything else (comments, missing or unparsable values,
+    ragged rows) is left to np.genfromtxt.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        tuple: Arrays of the first and second column.
+    """
+    with open(path, 'r') as f:
+        text = f.read()
+    lines = [line.split() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    num_columns = set(map(len, lines))
+    if len(lines) > 1 and len(num_columns) == 1 and '#' not in text:
+        num_columns = num_columns.pop()
+        try:
+            values = np.array([token for line in lines for token in line],
+                              dtype=float)
+        except ValueError:
+            # Unparsable values are left to np.genfromtxt
+            values = None
+        if num_columns >= 2 and values is not None:
+            values = values.reshape(len(lines), num_columns)
+            return values[:, 0].copy(), values[:, 1].copy()
+    return np.genfromtxt(path, usecols=(0,1), dtype=float, unpack=True)
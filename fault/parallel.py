@@ -0,0 +1,34 @@
+#!/usr/bin/env
+
+# stdlib imports
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def map_ordered(function, arguments, max_workers=None, processes=False):
+    """Call a function for each set of arguments, optionally in parallel.
+
+    The results are always returned in the order of the arguments, so the
+    output does not depend on the number of workers.
+
+    Args:
+        function (function): Function to call. It must be defined at module
+                level when processes is True.
+        arguments (list): List of argument tuples, one per call.
+        max_workers (int): Number of workers. Default is None, which calls
+                the function serially in this thread, as does 1.
+        processes (bool): Use a process pool instead of a thread pool.
+                Default is False.
+
+    Returns:
+        list: Result of each call.
+    """
+    arguments = list(arguments)
+    if max_workers is None or max_workers <= 1 or len(arguments) <= 1:
+        return [function(*args) for args in arguments]
+    if processes:
+        executor_class = ProcessPoolExecutor
+    else:
+        executor_class = ThreadPoolExecutor
+    max_workers = min(max_workers, len(arguments))
+    with executor_class(max_workers=max_workers) as executor:
+        return list(executor.map(function, *zip(*arguments)))
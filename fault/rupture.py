@@ -0,0 +1,378 @@
+#!/usr/bin/env
+
+# stdlib imports
+import math
+
+# third party imports
+import numpy as np
+
+# local imports
+from fault.parallel import map_ordered
+
+# Profiles at least this long are autocorrelated with an FFT
+FFT_THRESHOLD = 128
+
+
+def autocorrelate(profile):
+    """Autocorrelate a 1D array.
+
+    Args:
+        profile (nd.array): 1D array of data.
+
+    Returns:
+        nd.array: Lags from len(profile) // 2 - len(profile) + 1 to
+                len(profile) - 1 of the full autocorrelation, the same as
+                np.correlate(profile, profile, mode='full')[len(profile)//2:].
+    """
+    return autocorrelate_profiles([profile])[0]
+
+
+def autocorrelate_profiles(profiles):
+    """Autocorrelate several 1D arrays.
+
+    Profiles shorter than FFT_THRESHOLD are correlated directly with
+    np.correlate. Longer profiles are zero padded into one stacked array and
+    correlated together with a single FFT, which differs from the direct
+    method only by rounding.
+
+    Args:
+        profiles (list): List of 1D arrays of data.
+
+    Returns:
+        list: Autocorrelated profiles, see autocorrelate.
+    """
+    results = [None] * len(profiles)
+    long_profiles = []
+    for idx, profile in enumerate(profiles):
+        profile = np.asarray(profile, dtype='d')
+        if len(profile) < FFT_THRESHOLD:
+            results[idx] = np.correlate(profile, profile,
+                                        mode='full')[len(profile) // 2:]
+        else:
+            long_profiles += [(idx, profile)]
+    if long_profiles:
+        max_length = max(len(profile) for idx, profile in long_profiles)
+        # Pad to avoid circular overlap of the lags
+        size = 1 << (2 * max_length - 2).bit_length()
+        stacked = np.zeros((len(long_profiles), max_length))
+        for row, (idx, profile) in enumerate(long_profiles):
+            stacked[row, :len(profile)] = profile
+        spectrum = np.fft.rfft(stacked, n=size, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        lags = np.fft.irfft(power, n=size, axis=1)
+        for row, (idx, profile) in enumerate(long_profiles):
+            num = len(profile)
+            results[idx] = lags[row, np.abs(np.arange(num // 2 - num + 1,
+                                                      num))]
+    return results
+
+
+def find_rupture_window(slip, length, width, dx, dz, fault_length,
+                        fault_width):
+    """Find the window of a slip grid that holds the most slip.
+
+    The window is slid along strike and down dip in steps of one subfault.
+    The window positions, the index mapping (floor of position over spacing)
+    and the tie breaking (first position in along strike, then down dip
+    order) are the same as the original loop in Fault.getRuptureGrid. The
+    slip in every window is taken from a summed-area table in one pass.
+
+    Args:
+        slip (nd.array): 2D array of (thresholded) slip, down dip by along
+                strike.
+        length (float): Length of the window along strike.
+        width (float): Width of the window down dip.
+        dx (float): Subfault length along strike.
+        dz (float): Subfault width down dip.
+        fault_length (float): Length of the fault.
+        fault_width (float): Width of the fault.
+
+    Returns:
+        tuple: left, right, top and bottom indices of the window. All are
+                -1 when no window fits in the fault.
+    """
+    return find_rupture_windows(slip, [(length, width)], dx, dz,
+                                fault_length, fault_width)[0]
+
+
+def find_rupture_windows(slip, sizes, dx, dz, fault_length, fault_width):
+    """Find the windows of a slip grid that hold the most slip.
+
+    Batch version of find_rupture_window, which shares the summed-area
+    table between all of the window sizes.
+
+    Args:
+        slip (nd.array): 2D array of (thresholded) slip, down dip by along
+                strike.
+        sizes (list): List of (length, width) window sizes.
+        dx (float): Subfault length along strike.
+        dz (float): Subfault width down dip.
+        fault_length (float): Length of the fault.
+        fault_width (float): Width of the fault.
+
+    Returns:
+        list: List of (left, right, top, bottom) tuples, one per size.
+    """
+    slip = np.asarray(slip, dtype='d')
+    table = summed_area_table(slip)
+    tolerance = _get_tolerance(slip)
+    windows = []
+    for length, width in sizes:
+        lefts, rights = get_window_indices(length, dx, fault_length)
+        tops, bottoms = get_window_indices(width, dz, fault_width)
+        windows += [_find_window(slip, table, tolerance, lefts, rights,
+                                 tops, bottoms)]
+    return windows
+
+
+def find_trapz_window(profile, window, dd, length):
+    """Find the window of a 1D profile with the largest trapezoid integral.
+
+    The window positions, the index mapping and the tie breaking are the
+    same as the original loop in Fault.getRuptureCorners, which integrated
+    every window with np.trapz. The integrals of all positions are taken
+    from a cumulative sum in one pass.
+
+    Args:
+        profile (nd.array): 1D array of values, e.g. summed slip.
+        window (float): Size of the window.
+        dd (float): Spacing between values.
+        length (float): Size of the whole profile.
+
+    Returns:
+        tuple: First and last (exclusive) index of the window. Both are -1
+                when no window fits in the profile.
+    """
+    profile = np.asarray(profile, dtype='d')
+    firsts, lasts = get_window_indices(window, dd, length)
+    if len(firsts) == 0:
+        return (-1, -1)
+    areas = trapz_windows(profile, firsts, lasts, dd)
+    segments = np.abs(profile[1:]) + np.abs(profile[:-1])
+    tolerance = _get_tolerance(segments * dd)
+    candidates = np.flatnonzero(areas >= areas.max() - tolerance)
+    max_area = -1
+    window = (-1, -1)
+    for candidate in candidates.tolist():
+        first_idx = int(firsts[candidate])
+        last_idx = int(lasts[candidate])
+        area = np.trapz(profile[first_idx:last_idx], dx=dd)
+        if area > max_area:
+            window = (first_idx, last_idx)
+            max_area = area
+    return window
+
+
+def get_window_indices(window, step, limit):
+    """Return the first and last index of every window position.
+
+    The positions are accumulated by repeated addition of the step, and the
+    window is advanced while its end is less than the limit.
+
+    Args:
+        window (float): Size of the window.
+        step (float): Spacing between values.
+        limit (float): Size of the whole profile.
+
+    Returns:
+        tuple: Arrays of the first and last (exclusive) index of each
+                position.
+    """
+    firsts = []
+    lasts = []
+    first_location = 0
+    last_location = first_location + window
+    while last_location < limit:
+        firsts += [math.floor(first_location / step)]
+        lasts += [math.floor(last_location / step)]
+        first_location += step
+        last_location += step
+    return (np.array(firsts, dtype=np.intp), np.array(lasts, dtype=np.intp))
+
+
+def get_rupture_size(rows, columns, dx, dz):
+    """Return rupture length and width.
+
+    Args:
+        rows (nd.array): Array of slips, summed along the rows and
+                autocorrelated.
+        columns (nd.array): Array of slips, summed along the columns and
+                autocorrelated.
+        dx (float): Subfault length along strike.
+        dz (float): Subfault width down dip.
+
+    Returns:
+        tuple: rupture length and width
+    """
+    # Integrate to get the area under the curve
+    row_area = np.trapz(rows, dx=dx)
+    column_area = np.trapz(columns, dx=dz)
+
+    # Normalize by the t=0 (or maximum) value
+    rupture_length = row_area / rows.max()
+    rupture_width = column_area / columns.max()
+    return (rupture_length, rupture_width)
+
+
+def get_rupture_sizes(slips, dx, dz, max_workers=None):
+    """Return rupture length and width of several slip grids.
+
+    Each slip grid is thresholded and summed along both axes. The summed
+    profiles of all grids are then autocorrelated together and integrated.
+
+    Args:
+        slips (list): List of 2D arrays of slip.
+        dx (float): Subfault length along strike.
+        dz (float): Subfault width down dip.
+        max_workers (int): Number of threads used for the slip grids.
+                Default is None, which processes them serially.
+
+    Returns:
+        list: List of (length, width) tuples, one per slip grid.
+    """
+    summed = map_ordered(_sum_thresholded, [(slip,) for slip in slips],
+                         max_workers)
+    profiles = [profile for pair in summed for profile in pair]
+    correlated = autocorrelate_profiles(profiles)
+    arguments = [(rows, columns, dx, dz) for rows, columns in
+                 zip(correlated[0::2], correlated[1::2])]
+    return map_ordered(get_rupture_size, arguments, max_workers)
+
+
+def summed_area_table(values):
+    """Return the summed-area table (integral image) of a 2D array.
+
+    Args:
+        values (nd.array): 2D array.
+
+    Returns:
+        nd.array: Array with one more row and column than values, where
+                table[i, j] is the sum of values[:i, :j].
+    """
+    nrows, ncols = values.shape
+    table = np.zeros((nrows + 1, ncols + 1))
+    np.cumsum(values, axis=0, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return table
+
+
+def threshold_slip(slip):
+    """Return slips filtered within the threshold.
+
+    Args:
+        slip (nd.array): Array of slips to filter.
+
+    Returns:
+        nd.array: New array of thresholded slips.
+    """
+    max_slip = slip.max()
+    slip_thresh = max_slip * 0.1
+    if slip_thresh < 1:
+        slip_thresh = 1.0
+    if max_slip < 1:
+        slip_thresh = 0.2
+    if max_slip < 3:
+        slip_thresh = 0.5
+    return np.where(slip < slip_thresh, 0, slip)
+
+
+def trapz_windows(profile, firsts, lasts, dx):
+    """Integrate windows of a 1D profile with the trapezoidal rule.
+
+    Equivalent to np.trapz(profile[first:last], dx=dx) for every window,
+    up to rounding, computed from a cumulative sum of the trapezoids.
+
+    Args:
+        profile (nd.array): 1D array of values.
+        firsts (nd.array): First index of each window.
+        lasts (nd.array): Last (exclusive) index of each window.
+        dx (float): Spacing between values.
+
+    Returns:
+        nd.array: Integral of each window.
+    """
+    profile = np.asarray(profile, dtype='d')
+    trapezoids = dx * (profile[1:] + profile[:-1]) / 2.0
+    cumulative = np.zeros(len(profile))
+    np.cumsum(trapezoids, out=cumulative[1:])
+    # Clip the indices the same way slicing does
+    first = np.clip(firsts, 0, len(profile))
+    last = np.maximum(np.clip(lasts, 0, len(profile)), first)
+    # Windows with less than two values have no trapezoids
+    end = np.maximum(last - 1, first)
+    areas = np.zeros(len(first))
+    filled = last - first >= 2
+    areas[filled] = cumulative[end[filled]] - cumulative[first[filled]]
+    return areas
+
+
+def _find_window(slip, table, tolerance, lefts, rights, tops, bottoms):
+    """Helper to find the window with the most slip.
+
+    The sums from the summed-area table differ from np.sum by rounding, so
+    every window whose table sum is near the maximum is summed again from
+    the slip in scan order, which keeps the result identical to the loop.
+
+    Args:
+        slip (nd.array): 2D array of slip.
+        table (nd.array): Summed-area table of slip.
+        tolerance (float): Largest rounding difference between the sums.
+        lefts (nd.array): First column of each along strike position.
+        rights (nd.array): Last column (exclusive) of each position.
+        tops (nd.array): First row of each down dip position.
+        bottoms (nd.array): Last row (exclusive) of each position.
+
+    Returns:
+        tuple: left, right, top and bottom indices of the window.
+    """
+    if len(lefts) == 0 or len(tops) == 0:
+        return (-1, -1, -1, -1)
+    nrows, ncols = slip.shape
+    # Clip the indices the same way slicing does
+    left = np.clip(lefts, 0, ncols)
+    right = np.maximum(np.clip(rights, 0, ncols), left)
+    top = np.clip(tops, 0, nrows)
+    bottom = np.maximum(np.clip(bottoms, 0, nrows), top)
+    # Window sums ordered along strike first, then down dip
+    areas = (table[np.ix_(bottom, right)] - table[np.ix_(top, right)] -
+             table[np.ix_(bottom, left)] + table[np.ix_(top, left)]).T
+    candidates = np.flatnonzero(areas.ravel() >= areas.max() - tolerance)
+    max_area = -1
+    window = (-1, -1, -1, -1)
+    for candidate in candidates.tolist():
+        i, j = divmod(candidate, len(tops))
+        left_idx = int(lefts[i])
+        right_idx = int(rights[i])
+        top_idx = int(tops[j])
+        bottom_idx = int(bottoms[j])
+        area = np.sum(slip[top_idx:bottom_idx, left_idx:right_idx])
+        if area > max_area:
+            window = (left_idx, right_idx, top_idx, bottom_idx)
+            max_area = area
+    return window
+
+
+def _sum_thresholded(slip):
+    """Helper to threshold slip and sum it along both axes.
+
+    Args:
+        slip (nd.array): 2D array of slip.
+
+    Returns:
+        tuple: Slip summed along the rows and along the columns.
+    """
+    thresholded_slip = threshold_slip(slip)
+    return (thresholded_slip.sum(axis=0), thresholded_slip.sum(axis=1))
+
+
+def _get_tolerance(values):
+    """Helper to bound the rounding difference of two sums of values.
+
+    Args:
+        values (nd.array): Array that is summed.
+
+    Returns:
+        float: Tolerance.
+    """
+    total = np.sum(np.abs(values))
+    return 16 * (sum(values.shape) + 8) * np.finfo(float).eps * total
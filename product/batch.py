@@ -0,0 +1,363 @@
+#!/usr/bin/env
+
+# stdlib imports
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import datetime
+import os
+import time
+import traceback
+
+# third party imports
+import yaml
+
+# local imports
+from fault.io.fsp import FSPCache, get_cache, set_cache
+from product.constants import (DEFAULT_MODEL, TIMEFMT, get_settings,
+                               set_settings)
+from product.location import LocationResolver, set_resolver
+from product.pdl import store_fault
+from product.sender_service import SenderClient, set_client
+from product.staging import stage_product
+from product.web_product import WebProduct
+
+# Keys that every product of a batch manifest must have
+REQUIRED_KEYS = ['eventsource', 'source', 'eventid', 'directory', 'solution']
+# Optional keys of a batch manifest product and their default values
+OPTIONAL_KEYS = {
+    'columnar_grid': False,
+    'comment': None,
+    'crustal_model': DEFAULT_MODEL,
+    'incremental': False,
+    'reviewed': True,
+    'suppress_model': False,
+    'timeseries_encoding': None,
+    'version': 1,
+}
+
+_CONFIGURED = None
+
+
+def build_job(job, base_folder=None, settings=None):
+    """Build a product and stage its files for PDL.
+
+    Args:
+        job (dict): Product returned by read_manifest.
+        base_folder (str): Folder where the products are staged for PDL.
+                Default is None, which uses the output folder of the
+                settings.
+        settings (product.constants.Settings): Settings of the process
+                building the product. Default is None, which reads the
+                config file.
+
+    Returns:
+        dictionary: Result of the product, with the product properties,
+                the staging counts and the build time, or the error if it
+                could not be built.
+    """
+    _configure(settings)
+    result = _get_result(job)
+    start = time.time()
+    try:
+        product = WebProduct.fromDirectory(
+            job['directory'], job['eventsource'], job['eventid'],
+            job['solution'], crustal_model=job['crustal_model'],
+            comment=job['comment'], version=job['version'],
+            suppress_model=job['suppress_model'],
+            incremental=job['incremental'],
+            columnar_grid=job['columnar_grid'],
+            timeseries_encoding=job['timeseries_encoding'])
+        pdlfolder = get_pdl_folder(job['eventid'], job['solution'],
+                                   job['suppress_model'], base_folder)
+        result['staging'] = stage_product(product.paths, pdlfolder)
+        result['pdlfolder'] = pdlfolder
+        result['properties'] = product.properties
+    except Exception:
+        result['error'] = traceback.format_exc()
+    result['build_seconds'] = time.time() - start
+    return result
+
+
+def get_pdl_folder(eventid, model_number, suppress, base_folder=None):
+    """Get the folder where the files of a product are staged for PDL.
+
+    Args:
+        eventid (str): Event code.
+        model_number (int): Number of the solution.
+        suppress (bool): Suppress the model number in the folder name.
+        base_folder (str): Folder of all staged products. Default is None,
+                which uses the output folder of the settings.
+
+    Returns:
+        str: Path to the PDL folder.
+    """
+    if base_folder is None:
+        base_folder = get_settings().outputfolder
+    folder = eventid
+    if not suppress:
+        folder += f"_{model_number}"
+    return os.path.join(base_folder, folder)
+
+
+def read_manifest(filename):
+    """Read a batch manifest.
+
+    The manifest is a YAML or JSON file with a list of products, or a
+    dictionary with the list under the "products" key. Every product has
+    the keys eventsource, source, eventid, directory and solution, and
+    optionally columnar_grid, comment, crustal_model, incremental,
+    reviewed, suppress_model, timeseries_encoding and version, as the
+    sendproduct options. Relative
+    directories are relative to the manifest.
+
+    Args:
+        filename (str): Path to the manifest.
+
+    Returns:
+        list: Dictionary of every product, with the default values of the
+                missing optional keys.
+    """
+    with open(filename, 'r') as f:
+        manifest = yaml.load(f, Loader=yaml.SafeLoader)
+    if isinstance(manifest, dict):
+        manifest = manifest.get('products')
+    if not isinstance(manifest, list):
+        raise Exception('The batch manifest %r must contain a list of '
+                        'products.' % filename)
+    base = os.path.dirname(os.path.abspath(filename))
+    jobs = []
+    directories = set()
+    folders = set()
+    for idx, entry in enumerate(manifest):
+        missing = [key for key in REQUIRED_KEYS
+                   if not isinstance(entry, dict) or key not in entry]
+        if len(missing) > 0:
+            raise Exception('Product %i of the batch manifest is missing '
+                            'the keys %r.' % (idx + 1, missing))
+        unknown = set(entry) - set(REQUIRED_KEYS) - set(OPTIONAL_KEYS)
+        if len(unknown) > 0:
+            raise Exception('Product %i of the batch manifest has unknown '
+                            'keys %r.' % (idx + 1, sorted(unknown)))
+        job = dict(OPTIONAL_KEYS)
+        job.update(entry)
+        job['eventsource'] = str(job['eventsource'])
+        job['source'] = str(job['source'])
+        job['eventid'] = str(job['eventid'])
+        job['solution'] = int(job['solution'])
+        job['version'] = int(job['version'])
+        if job['version'] < 1:
+            raise Exception('Version number less than one %r.' %
+                            job['version'])
+        job['directory'] = os.path.join(base, job['directory'])
+        directory = os.path.realpath(job['directory'])
+        if directory in directories:
+            # Products are built in their directory, so it cannot be shared
+            raise Exception('The directory %r is used by more than one '
+                            'product.' % job['directory'])
+        directories.add(directory)
+        folder = get_pdl_folder(job['eventid'], job['solution'],
+                                job['suppress_model'], base_folder='')
+        if folder in folders:
+            raise Exception('The product %r is in the batch manifest more '
+                            'than once.' % folder)
+        folders.add(folder)
+        jobs += [job]
+    return jobs
+
+
+def run_batch(jobs, max_workers=None, max_sends=1, dry_run=False,
+              base_folder=None, settings=None):
+    """Build and send a batch of products.
+
+    The products are built in a pool of processes, so the packages and the
+    settings are loaded once per worker instead of once per product.
+    The products are sent in the order of the jobs while the next ones are
+    built, with at most max_sends PDL commands running at the same time. A
+    product that cannot be built or sent does not stop the batch; the error
+    is recorded in the summary.
+
+    Args:
+        jobs (list): Products returned by read_manifest.
+        max_workers (int): Number of processes building products. Default
+                is None, which builds them one at a time in this process.
+        max_sends (int): Number of products sent at the same time. Default
+                is 1.
+        dry_run (bool): Only create the PDL commands without sending the
+                products. Default is False.
+        base_folder (str): Folder where the products are staged for PDL.
+                Default is None, which uses the output folder of the
+                settings.
+        settings (product.constants.Settings): Settings used to build and
+                send the products. Default is None, which reads the config
+                file.
+
+    Returns:
+        dictionary: Summary of the batch with the start time, the total
+                time in seconds, the number of products that failed and the
+                result and timings of each product.
+    """
+    start = time.time()
+    started = datetime.datetime.utcnow().strftime(TIMEFMT)
+    if settings is None:
+        settings = get_settings()
+    # The products are sent from this process, so it needs the sender
+    # client as well as the processes building the products
+    _configure(settings)
+    if base_folder is None:
+        base_folder = settings.outputfolder
+    results = [None] * len(jobs)
+    # a single product (or none) is built in this process
+    if max_workers is None or min(max_workers, len(jobs)) <= 1:
+        builder = None
+    else:
+        builder = ProcessPoolExecutor(max_workers=min(max_workers, len(jobs)))
+    sends = []
+    with ThreadPoolExecutor(max_workers=max(max_sends, 1)) as sender:
+        if builder is None:
+            for idx, job in enumerate(jobs):
+                results[idx] = build_job(job, base_folder, settings)
+                sends += [sender.submit(send_job, job, results[idx],
+                                        dry_run, settings)]
+        else:
+            with builder:
+                builds = [builder.submit(build_job, job, base_folder,
+                                         settings) for job in jobs]
+                for idx, (job, build) in enumerate(zip(jobs, builds)):
+                    try:
+                        results[idx] = build.result()
+                    except Exception as e:
+                        results[idx] = _get_result(job)
+                        results[idx]['error'] = repr(e)
+                    sends += [sender.submit(send_job, job, results[idx],
+                                            dry_run, settings)]
+        results = [send.result() for send in sends]
+    failed = sum(1 for result in results if result['status'] == 'failed')
+    return {
+        'started': started,
+        'seconds': time.time() - start,
+        'dry_run': dry_run,
+        'failed': failed,
+        'products': results,
+    }
+
+
+def send_job(job, result, dry_run=False, settings=None):
+    """Send a built product.
+
+    Args:
+        job (dict): Product returned by read_manifest.
+        result (dict): Result returned by build_job.
+        dry_run (bool): Only create the PDL command without sending the
+                product. Default is False.
+        settings (product.constants.Settings): Settings with the PDL
+                configuration. Default is None, which reads the config file.
+
+    Returns:
+        dictionary: Result of the product with the send time, the number of
+                files sent, the PDL message and the status ("sent",
+                "dry_run" or "failed").
+    """
+    if result['error'] is not None:
+        result['status'] = 'failed'
+        return result
+    start = time.time()
+    try:
+        num_files, message = send_product(
+            job['eventid'], job['eventsource'], result['properties'],
+            result['pdlfolder'], job['source'], job['reviewed'],
+            job['solution'], dry_run, job['suppress_model'], settings)
+        result['files'] = num_files
+        result['message'] = message
+        result['status'] = 'dry_run' if dry_run else 'sent'
+    except Exception:
+        result['error'] = traceback.format_exc()
+        result['status'] = 'failed'
+    result['send_seconds'] = time.time() - start
+    return result
+
+
+def send_product(eventid, network, properties, pdlfolder, source, reviewed,
+                 number, dry_run, suppress, settings=None):
+    """Check the PDL configuration and send a product folder.
+
+    Args:
+        eventid (str): Event code.
+        network (str): Network that originated the event.
+        properties (dict): Product properties.
+        pdlfolder (str): Folder with the product files.
+        source (str): Network contributing this product to ComCat.
+        reviewed (bool): The product was reviewed by a scientist.
+        number (int): Number of the solution.
+        dry_run (bool): Only create the PDL command without sending the
+                product.
+        suppress (bool): Suppress the number suffix on the event code.
+        settings (product.constants.Settings): Settings with the PDL
+                configuration. Default is None, which reads the config file.
+
+    Returns:
+        tuple: Number of files sent and the PDL message.
+    """
+    if settings is None:
+        settings = get_settings()
+    java = settings.java
+    if java is None or not os.path.exists(java):
+        raise FileNotFoundError("File does not exist %r." % java)
+    for path in [settings.jarfile, settings.configfile, settings.privatekey]:
+        if not os.path.exists(path):
+            raise FileNotFoundError("File does not exist %r." % path)
+    files, msg = store_fault(settings.configfile, network, eventid,
+                             settings.jarfile, java, pdlfolder,
+                             settings.privatekey, source, properties,
+                             reviewed, number, dry_run, suppress=suppress)
+    return (files, msg)
+
+
+def _configure(settings=None):
+    """Set the settings, their caches and the PDL sender client.
+
+    A process is only configured again when it is given other settings.
+
+    Args:
+        settings (product.constants.Settings): Settings of the process.
+                Default is None, which reads the config file.
+    """
+    global _CONFIGURED
+    if settings is not None:
+        set_settings(settings)
+    settings = get_settings()
+    if settings is _CONFIGURED:
+        return
+    if settings.fspcache is not None and get_cache() is None:
+        set_cache(FSPCache(settings.fspcache))
+    if settings.locationcache is not None:
+        set_resolver(LocationResolver(cache_folder=settings.locationcache))
+    if settings.pdlservice is not None:
+        set_client(SenderClient(settings.pdlservice))
+    else:
+        set_client(None)
+    _CONFIGURED = settings
+
+
+def _get_result(job):
+    """Create the summary entry of a product.
+
+    Args:
+        job (dict): Product returned by read_manifest.
+
+    Returns:
+        dictionary: Result without timings.
+    """
+    return {
+        'eventsource': job['eventsource'],
+        'eventid': job['eventid'],
+        'solution': job['solution'],
+        'directory': job['directory'],
+        'pdlfolder': None,
+        'properties': None,
+        'staging': None,
+        'status': None,
+        'files': 0,
+        'message': None,
+        'error': None,
+        'build_seconds': None,
+        'send_seconds': None,
+    }
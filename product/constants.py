@@ -1,46 +1,170 @@
 # stdlib imports
-import getpass
 import os
 import shutil
-import yaml
-
-base = os.path.expanduser("~")
-yaml_config = os.path.join(base, ".faultproduct.yaml")
-
-with open(yaml_config, 'r') as config:
-    config_dict = yaml.load(config, Loader=yaml.SafeLoader)
-try:
-    BASE_PDL_FOLDER = config_dict["outputfolder"]
-    JAR = config_dict["pdl"]["jarfile"]
-    CFG = config_dict["pdl"]["configfile"]
-    PRIVATEKEY = config_dict["pdl"]["privatekey"]
-    try:
-        SMTP_SERVER = config_dict['email']["smtp"]
-        EMAIL_SENDER = config_dict['email']["sender"]
-    except KeyError:
-        SMTP_SERVER = None
-        EMAIL_SENDER = None
-        arguments = ("\nemail:\n    smtp: <SMTP SERVER>\n    sender: "
-                     "<SENDER EMAIL ADDRESS>")
-        print("No SMTP server and/or sender specified, so email "
-              "functionality will not be available. Specify these "
-              f"arguments in .faultproduct.yaml as '{arguments}'")
-    try:
-        DEFAULT_ALERT_RECIPIENTS = config_dict['email']["default_alert_recipients"].split(',')
-    except:
-        DEFAULT_ALERT_RECIPIENTS = None
-except:
-    raise Exception("The following configuration keys are required in the "
-                    "~/.faultproduct.yaml file."
-                    "\noutputfolder: <path to folder where products will be written>"
-                    "\npdl:"
-                    "\n    configfile: <path to PDL config"
-                    "\n    jarfile: <path to PDL jar file>"
-                    "\n    privatekey: <path to PDL privatekey file>")
+import sys
+import types
+
+CONFIG_FILE = os.path.join(os.path.expanduser("~"), ".faultproduct.yaml")
+
 DEFAULT_MODEL = ("1D crustal model interpolated from CRUST2.0 "
                  "(Bassin et al., 2000).")
 
-JAVA = shutil.which("java")
 PRODUCT_TYPE = 'finite-fault'
 
 TIMEFMT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+# Module constants read from the config file and the Settings attribute
+# that holds each of them
+SETTING_NAMES = {
+    'BASE_PDL_FOLDER': 'outputfolder',
+    'CFG': 'configfile',
+    'DEFAULT_ALERT_RECIPIENTS': 'default_alert_recipients',
+    'EMAIL_SENDER': 'email_sender',
+    'FSP_CACHE_FOLDER': 'fspcache',
+    'JAR': 'jarfile',
+    'JAVA': 'java',
+    'LOCATION_CACHE_FOLDER': 'locationcache',
+    'PDL_SERVICE': 'pdlservice',
+    'PRIVATEKEY': 'privatekey',
+    'SMTP_SERVER': 'smtp_server',
+}
+
+_SETTINGS = None
+
+
+class Settings(object):
+    """Settings of the config file.
+
+    Attributes:
+        outputfolder (str): Folder where products are written for PDL.
+        configfile (str): Path to the PDL config file.
+        jarfile (str): Path to the PDL jar file.
+        privatekey (str): Path to the PDL private key.
+        smtp_server (str): SMTP server or None.
+        email_sender (str): Email address of the sender or None.
+        default_alert_recipients (list): Email addresses that are alerted by
+                default or None.
+        fspcache (str): Folder of the FSP cache or None.
+        locationcache (str): Folder of the location cache or None.
+        pdlservice (str): Socket of the PDL sender service or None.
+        java (str): Path to the java executable or None.
+    """
+
+    def __init__(self, outputfolder, configfile, jarfile, privatekey,
+                 smtp_server=None, email_sender=None,
+                 default_alert_recipients=None, fspcache=None,
+                 locationcache=None, pdlservice=None, java=None):
+        self.outputfolder = outputfolder
+        self.configfile = configfile
+        self.jarfile = jarfile
+        self.privatekey = privatekey
+        self.smtp_server = smtp_server
+        self.email_sender = email_sender
+        self.default_alert_recipients = default_alert_recipients
+        self.fspcache = fspcache
+        self.locationcache = locationcache
+        self.pdlservice = pdlservice
+        if java is None:
+            java = shutil.which("java")
+        self.java = java
+
+    @classmethod
+    def fromDict(cls, config_dict):
+        """Create settings from the contents of a config file.
+
+        Args:
+            config_dict (dict): Contents of the config file.
+
+        Returns:
+            Settings: Settings of the config file.
+        """
+        try:
+            outputfolder = config_dict["outputfolder"]
+            jarfile = config_dict["pdl"]["jarfile"]
+            configfile = config_dict["pdl"]["configfile"]
+            privatekey = config_dict["pdl"]["privatekey"]
+        except (KeyError, TypeError):
+            raise Exception(
+                "The following configuration keys are required in the "
+                "~/.faultproduct.yaml file."
+                "\noutputfolder: <path to folder where products will be written>"
+                "\npdl:"
+                "\n    configfile: <path to PDL config"
+                "\n    jarfile: <path to PDL jar file>"
+                "\n    privatekey: <path to PDL privatekey file>")
+        email = config_dict.get('email') or {}
+        smtp_server = email.get("smtp")
+        email_sender = email.get("sender")
+        if smtp_server is None or email_sender is None:
+            smtp_server = None
+            email_sender = None
+            arguments = ("\nemail:\n    smtp: <SMTP SERVER>\n    sender: "
+                         "<SENDER EMAIL ADDRESS>")
+            print("No SMTP server and/or sender specified, so email "
+                  "functionality will not be available. Specify these "
+                  f"arguments in .faultproduct.yaml as '{arguments}'")
+        recipients = email.get("default_alert_recipients")
+        if recipients is not None:
+            recipients = recipients.split(',')
+        return cls(outputfolder, configfile, jarfile, privatekey,
+                   smtp_server=smtp_server, email_sender=email_sender,
+                   default_alert_recipients=recipients,
+                   fspcache=config_dict.get("fspcache", None),
+                   locationcache=config_dict.get("locationcache", None),
+                   pdlservice=config_dict.get("pdlservice", None))
+
+    @classmethod
+    def fromFile(cls, filename=CONFIG_FILE):
+        """Read the settings of a config file.
+
+        Args:
+            filename (str): Path to the config file. Default is
+                    ~/.faultproduct.yaml.
+
+        Returns:
+            Settings: Settings of the config file.
+        """
+        import yaml
+
+        with open(filename, 'r') as config:
+            config_dict = yaml.load(config, Loader=yaml.SafeLoader)
+        return cls.fromDict(config_dict or {})
+
+
+class _ConstantsModule(types.ModuleType):
+    """Module that reads the config file the first time a setting is used."""
+
+    def __getattr__(self, name):
+        if name in SETTING_NAMES:
+            return getattr(get_settings(), SETTING_NAMES[name])
+        raise AttributeError("module %r has no attribute %r" %
+                             (self.__name__, name))
+
+
+def get_settings():
+    """Return the settings of this process.
+
+    The config file is read the first time the settings are requested, so
+    importing this module does not require a config file.
+
+    Returns:
+        Settings: Settings of this process.
+    """
+    global _SETTINGS
+    if _SETTINGS is None:
+        _SETTINGS = Settings.fromFile()
+    return _SETTINGS
+
+
+def set_settings(settings):
+    """Set the settings of this process.
+
+    Args:
+        settings (Settings): Settings to use or None to read the config file
+                again when they are next requested.
+    """
+    global _SETTINGS
+    _SETTINGS = settings
+
+
+sys.modules[__name__].__class__ = _ConstantsModule
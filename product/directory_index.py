@@ -0,0 +1,125 @@
+#!/usr/bin/env
+
+# stdlib imports
+import fnmatch
+import os
+import re
+
+MAGIC_CHECK = re.compile("[*?[]")
+
+
+class ProductDirectoryIndex(object):
+    """Listing of a product directory that answers file pattern lookups.
+
+    The directory is listed once and every lookup is matched against the
+    listing in memory. Lookups return the same paths, in the same order, as
+    glob.glob(os.path.join(directory, pattern)): wildcard patterns do not
+    match hidden files unless the pattern starts with a dot.
+    """
+
+    def __init__(self, directory, names):
+        """
+        Args:
+            directory (str): Path to the product directory.
+            names (list): Names of the files in the directory, in the order
+                    they are listed.
+        """
+        self._directory = directory
+        self._names = list(names)
+        self._name_set = set(self._names)
+        self._matches = {}
+
+    def addFile(self, name):
+        """Add a file that was created in the directory.
+
+        Args:
+            name (str): Name of the file.
+        """
+        if name not in self._name_set:
+            self._names += [name]
+            self._name_set.add(name)
+            self._matches = {}
+
+    @property
+    def directory(self):
+        """
+        Helper to return the path to the product directory.
+
+        Returns:
+            str: Path to the directory.
+        """
+        return self._directory
+
+    @classmethod
+    def fromDirectory(cls, directory):
+        """List a product directory.
+
+        Args:
+            directory (str): Path to the product directory. A directory
+                    that cannot be listed has no files.
+
+        Returns:
+            ProductDirectoryIndex: Index of the directory.
+        """
+        try:
+            names = os.listdir(directory or os.curdir)
+        except OSError:
+            names = []
+        return cls(directory, names)
+
+    def getFiles(self, pattern):
+        """Find the files matching a pattern.
+
+        Args:
+            pattern (str): Shell style file name pattern.
+
+        Returns:
+            list: Paths to the matching files.
+        """
+        if pattern not in self._matches:
+            if MAGIC_CHECK.search(pattern) is None:
+                if pattern in self._name_set:
+                    names = [pattern]
+                else:
+                    names = []
+            else:
+                names = fnmatch.filter(self._names, pattern)
+                if not pattern.startswith("."):
+                    names = [name for name in names if not name.startswith(".")]
+            self._matches[pattern] = [
+                os.path.join(self.directory, name) for name in names
+            ]
+        return list(self._matches[pattern])
+
+    def getMissing(self, required):
+        """Find the required files that are not in the directory.
+
+        Args:
+            required (dict): File patterns keyed by the file type.
+
+        Returns:
+            list: Tuples of the file type and the pattern of every missing
+                    file.
+        """
+        return [
+            (file_type, pattern)
+            for file_type, pattern in required.items()
+            if len(self.getFiles(pattern)) < 1
+        ]
+
+    @property
+    def names(self):
+        """
+        Helper to return the names of the files in the directory.
+
+        Returns:
+            list: File names in the order they are listed.
+        """
+        return list(self._names)
+
+    def refresh(self):
+        """List the directory again."""
+        index = self.fromDirectory(self.directory)
+        self._names = index._names
+        self._name_set = index._name_set
+        self._matches = {}
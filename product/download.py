@@ -0,0 +1,297 @@
+#!/usr/bin/env
+
+# stdlib imports
+import json
+import os
+import time
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+# local imports
+from fault.parallel import map_ordered
+
+# Number of files downloaded at the same time by default
+DEFAULT_WORKERS = 8
+# Seconds to wait for a server response
+DEFAULT_TIMEOUT = 60
+# Size of the blocks written while a file is downloaded
+BLOCK_SIZE = 1 << 16
+# Hidden file in each download directory with the ETag of every file
+DOWNLOAD_INDEX = ".downloads.json"
+# Extension of files that have not been completely downloaded
+PARTIAL_EXTENSION = ".part"
+# Extension of the hidden file with the ETag and length of a partial file
+PARTIAL_INFO_EXTENSION = ".part.json"
+
+
+def download_files(downloads, max_workers=DEFAULT_WORKERS,
+                   timeout=DEFAULT_TIMEOUT):
+    """Download files concurrently, skipping files that are up to date.
+
+    Files that already exist are requested with their ETag and are skipped
+    when the server reports that they have not changed, or when the size of
+    the remote file equals the size of the local file. Files are first
+    written with a .part extension. The ETag and length of the remote file
+    are recorded next to the partial file when its download starts, so an
+    interrupted download is resumed with a range request that only applies
+    if the remote file has not changed; a partial file without an ETag is
+    downloaded again. The ETag of every downloaded file is kept in a hidden
+    .downloads.json file in the directory of the file. A file that cannot
+    be downloaded does not stop the other downloads.
+
+    Args:
+        downloads (list): Tuples of the URL and the path where each file is
+                written.
+        max_workers (int): Number of files downloaded at the same time.
+                Default is 8.
+        timeout (float): Seconds to wait for a server response. Default is
+                60.
+
+    Returns:
+        list: Dictionary of statistics for each download, in the order of
+                the downloads, with the keys "url", "filename", "status"
+                ("downloaded", "resumed", "skipped" or "failed"), "bytes"
+                (number of bytes transferred), "seconds" and "error" (the
+                error of a failed download or None).
+    """
+    downloads = list(downloads)
+    directories = sorted(set(os.path.dirname(os.path.abspath(filename))
+                             for url, filename in downloads))
+    etags = {}
+    for directory in directories:
+        for name, etag in _read_index(directory).items():
+            etags[os.path.join(directory, name)] = etag
+    arguments = [(url, filename, etags.get(os.path.abspath(filename)),
+                  timeout) for url, filename in downloads]
+    results = map_ordered(_try_download_file, arguments,
+                          max_workers=max_workers)
+    for directory in directories:
+        index = _read_index(directory)
+        for stat, etag in results:
+            path = os.path.abspath(stat['filename'])
+            if os.path.dirname(path) == directory and etag is not None:
+                index[os.path.basename(path)] = etag
+        _write_index(directory, index)
+    return [stat for stat, etag in results]
+
+
+def summarize_downloads(stats):
+    """Summarize the statistics of a set of downloads.
+
+    Args:
+        stats (list): Statistics returned by download_files.
+
+    Returns:
+        dictionary: Number of files with each status, total number of bytes
+                transferred and the time of the slowest file in seconds.
+    """
+    summary = {'bytes': 0, 'downloaded': 0, 'failed': 0, 'resumed': 0,
+               'skipped': 0, 'slowest': 0.0}
+    for stat in stats:
+        summary[stat['status']] += 1
+        summary['bytes'] += stat['bytes']
+        summary['slowest'] = max(summary['slowest'], stat['seconds'])
+    return summary
+
+
+def _download_file(url, filename, etag, timeout):
+    """Download a single file.
+
+    Args:
+        url (str): URL of the file.
+        filename (str): Path where the file is written.
+        etag (str): ETag recorded for the local file or None.
+        timeout (float): Seconds to wait for a server response.
+
+    Returns:
+        tuple: Statistics dictionary and the ETag of the file.
+    """
+    start = time.time()
+    stat = {'url': url, 'filename': filename, 'status': 'skipped',
+            'bytes': 0, 'seconds': 0.0, 'error': None}
+    partial = filename + PARTIAL_EXTENSION
+    info_path = _get_info_path(filename)
+    headers = {}
+    info = {}
+    if os.path.exists(filename):
+        size = os.path.getsize(filename)
+        if etag is not None:
+            headers['If-None-Match'] = etag
+    elif os.path.exists(partial):
+        size = os.path.getsize(partial)
+        info = _read_info(info_path)
+        # Bytes are only appended if the server can check that the remote
+        # file is the one the partial file was started with
+        if _is_strong(info.get('etag')):
+            headers['Range'] = 'bytes=%i-' % size
+            headers['If-Range'] = info['etag']
+        else:
+            size = None
+    else:
+        size = None
+    try:
+        response = urlopen(Request(url, headers=headers), timeout=timeout)
+    except HTTPError as e:
+        if e.code == 304:
+            stat['seconds'] = time.time() - start
+            return stat, etag
+        if e.code == 416 and 'Range' in headers and \
+                info.get('length') == size:
+            # The partial file is complete
+            os.replace(partial, filename)
+            _remove(info_path)
+            stat['status'] = 'resumed'
+            stat['seconds'] = time.time() - start
+            return stat, info['etag']
+        raise
+    with response:
+        remote_etag = response.headers.get('ETag')
+        length = response.headers.get('Content-Length')
+        if size is not None and 'Range' not in headers:
+            # The file exists and the server did not report it as unchanged
+            if length is not None and int(length) == size and (
+                    etag is None or remote_etag is None
+                    or remote_etag == etag):
+                stat['seconds'] = time.time() - start
+                return stat, remote_etag
+        if response.status == 206:
+            mode = 'ab'
+            stat['status'] = 'resumed'
+            remote_etag = info['etag']
+        else:
+            mode = 'wb'
+            stat['status'] = 'downloaded'
+            if length is not None:
+                length = int(length)
+            _write_info(info_path, {'etag': remote_etag, 'length': length})
+        with open(partial, mode) as f:
+            for block in iter(lambda: response.read(BLOCK_SIZE), b''):
+                f.write(block)
+                stat['bytes'] += len(block)
+    os.replace(partial, filename)
+    _remove(info_path)
+    stat['seconds'] = time.time() - start
+    return stat, remote_etag
+
+
+def _get_info_path(filename):
+    """Get the path to the hidden file describing a partial file.
+
+    Args:
+        filename (str): Path where the file is written.
+
+    Returns:
+        str: Path to the description of the partial file.
+    """
+    directory, name = os.path.split(filename)
+    return os.path.join(directory, '.' + name + PARTIAL_INFO_EXTENSION)
+
+
+def _is_strong(etag):
+    """Check whether an ETag can be used in an If-Range header.
+
+    Args:
+        etag (str): ETag or None.
+
+    Returns:
+        bool: True if the ETag is a strong ETag.
+    """
+    return etag is not None and not etag.startswith('W/')
+
+
+def _read_info(info_path):
+    """Read the description of a partial file.
+
+    Args:
+        info_path (str): Path to the description.
+
+    Returns:
+        dictionary: ETag and length of the remote file, or an empty
+                dictionary if the description cannot be read.
+    """
+    try:
+        with open(info_path, 'r') as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(info, dict):
+        return {}
+    return info
+
+
+def _remove(path):
+    """Remove a file if it exists.
+
+    Args:
+        path (str): Path to the file.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _try_download_file(url, filename, etag, timeout):
+    """Download a single file, recording an error instead of raising it.
+
+    Args:
+        url (str): URL of the file.
+        filename (str): Path where the file is written.
+        etag (str): ETag recorded for the local file or None.
+        timeout (float): Seconds to wait for a server response.
+
+    Returns:
+        tuple: Statistics dictionary and the ETag of the file, which is
+                None if the download failed.
+    """
+    start = time.time()
+    try:
+        return _download_file(url, filename, etag, timeout)
+    except Exception as e:
+        stat = {'url': url, 'filename': filename, 'status': 'failed',
+                'bytes': 0, 'seconds': time.time() - start,
+                'error': repr(e)}
+        return stat, None
+
+
+def _write_info(info_path, info):
+    """Write the description of a partial file.
+
+    Args:
+        info_path (str): Path to the description.
+        info (dict): ETag and length of the remote file.
+    """
+    with open(info_path, 'w') as f:
+        json.dump(info, f)
+
+
+def _read_index(directory):
+    """Read the ETags recorded in a download directory.
+
+    Args:
+        directory (str): Download directory.
+
+    Returns:
+        dictionary: ETag of each file keyed by file name.
+    """
+    try:
+        with open(os.path.join(directory, DOWNLOAD_INDEX), 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict):
+        return {}
+    return index
+
+
+def _write_index(directory, index):
+    """Write the ETags of the files in a download directory.
+
+    Args:
+        directory (str): Download directory.
+        index (dict): ETag of each file keyed by file name.
+    """
+    if not os.path.isdir(directory):
+        return
+    with open(os.path.join(directory, DOWNLOAD_INDEX), 'w') as f:
+        json.dump(index, f, indent=4, sort_keys=True)
@@ -0,0 +1,322 @@
+#!/usr/bin/env
+
+# stdlib imports
+from json.encoder import encode_basestring_ascii
+import re
+
+# third party imports
+import numpy as np
+
+# Number of chunks collected before they are passed to the file handle
+BUFFER_SIZE = 8192
+NONFINITE = {'nan': 'NaN', 'inf': 'Infinity', '-inf': '-Infinity'}
+NUMBER_TYPES = {float, int}
+PLACEHOLDER = re.compile('\x00([cp])([0-9]+)\x01')
+
+
+def dump(obj, fileobj, indent=4, sort_keys=True, decimals=None):
+    """Serialize an object to a JSON formatted stream.
+
+    With the default arguments the output is identical to
+    json.dump(obj, fileobj, indent=4, sort_keys=True). Unlike json.dump,
+    NumPy arrays and scalars are written directly and numeric lists are
+    formatted in a single pass. The output is written to the file handle in
+    pieces while it is encoded.
+
+    Args:
+        obj (object): Object made of dictionaries, lists, tuples, NumPy
+                arrays, strings, numbers, booleans and None.
+        fileobj (file): Text file handle that the JSON is written to.
+        indent (int): Number of spaces used to indent nested values. None
+                writes compact output without whitespace. Default is 4.
+        sort_keys (bool): Sort dictionary keys. Default is True.
+        decimals (int): Number of decimals written for every float. None
+                writes the shortest representation of the float, as json
+                does. Default is None.
+    """
+    _Encoder(indent, sort_keys, decimals, fileobj.write).encode(obj)
+
+
+def dumps(obj, indent=4, sort_keys=True, decimals=None):
+    """Serialize an object to a JSON formatted string.
+
+    Args:
+        obj (object): Object to serialize. See dump.
+        indent (int): Number of spaces used to indent nested values. None
+                writes compact output without whitespace. Default is 4.
+        sort_keys (bool): Sort dictionary keys. Default is True.
+        decimals (int): Number of decimals written for every float. Default
+                is None.
+
+    Returns:
+        str: JSON formatted string.
+    """
+    pieces = []
+    _Encoder(indent, sort_keys, decimals, pieces.append).encode(obj)
+    return ''.join(pieces)
+
+
+def dump_grid(grid, fileobj, indent=4, sort_keys=True, decimals=None):
+    """Serialize a slip grid to a GeoJSON formatted stream.
+
+    The output is identical to dump(grid.toGeoJSON(), fileobj, ...), but the
+    features are written straight from the columnar arrays of the grid
+    without creating a dictionary per polygon.
+
+    Args:
+        grid (SlipGrid): Columnar grid of the subfault polygons.
+        fileobj (file): Text file handle that the JSON is written to.
+        indent (int): Number of spaces used to indent nested values. None
+                writes compact output without whitespace. Default is 4.
+        sort_keys (bool): Sort dictionary keys. Default is True.
+        decimals (int): Number of decimals written for every float. Default
+                is None.
+    """
+    collection = {"type": "FeatureCollection",
+                  "metadata": grid.metadata,
+                  "features": _Features(grid)}
+    _Encoder(indent, sort_keys, decimals, fileobj.write).encode(collection)
+
+
+class _Features(object):
+    """Helper marking where the features of a slip grid are written."""
+
+    def __init__(self, grid):
+        self.grid = grid
+
+
+class _Placeholder(object):
+    """Helper marking a value in a feature template."""
+
+    def __init__(self, kind, index):
+        self.text = '\x00%s%i\x01' % (kind, index)
+
+
+class _Encoder(object):
+    """Helper that encodes objects into chunks and passes them to a writer.
+    """
+
+    def __init__(self, indent, sort_keys, decimals, write):
+        """
+        Args:
+            indent (int): Number of spaces used to indent nested values.
+            sort_keys (bool): Sort dictionary keys.
+            decimals (int): Number of decimals written for every float.
+            write (function): Function called with the encoded chunks.
+        """
+        self._chunks = []
+        self._indent = indent
+        self._newlines = {}
+        self._sort_keys = sort_keys
+        self._write = write
+        if decimals is None:
+            self._decimals = None
+            self._float_format = float.__repr__
+        else:
+            self._decimals = int(decimals)
+            self._float_format = ('%%.%if' % self._decimals).__mod__
+        if indent is None:
+            self._key_separator = ':'
+        else:
+            self._key_separator = ': '
+
+    def encode(self, obj):
+        """Encode an object and write all of the chunks.
+
+        Args:
+            obj (object): Object to serialize.
+        """
+        self._encode(obj, 0)
+        self._flush()
+
+    def _encode(self, value, level):
+        chunks = self._chunks
+        if isinstance(value, str):
+            chunks.append(encode_basestring_ascii(value))
+        elif value is None:
+            chunks.append('null')
+        elif value is True or value is False or isinstance(value, np.bool_):
+            chunks.append('true' if value else 'false')
+        elif isinstance(value, (int, np.integer)):
+            chunks.append(int.__repr__(int(value)))
+        elif isinstance(value, (float, np.floating)):
+            chunks.append(self._float(float(value)))
+        elif isinstance(value, dict):
+            self._encode_dict(value, level)
+        elif isinstance(value, np.ndarray):
+            self._encode(value.tolist(), level)
+        elif isinstance(value, (list, tuple)):
+            self._encode_list(value, level)
+        elif isinstance(value, _Placeholder):
+            chunks.append(value.text)
+        elif isinstance(value, _Features):
+            self._encode_features(value.grid, level)
+        else:
+            raise TypeError('Object of type %s is not JSON serializable'
+                            % value.__class__.__name__)
+
+    def _encode_dict(self, values, level):
+        chunks = self._chunks
+        if not values:
+            chunks.append('{}')
+            return
+        inner = self._newline(level + 1)
+        separator = ',' + inner
+        items = [(self._key(key), value) for key, value in values.items()]
+        if self._sort_keys:
+            items.sort(key=lambda item: item[0])
+        chunks.append('{' + inner)
+        first = True
+        for key, value in items:
+            if first:
+                first = False
+            else:
+                chunks.append(separator)
+            chunks.append(encode_basestring_ascii(key) + self._key_separator)
+            self._encode(value, level + 1)
+        chunks.append(self._newline(level) + '}')
+        if len(chunks) >= BUFFER_SIZE:
+            self._flush()
+
+    def _encode_features(self, grid, level):
+        chunks = self._chunks
+        if grid.num_polygons == 0:
+            chunks.append('[]')
+            return
+        inner = self._newline(level + 1)
+        separator = ',' + inner
+        coordinates = self._texts(grid.coordinates.ravel(), level)
+        offsets = (grid.ring_offsets * 3).tolist()
+        columns = [self._texts(value, level + 3)
+                   for value in grid.properties.values()]
+        templates = {}
+        chunks.append('[' + inner)
+        for idx in range(grid.num_polygons):
+            start = offsets[idx]
+            end = offsets[idx + 1]
+            num_vertices = (end - start) // 3
+            if num_vertices not in templates:
+                templates[num_vertices] = self._feature_template(
+                    list(grid.properties), num_vertices, level + 1)
+            template, geometry_first, order = templates[num_vertices]
+            properties = [columns[column][idx] for column in order]
+            if geometry_first:
+                values = coordinates[start:end] + properties
+            else:
+                values = properties + coordinates[start:end]
+            if idx > 0:
+                chunks.append(separator)
+            chunks.append(template % tuple(values))
+            if len(chunks) >= BUFFER_SIZE:
+                self._flush()
+        chunks.append(self._newline(level) + ']')
+
+    def _encode_list(self, values, level):
+        chunks = self._chunks
+        if not values:
+            chunks.append('[]')
+            return
+        inner = self._newline(level + 1)
+        separator = ',' + inner
+        if set(map(type, values)) <= NUMBER_TYPES:
+            chunks.append('[' + inner + separator.join(self._numbers(values))
+                          + self._newline(level) + ']')
+            return
+        chunks.append('[' + inner)
+        first = True
+        for value in values:
+            if first:
+                first = False
+            else:
+                chunks.append(separator)
+            self._encode(value, level + 1)
+        chunks.append(self._newline(level) + ']')
+        if len(chunks) >= BUFFER_SIZE:
+            self._flush()
+
+    def _feature_template(self, keys, num_vertices, level):
+        # Encode a feature with placeholders instead of values and return it
+        # as a format string with the order in which the values appear
+        ring = [[_Placeholder('c', 3 * vertex + component)
+                 for component in range(3)]
+                for vertex in range(num_vertices)]
+        properties = dict((key, _Placeholder('p', idx))
+                          for idx, key in enumerate(keys))
+        feature = {"type": "Feature",
+                   "properties": properties,
+                   "geometry": {"type": "Polygon", "coordinates": [ring]}}
+        pieces = []
+        encoder = _Encoder(self._indent, self._sort_keys, self._decimals,
+                           pieces.append)
+        encoder._encode(feature, level)
+        encoder._flush()
+        text = ''.join(pieces)
+        placeholders = PLACEHOLDER.findall(text)
+        geometry_first = placeholders[0][0] == 'c'
+        order = [int(idx) for kind, idx in placeholders if kind == 'p']
+        template = PLACEHOLDER.sub('%s', text.replace('%', '%%'))
+        return template, geometry_first, order
+
+    def _flush(self):
+        if self._chunks:
+            self._write(''.join(self._chunks))
+            del self._chunks[:]
+
+    def _float(self, value):
+        text = self._float_format(value)
+        return NONFINITE.get(text, text)
+
+    def _key(self, key):
+        if isinstance(key, str):
+            return key
+        if key is True:
+            return 'true'
+        if key is False:
+            return 'false'
+        if key is None:
+            return 'null'
+        if isinstance(key, (float, np.floating)):
+            return self._float(float(key))
+        if isinstance(key, (int, np.integer)):
+            return int.__repr__(int(key))
+        raise TypeError('keys must be str, int, float, bool or None, not %s'
+                        % key.__class__.__name__)
+
+    def _newline(self, level):
+        if self._indent is None:
+            return ''
+        if level not in self._newlines:
+            self._newlines[level] = '\n' + ' ' * (self._indent * level)
+        return self._newlines[level]
+
+    def _numbers(self, values):
+        # Format a flat list of int and float values in one pass
+        if self._decimals is None:
+            texts = list(map(repr, values))
+        else:
+            float_format = self._float_format
+            texts = [float_format(value) if type(value) is float
+                     else repr(value) for value in values]
+        if 'nan' in texts or 'inf' in texts or '-inf' in texts:
+            texts = [NONFINITE.get(text, text) for text in texts]
+        return texts
+
+    def _texts(self, values, level):
+        # Encode each value of an array
+        kind = values.dtype.kind
+        values = values.tolist()
+        if kind in 'fiu':
+            return self._numbers(values)
+        if kind == 'b':
+            return ['true' if value else 'false' for value in values]
+        if kind == 'U':
+            return list(map(encode_basestring_ascii, values))
+        texts = []
+        for value in values:
+            pieces = []
+            encoder = _Encoder(self._indent, self._sort_keys, self._decimals,
+                               pieces.append)
+            encoder._encode(value, level)
+            encoder._flush()
+            texts.append(''.join(pieces))
+        return texts
@@ -0,0 +1,225 @@
+#!/usr/bin/env
+
+# stdlib imports
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.request import urlopen
+
+URL_TEMPLATE = (
+    "https://earthquake.usgs.gov/earthquakes/feed/v1.0/detail/[EVENTID].geojson"
+)
+# Seconds to wait for the detail feed before giving up
+DEFAULT_TIMEOUT = 5
+# Seconds a cached location is used before it is requested again
+DEFAULT_TTL = 24 * 60 * 60
+CACHE_FILE = "locations.json"
+
+_RESOLVER = None
+
+
+class LocationResolver(object):
+    """Resolver of the place description of an event.
+
+    The place is read from the ComCat detail feed of the event. Requests
+    give up after a timeout, and places that were found can be kept in an
+    on-disk cache, so later builds of the same event do not wait for the
+    feed. A cached place is used after it expires if the feed cannot be
+    reached.
+    """
+
+    def __init__(
+        self,
+        url_template=URL_TEMPLATE,
+        timeout=DEFAULT_TIMEOUT,
+        cache_folder=None,
+        ttl=DEFAULT_TTL,
+    ):
+        """
+        Args:
+            url_template (str): URL of the event detail feed, where
+                    [EVENTID] is replaced by the event id. Default is the
+                    ComCat detail feed.
+            timeout (float): Seconds to wait for the feed. Default is 5.
+            cache_folder (str): Folder of the location cache. Created if it
+                    does not exist. Default is None, which disables the
+                    cache.
+            ttl (float): Seconds a cached place is used before it is
+                    requested again. Default is one day.
+        """
+        if cache_folder is not None:
+            os.makedirs(cache_folder, exist_ok=True)
+        self._cache_folder = cache_folder
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._timeout = timeout
+        self._ttl = ttl
+        self._url_template = url_template
+
+    @property
+    def cache_folder(self):
+        """
+        Helper to return the folder of the location cache.
+
+        Returns:
+            str: Cache folder or None if caching is disabled.
+        """
+        return self._cache_folder
+
+    def clear(self):
+        """Remove all cached places."""
+        if self.cache_folder is None:
+            return
+        with self._lock:
+            try:
+                os.remove(os.path.join(self.cache_folder, CACHE_FILE))
+            except FileNotFoundError:
+                pass
+
+    def getLocation(self, eventid):
+        """Get the place description of an event.
+
+        Args:
+            eventid (str): Full event id, including the event source.
+
+        Returns:
+            str: Place description or None if it could not be found.
+        """
+        cached = self._readCache().get(eventid)
+        if cached is not None and time.time() - cached["time"] < self.ttl:
+            return cached["place"]
+        try:
+            place = self._fetch(eventid)
+        except Exception:
+            place = None
+        if place is None:
+            if cached is not None:
+                return cached["place"]
+            return None
+        self._writeCache(eventid, place)
+        return place
+
+    def getLocationAsync(self, eventid):
+        """Get the place description of an event in a background thread.
+
+        Args:
+            eventid (str): Full event id, including the event source.
+
+        Returns:
+            concurrent.futures.Future: Future of the place description,
+                    whose result is None if it could not be found.
+        """
+        with self._lock:
+            # A forked process does not have the threads of its parent
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=4)
+                self._executor_pid = os.getpid()
+            executor = self._executor
+        return executor.submit(self.getLocation, eventid)
+
+    @property
+    def timeout(self):
+        """
+        Helper to return the request timeout.
+
+        Returns:
+            float: Seconds to wait for the feed.
+        """
+        return self._timeout
+
+    @property
+    def ttl(self):
+        """
+        Helper to return the time to live of the cached places.
+
+        Returns:
+            float: Seconds a cached place is used.
+        """
+        return self._ttl
+
+    def _fetch(self, eventid):
+        """
+        Helper to request the place of an event from the feed.
+
+        Args:
+            eventid (str): Full event id, including the event source.
+
+        Returns:
+            str: Place description.
+        """
+        url = self._url_template.replace("[EVENTID]", eventid)
+        with urlopen(url, timeout=self.timeout) as fh:
+            data = fh.read()
+        jdict = json.loads(data.decode())
+        return jdict["properties"]["place"]
+
+    def _readCache(self):
+        """
+        Helper to read the cached places.
+
+        Returns:
+            dictionary: Place and time it was cached, keyed by event id.
+        """
+        if self.cache_folder is None:
+            return {}
+        path = os.path.join(self.cache_folder, CACHE_FILE)
+        with self._lock:
+            try:
+                with open(path, "r") as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                return {}
+        if not isinstance(cache, dict):
+            return {}
+        return cache
+
+    def _writeCache(self, eventid, place):
+        """
+        Helper to add a place to the cache.
+
+        Args:
+            eventid (str): Full event id, including the event source.
+            place (str): Place description.
+        """
+        if self.cache_folder is None:
+            return
+        cache = self._readCache()
+        cache[eventid] = {"place": place, "time": time.time()}
+        with self._lock:
+            handle, temp_path = tempfile.mkstemp(dir=self.cache_folder)
+            try:
+                with os.fdopen(handle, "w") as f:
+                    json.dump(cache, f, indent=4, sort_keys=True)
+                os.replace(temp_path, os.path.join(self.cache_folder, CACHE_FILE))
+            except OSError:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+
+def get_resolver():
+    """Return the resolver used for the product location by default.
+
+    A resolver without a cache is created the first time it is requested.
+
+    Returns:
+        LocationResolver: Default resolver.
+    """
+    global _RESOLVER
+    if _RESOLVER is None:
+        _RESOLVER = LocationResolver()
+    return _RESOLVER
+
+
+def set_resolver(resolver):
+    """Set the resolver used for the product location by default.
+
+    Args:
+        resolver (LocationResolver): Resolver to use or None to restore a
+                resolver without a cache.
+    """
+    global _RESOLVER
+    _RESOLVER = resolver
@@ -0,0 +1,232 @@
+#!/usr/bin/env
+
+# stdlib imports
+import hashlib
+import json
+import os
+
+# Name of the manifest written next to the product files
+MANIFEST_FILE = ".product_manifest.json"
+# Increase when the outputs created from the same inputs change
+MANIFEST_VERSION = 1
+# Size of the blocks read while hashing a file
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def hash_file(path):
+    """Compute the SHA-1 hash of a file.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: Hexadecimal digest of the file contents.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ProductManifest(object):
+    """Fingerprints of the inputs used to build the outputs of a product.
+
+    Each build stage is recorded with a key computed from the hashes of its
+    input files and its options, and with the hashes of the outputs it
+    wrote. A stage is current when the key is unchanged and its outputs
+    have not been modified or removed since they were recorded.
+
+    File hashes are stored with the size and modification time of the
+    file, and a file is only hashed again when one of them changes.
+    """
+
+    def __init__(self, directory, files=None, stages=None):
+        """
+        Args:
+            directory (str): Directory of the product files.
+            files (dict): Size, modification time and hash of each file,
+                    keyed by file name. Default is None.
+            stages (dict): Key, output hashes and data of each stage, keyed
+                    by stage name. Default is None.
+        """
+        self._directory = directory
+        self._files = {} if files is None else files
+        self._stages = {} if stages is None else stages
+
+    @property
+    def directory(self):
+        """
+        Helper to return the directory of the product files.
+
+        Returns:
+            str: Path to the directory.
+        """
+        return self._directory
+
+    @property
+    def filename(self):
+        """
+        Helper to return the path to the manifest file.
+
+        Returns:
+            str: Path to the manifest file.
+        """
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    @classmethod
+    def fromDirectory(cls, directory):
+        """Read the manifest of a product directory.
+
+        A missing or unreadable manifest, or one written by a different
+        manifest version, results in an empty manifest.
+
+        Args:
+            directory (str): Directory of the product files.
+
+        Returns:
+            ProductManifest: Manifest of the directory.
+        """
+        try:
+            with open(os.path.join(directory, MANIFEST_FILE), "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return cls(directory)
+        if not isinstance(manifest, dict) or \
+                manifest.get("version") != MANIFEST_VERSION:
+            return cls(directory)
+        return cls(directory, manifest.get("files"), manifest.get("stages"))
+
+    def getData(self, name):
+        """Get the data recorded with a stage.
+
+        Args:
+            name (str): Name of the stage.
+
+        Returns:
+            dictionary: Data of the stage or None if the stage has not been
+                    recorded.
+        """
+        stage = self._stages.get(name)
+        if stage is None:
+            return None
+        return stage["data"]
+
+    def getFingerprint(self, paths, options=None):
+        """Compute the key of a stage.
+
+        Args:
+            paths (list): Paths to the input files of the stage.
+            options (dict): JSON serializable options of the stage. Default
+                    is None.
+
+        Returns:
+            str: Hexadecimal digest of the file names, the file hashes and
+                    the options.
+        """
+        files = sorted(
+            (os.path.basename(path), self.getHash(path)) for path in paths
+        )
+        text = json.dumps(
+            {"files": files, "options": options}, sort_keys=True
+        )
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def getHash(self, path):
+        """Get the hash of a file in the product directory.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            str: Hexadecimal digest of the file contents.
+        """
+        name = os.path.basename(path)
+        stat = os.stat(path)
+        record = self._files.get(name)
+        if record is not None and record["size"] == stat.st_size and \
+                record["mtime"] == stat.st_mtime_ns:
+            return record["sha1"]
+        sha1 = hash_file(path)
+        self._files[name] = {
+            "mtime": stat.st_mtime_ns,
+            "sha1": sha1,
+            "size": stat.st_size,
+        }
+        return sha1
+
+    def hasStage(self, name):
+        """Check if a stage has been recorded.
+
+        Args:
+            name (str): Name of the stage.
+
+        Returns:
+            bool: True if the stage is in the manifest.
+        """
+        return name in self._stages
+
+    def isCurrent(self, name, key):
+        """Check if a stage is current.
+
+        Args:
+            name (str): Name of the stage.
+            key (str): Key of the inputs of the stage.
+
+        Returns:
+            bool: True if the stage was recorded with the same key and its
+                    outputs have not changed, False if it must be built
+                    again.
+        """
+        stage = self._stages.get(name)
+        if stage is None or stage["key"] != key:
+            return False
+        for output, sha1 in stage["outputs"].items():
+            path = os.path.join(self.directory, output)
+            if not os.path.exists(path) or self.getHash(path) != sha1:
+                return False
+        return True
+
+    def removeStage(self, name):
+        """Remove the record of a stage.
+
+        Args:
+            name (str): Name of the stage.
+        """
+        self._stages.pop(name, None)
+
+    def save(self):
+        """Write the manifest file.
+
+        Records of files that no longer exist in the directory are dropped.
+        """
+        files = dict(
+            (name, record)
+            for name, record in self._files.items()
+            if os.path.exists(os.path.join(self.directory, name))
+        )
+        manifest = {
+            "files": files,
+            "stages": self._stages,
+            "version": MANIFEST_VERSION,
+        }
+        with open(self.filename, "w") as f:
+            json.dump(manifest, f, indent=4, sort_keys=True)
+
+    def setStage(self, name, key, outputs, data=None):
+        """Record a stage that has been built.
+
+        Args:
+            name (str): Name of the stage.
+            key (str): Key of the inputs of the stage.
+            outputs (list): Paths to the files written by the stage.
+            data (dictionary): JSON serializable data kept with the stage.
+                    Default is None.
+        """
+        self._stages[name] = {
+            "data": data,
+            "key": key,
+            "outputs": dict(
+                (os.path.basename(path), self.getHash(path)) for path in outputs
+            ),
+        }
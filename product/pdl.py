@@ -1,13 +1,19 @@
-# third party imports
+# stdlib imports
 import datetime
-from impactutils.transfer.pdlsender import PDLSender
-from libcomcat.search import get_event_by_id, search
-from libcomcat.classes import Product
-import numpy as np
 import os
+import re
+import shlex
+
+# third party imports
+from impactutils.transfer.pdlsender import PDLSender
 
 # local imports
-from product.constants import BASE_PDL_FOLDER, PRODUCT_TYPE, TIMEFMT
+from product.constants import PRODUCT_TYPE, TIMEFMT
+from product.download import DEFAULT_WORKERS, download_files
+from product.sender_service import get_client
+
+# Download time at the end of the directory names written by get_fault
+DIRECTORY_TIME_PATTERN = r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}_[0-9]{2}_[0-9]{2}Z'
 
 
 def delete_fault(configfile, eventsource, eventsourcecode, jarfile, java,
@@ -40,7 +46,9 @@ def delete_fault(configfile, eventsource, eventsourcecode, jarfile, java,
         props['code'] += '_' + str(number)
     props['type'] = 'finite-fault'
     sender = PDLSender(properties=props)
-    msg = sender.cancel()
+    msg = _run_service(sender, 'DELETE', props['code'])
+    if msg is None:
+        msg = sender.cancel()
     return (msg)
 
 
@@ -60,7 +68,8 @@ def get_date(milliseconds):
 
 
 def get_fault(eventsource, eventsourcecode, comcat_host='earthquake.usgs.gov',
-              model=None, write_directory=None):
+              model=None, write_directory=None, max_workers=DEFAULT_WORKERS,
+              resume=False):
     """Retrieve the latest finite_fault data for a given event.
     Args:
         eventsource (str): Network that originated the event.
@@ -71,7 +80,22 @@ def get_fault(eventsource, eventsourcecode, comcat_host='earthquake.usgs.gov',
                 Default is False.
         write_directory (str): Path to directory where files will be written.
                 Default is None.
+        max_workers (int): Number of files downloaded at the same time.
+                Default is 8.
+        resume (bool): Write the files to the latest directory of a previous
+                download of the product, if there is one, so interrupted
+                downloads are resumed and unchanged files are skipped.
+                Default is False.
+
+    Returns:
+        list: Download statistics of each file (see
+                product.download.download_files) or None if no
+                directory is given.
     """
+    # imported here so sending and deleting products do not load libcomcat
+    from libcomcat.classes import Product
+    from libcomcat.search import get_event_by_id
+
     eventid = eventsource + eventsourcecode
     try:
         detail = get_event_by_id(eventid, host=comcat_host)
@@ -83,10 +107,9 @@ def get_fault(eventsource, eventsourcecode, comcat_host='earthquake.usgs.gov',
         mod1 = ''
         for prod in detail._jdict['properties']['products'][PRODUCT_TYPE]:
             if prod['code'].endswith(f'_{model}'):
-                if mod1 == '':
-                    latest_time1 = get_date(prod['updateTime'])
-                if get_date(prod['updateTime']) >= latest_time1:
-                    latest_time1 = get_date(prod['updateTime'])
+                update_time = get_date(prod['updateTime'])
+                if mod1 == '' or update_time >= latest_time1:
+                    latest_time1 = update_time
                     mod1 = Product('finite-fault', 'last', prod)
         if mod1 == '':
             raise Exception(f'Model number, {model}, was not found for this '
@@ -94,24 +117,26 @@ def get_fault(eventsource, eventsourcecode, comcat_host='earthquake.usgs.gov',
     else:
         mod1 = detail.getProducts(PRODUCT_TYPE, version='last')[0]
 
-    if write_directory is not None:
+    if write_directory is None:
+        return None
+    if model is not None:
+        prefix = eventid + f'_{model}_'
+    else:
+        prefix = eventid + '_'
+    dir1 = None
+    if resume:
+        dir1 = _get_latest_directory(write_directory, prefix)
+    if dir1 is None:
         now = datetime.datetime.utcnow()
         date_str = now.strftime(TIMEFMT.replace(':', '_').replace('.%f', ''))
-        if model is not None:
-            dir1 = os.path.join(write_directory,
-                                eventid + f'_{model}_' + date_str)
-            if not os.path.exists(dir1):
-                os.makedirs(dir1, exist_ok=True)
-            for file1 in mod1.contents:
-                filename1 = os.path.join(dir1, os.path.basename(file1))
-                mod1.getContent(file1, filename1)
-        else:
-            dir = os.path.join(write_directory, eventid + '_' + date_str)
-            if not os.path.exists(dir):
-                os.makedirs(dir, exist_ok=True)
-            for download_file in mod1.contents:
-                filename = os.path.join(dir, os.path.basename(download_file))
-                mod1.getContent(download_file, filename)
+        dir1 = os.path.join(write_directory, prefix + date_str)
+    if not os.path.exists(dir1):
+        os.makedirs(dir1, exist_ok=True)
+    downloads = []
+    for file1 in mod1.contents:
+        filename1 = os.path.join(dir1, os.path.basename(file1))
+        downloads += [(mod1.getContentURL(file1), filename1)]
+    return download_files(downloads, max_workers=max_workers)
 
 
 def store_fault(configfile, eventsource, eventsourcecode, jarfile, java,
@@ -156,13 +181,81 @@ def store_fault(configfile, eventsource, eventsourcecode, jarfile, java,
                        product_properties=properties)
     if dry_run:
         nfiles = 0
-        cmd = sender._pdlcmd
-        cmd = cmd.replace('[STATUS]', 'UPDATE')
-        cmd = sender._replace_required_properties(cmd)
-        cmd = sender._replace_files(cmd)
-        cmd = sender._replace_product_properties(cmd)
-        cmd = sender._replace_optional_properties(cmd)
-        msg = cmd
+        msg = _get_command(sender, 'UPDATE')
     else:
-        nfiles, msg = sender.send()
+        msg = _run_service(sender, 'UPDATE', props['code'])
+        if msg is None:
+            nfiles, msg = sender.send()
+        else:
+            nfiles = sum(len(files) for path, dirs, files in
+                         os.walk(pdlfolder))
     return (nfiles, msg)
+
+
+def _get_command(sender, status):
+    """Create the PDL command of a sender.
+
+    Args:
+        sender (PDLSender): Sender of the product.
+        status (str): Product status, UPDATE or DELETE.
+
+    Returns:
+        str: PDL command.
+    """
+    cmd = sender._pdlcmd
+    cmd = cmd.replace('[STATUS]', status)
+    if status == 'DELETE':
+        cmd = cmd.replace('[FILE]', '').replace('[DIRECTORY]', '')
+    cmd = sender._replace_required_properties(cmd)
+    if status != 'DELETE':
+        cmd = sender._replace_files(cmd)
+    cmd = sender._replace_product_properties(cmd)
+    cmd = sender._replace_optional_properties(cmd)
+    return cmd
+
+
+def _get_latest_directory(write_directory, prefix):
+    """Find the latest download directory of a product.
+
+    Args:
+        write_directory (str): Path to directory where files are written.
+        prefix (str): Start of the directory names of the product, which are
+                followed by the download time.
+
+    Returns:
+        str: Path to the latest directory or None if there is none.
+    """
+    if not os.path.isdir(write_directory):
+        return None
+    pattern = re.compile(re.escape(prefix) + DIRECTORY_TIME_PATTERN + '$')
+    names = [name for name in os.listdir(write_directory)
+             if pattern.match(name) and
+             os.path.isdir(os.path.join(write_directory, name))]
+    if len(names) == 0:
+        return None
+    return os.path.join(write_directory, max(names))
+
+
+def _run_service(sender, status, code):
+    """Run the PDL command of a sender with the sender service.
+
+    Args:
+        sender (PDLSender): Sender of the product.
+        status (str): Product status, UPDATE or DELETE.
+        code (str): Product code.
+
+    Returns:
+        str: Output of the PDL command or None if no sender service is
+                running, in which case the product has not been sent.
+    """
+    client = get_client()
+    if client is None:
+        return None
+    command = shlex.split(_get_command(sender, status))
+    reply = client.run(command)
+    if reply is None:
+        return None
+    if reply['returncode'] != 0:
+        raise Exception('Could not send product %r due to error %r.' %
+                        (code, reply['output']))
+    return reply['output']
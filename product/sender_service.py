@@ -0,0 +1,249 @@
+#!/usr/bin/env
+
+# stdlib imports
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import threading
+
+# Seconds a PDL command may run before it is stopped
+DEFAULT_TIMEOUT = 600
+
+_CLIENT = None
+
+
+class SenderService(object):
+    """Local service that runs PDL commands for other processes.
+
+    Requests are received on a Unix socket, one JSON object per line with
+    the "command" key holding the PDL command as a list of arguments, and
+    each request is answered with a JSON line with the "returncode" and
+    "output" of the command. Commands run one at a time, so processes that
+    send products at the same time do not run PDL concurrently.
+
+    By default every command is run as a separate process, which starts
+    Java for every product like PDLSender does. When a worker command is
+    given, the worker is started once and kept running: each request line
+    is written to the standard input of the worker, which must write one
+    reply line to its standard output. A worker that exits is started again
+    for the next request. No worker is included, and ProductClient.jar
+    cannot be used as one.
+    """
+
+    def __init__(self, socket_path, worker_command=None,
+                 timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            socket_path (str): Path to the Unix socket of the service.
+            worker_command (list): Command of the worker process as a list
+                    of arguments. Default is None, which runs every command
+                    as a separate process.
+            timeout (float): Seconds a command run as a separate process
+                    may take. Default is 600.
+        """
+        self._lock = threading.Lock()
+        self._server = None
+        self._socket_path = socket_path
+        self._timeout = timeout
+        self._worker = None
+        self._worker_command = worker_command
+
+    def run(self, request):
+        """Run a PDL command.
+
+        Args:
+            request (dict): Request with the command as a list of
+                    arguments under the "command" key.
+
+        Returns:
+            dictionary: Reply with the "returncode" and "output" of the
+                    command.
+        """
+        with self._lock:
+            if self._worker_command is None:
+                return self._runProcess(request)
+            return self._runWorker(request)
+
+    def serve_forever(self):
+        """Answer requests until shutdown is called."""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        reply = service.run(json.loads(line.decode()))
+                    except Exception as e:
+                        reply = {'returncode': -1, 'output': repr(e)}
+                    self.wfile.write(json.dumps(reply).encode() + b'\n')
+
+        self._server = socketserver.ThreadingUnixStreamServer(
+            self.socket_path, Handler)
+        self._server.daemon_threads = True
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self._stopWorker()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def shutdown(self):
+        """Stop answering requests."""
+        if self._server is not None:
+            self._server.shutdown()
+
+    @property
+    def socket_path(self):
+        """
+        Helper to return the path to the socket of the service.
+
+        Returns:
+            str: Path to the Unix socket.
+        """
+        return self._socket_path
+
+    def _runProcess(self, request):
+        """
+        Helper to run a command as a separate process.
+
+        Args:
+            request (dict): Request with the command.
+
+        Returns:
+            dictionary: Return code and output of the command.
+        """
+        try:
+            proc = subprocess.run(request['command'], stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT,
+                                  timeout=self._timeout)
+        except subprocess.TimeoutExpired:
+            return {'returncode': -1,
+                    'output': 'The command did not finish in %s seconds.' %
+                    self._timeout}
+        return {'returncode': proc.returncode,
+                'output': proc.stdout.decode(errors='replace')}
+
+    def _runWorker(self, request):
+        """
+        Helper to run a command with the worker process.
+
+        Args:
+            request (dict): Request with the command.
+
+        Returns:
+            dictionary: Reply of the worker.
+        """
+        line = json.dumps(request).encode() + b'\n'
+        try:
+            self._startWorker()
+            self._worker.stdin.write(line)
+            self._worker.stdin.flush()
+        except BrokenPipeError:
+            # The worker exited before it received the request
+            self._stopWorker()
+            self._startWorker()
+            self._worker.stdin.write(line)
+            self._worker.stdin.flush()
+        reply = self._worker.stdout.readline()
+        if not reply:
+            self._stopWorker()
+            return {'returncode': -1,
+                    'output': 'The worker exited while running the command.'}
+        return json.loads(reply.decode())
+
+    def _startWorker(self):
+        """Helper to start the worker if it is not running."""
+        if self._worker is not None and self._worker.poll() is None:
+            return
+        self._worker = subprocess.Popen(self._worker_command,
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE)
+
+    def _stopWorker(self):
+        """Helper to stop the worker."""
+        if self._worker is None:
+            return
+        if self._worker.poll() is None:
+            self._worker.stdin.close()
+            try:
+                self._worker.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._worker.kill()
+                self._worker.wait()
+        self._worker = None
+
+
+class SenderClient(object):
+    """Client of a SenderService."""
+
+    def __init__(self, socket_path, timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            socket_path (str): Path to the Unix socket of the service.
+            timeout (float): Seconds to wait for the reply of the service.
+                    Default is 600.
+        """
+        self._socket_path = socket_path
+        self._timeout = timeout
+
+    def run(self, command):
+        """Run a PDL command with the service.
+
+        Args:
+            command (list): PDL command as a list of arguments.
+
+        Returns:
+            dictionary: Reply with the "returncode" and "output" of the
+                    command or None if the service is not running.
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            return None
+        with sock:
+            sock.settimeout(self._timeout)
+            sock.sendall(json.dumps({'command': command}).encode() + b'\n')
+            with sock.makefile('rb') as f:
+                reply = f.readline()
+        if not reply:
+            raise Exception('The sender service at %r closed the connection '
+                            'without a reply.' % self.socket_path)
+        return json.loads(reply.decode())
+
+    @property
+    def socket_path(self):
+        """
+        Helper to return the path to the socket of the service.
+
+        Returns:
+            str: Path to the Unix socket.
+        """
+        return self._socket_path
+
+
+def get_client():
+    """Return the client used to send products.
+
+    Returns:
+        SenderClient: Client or None if products are sent by starting a PDL
+                process for each product.
+    """
+    return _CLIENT
+
+
+def set_client(client):
+    """Set the client used to send products.
+
+    Args:
+        client (SenderClient): Client to use or None to start a PDL process
+                for each product.
+    """
+    global _CLIENT
+    _CLIENT = client
@@ -0,0 +1,224 @@
+#!/usr/bin/env
+
+# stdlib imports
+from contextlib import contextmanager
+import json
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# local imports
+from product.manifest import hash_file
+
+# ioctl request that clones a file on Linux filesystems with copy on write
+FICLONE = 0x40049409
+# Extension of the hidden record written next to each staged folder
+RECORD_EXTENSION = ".staging.json"
+# Extension of files that are being staged
+TEMP_EXTENSION = ".staging"
+
+
+@contextmanager
+def replacement_path(path):
+    """Get the path where a new version of a file is written.
+
+    The file is replaced by the new version when the block ends without an
+    error. Product files are written this way, so rebuilding a product
+    creates new files instead of changing the files that are linked into a
+    PDL folder.
+
+    Args:
+        path (str): Path to the file.
+
+    Yields:
+        str: Temporary path of the new version.
+    """
+    temp_path = path + TEMP_EXTENSION
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def stage_product(file_directory, pdl_directory, link=True):
+    """Create the folder that is sent to PDL with the product files.
+
+    The files are hard linked into the folder, or cloned when they cannot
+    be linked and the filesystem supports copy on write, and they are
+    copied when neither is possible (e.g. the folder is on another
+    filesystem). Files of an earlier staging of the folder whose contents
+    have not changed are kept, and files that are not part of the product
+    are removed. Staged files are recorded with their hash in a hidden
+    file next to the folder, so a copied file is only hashed again when the
+    size or modification time of the product file changes.
+
+    Args:
+        file_directory (dict): Path of each file and the name it is given
+                in the PDL folder, as in WebProduct.paths.
+        pdl_directory (str): Path to the PDL folder.
+        link (bool): Link or clone the files when possible. Default is
+                True. If False, every changed file is copied.
+
+    Returns:
+        dictionary: Number of files that were "linked", "copied" (including
+                cloned files), "skipped" because they were unchanged, and
+                "removed" from the folder.
+    """
+    pdl_directory = os.path.normpath(pdl_directory)
+    os.makedirs(pdl_directory, exist_ok=True)
+    record_path = _get_record_path(pdl_directory)
+    record = _read_record(record_path)
+    names = set(file_directory[key][1] for key in file_directory)
+    stats = {'copied': 0, 'linked': 0, 'removed': 0, 'skipped': 0}
+    # remove the files that are not part of the product to stop conflicts
+    for name in os.listdir(pdl_directory):
+        if name in names:
+            continue
+        path = os.path.join(pdl_directory, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        stats['removed'] += 1
+    staged = {}
+    for key in file_directory:
+        current, name = file_directory[key]
+        future = os.path.join(pdl_directory, name)
+        status, staged[name] = _stage_file(current, future, record.get(name),
+                                           link)
+        stats[status] += 1
+    with open(record_path, 'w') as f:
+        json.dump(staged, f, indent=4, sort_keys=True)
+    return stats
+
+
+def _get_record_path(pdl_directory):
+    """Get the path to the staging record of a PDL folder.
+
+    The record is outside of the folder, so it is not sent to PDL.
+
+    Args:
+        pdl_directory (str): Path to the PDL folder.
+
+    Returns:
+        str: Path to the record.
+    """
+    parent, folder = os.path.split(pdl_directory)
+    return os.path.join(parent, '.' + folder + RECORD_EXTENSION)
+
+
+def _get_stat_key(stat):
+    """Get the size and modification time of a file.
+
+    Args:
+        stat (os.stat_result): Status of the file.
+
+    Returns:
+        list: Size and modification time in nanoseconds.
+    """
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _read_record(record_path):
+    """Read a staging record.
+
+    Args:
+        record_path (str): Path to the record.
+
+    Returns:
+        dictionary: Record of each staged file keyed by file name.
+    """
+    try:
+        with open(record_path, 'r') as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(record, dict):
+        return {}
+    return record
+
+
+def _reflink_file(current, future):
+    """Clone a file on a filesystem with copy on write.
+
+    Args:
+        current (str): Path to the file.
+        future (str): Path to the clone.
+
+    Raises:
+        OSError: The file cannot be cloned.
+    """
+    if fcntl is None:
+        raise OSError('Files cannot be cloned on this platform.')
+    try:
+        with open(current, 'rb') as src, open(future, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(future):
+            os.remove(future)
+        raise
+    shutil.copystat(current, future)
+
+
+def _stage_file(current, future, entry, link):
+    """Stage a file in a PDL folder unless it is unchanged.
+
+    Args:
+        current (str): Path to the product file.
+        future (str): Path to the file in the PDL folder.
+        entry (dict): Record of the previous staging of the file or None.
+        link (bool): Link or clone the file when possible.
+
+    Returns:
+        tuple: Status ("linked", "copied" or "skipped") and the record of
+                the staged file.
+    """
+    source = os.stat(current)
+    try:
+        target = os.stat(future)
+    except FileNotFoundError:
+        target = None
+    digest = None
+    if target is not None:
+        if link and os.path.samestat(source, target):
+            return 'skipped', {'hash': None,
+                               'source': _get_stat_key(source),
+                               'target': _get_stat_key(target)}
+        if entry is not None and entry.get('hash') is not None and \
+                entry.get('target') == _get_stat_key(target):
+            if entry.get('source') != _get_stat_key(source):
+                digest = hash_file(current)
+            else:
+                digest = entry['hash']
+            if digest == entry['hash']:
+                return 'skipped', {'hash': digest,
+                                   'source': _get_stat_key(source),
+                                   'target': _get_stat_key(target)}
+    temp_path = future + TEMP_EXTENSION
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    status = 'copied'
+    if link:
+        try:
+            os.link(current, temp_path)
+            status = 'linked'
+        except OSError:
+            try:
+                _reflink_file(current, temp_path)
+            except OSError:
+                pass
+    if not os.path.exists(temp_path):
+        shutil.copy2(current, temp_path)
+    os.replace(temp_path, future)
+    if status == 'copied' and digest is None:
+        digest = hash_file(current)
+    return status, {'hash': digest if status == 'copied' else None,
+                    'source': _get_stat_key(source),
+                    'target': _get_stat_key(os.stat(future))}
@@ -0,0 +1,72 @@
+#!/usr/bin/env
+
+# stdlib imports
+import base64
+
+# third party imports
+import numpy as np
+
+# Waveform encodings and the scale used by default for each of them.
+# "delta": integers of the values divided by the scale, stored as the first
+# integer followed by the differences of consecutive integers.
+# "float32": base64 of the little endian float32 values divided by the
+# scale.
+DEFAULT_SCALES = {'delta': 1e-6, 'float32': 1.0}
+
+
+def decode_array(encoded):
+    """Decode an array written by encode_array.
+
+    Args:
+        encoded (dict): Encoded array.
+
+    Returns:
+        nd.array: Float64 array of the values.
+    """
+    encoding = encoded['encoding']
+    if encoding == 'delta':
+        values = np.cumsum(np.array(encoded['values'], dtype=np.int64))
+    elif encoding == 'float32':
+        values = np.frombuffer(base64.b64decode(encoded['values']),
+                               dtype='<f4')
+    else:
+        raise Exception('Unknown waveform encoding %r.' % encoding)
+    return values.astype('f8') * encoded['scale']
+
+
+def encode_array(values, encoding, scale=None):
+    """Encode an array of waveform values compactly.
+
+    Args:
+        values (array like): Values of the array.
+        encoding (str): Encoding, one of DEFAULT_SCALES.
+        scale (float): Value of one unit of the encoded numbers. Default is
+                None, which uses the default scale of the encoding. The
+                delta encoding rounds the values to a multiple of the
+                scale.
+
+    Returns:
+        dictionary: Encoded array with the "encoding", "scale", "count" and
+                "values" keys.
+    """
+    if encoding not in DEFAULT_SCALES:
+        raise Exception('Unknown waveform encoding %r. Use one of %r.' %
+                        (encoding, sorted(DEFAULT_SCALES)))
+    if scale is None:
+        scale = DEFAULT_SCALES[encoding]
+    values = np.asarray(values, dtype='f8') / scale
+    if encoding == 'delta':
+        integers = np.rint(values).astype(np.int64)
+        deltas = np.empty_like(integers)
+        deltas[:1] = integers[:1]
+        deltas[1:] = np.diff(integers)
+        encoded_values = deltas.tolist()
+    else:
+        encoded_values = base64.b64encode(
+            values.astype('<f4').tobytes()).decode('ascii')
+    return {
+        'encoding': encoding,
+        'scale': scale,
+        'count': int(values.size),
+        'values': encoded_values,
+    }
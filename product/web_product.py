@@ -4,12 +4,11 @@
 from collections import OrderedDict
 import copy
 import datetime
-import glob
+import fnmatch
 import json
 import os
-import shutil
-from urllib.request import urlopen
 import warnings
+import zipfile
 
 # third party imports
 from lxml import etree
@@ -17,7 +16,37 @@ import numpy as np
 
 # local imports
 from fault.fault import Fault
+from fault.io.stations import get_station_coordinates, read_readlp
+from fault.io.timeseries import ARRAY_FIELDS, FILE_PATTERNS
+from product import json_writer
 from product.constants import TIMEFMT, DEFAULT_MODEL
+from product.directory_index import ProductDirectoryIndex
+from product.location import get_resolver
+from product.manifest import ProductManifest
+from product.staging import replacement_path
+from product.waveform_encoding import encode_array
+
+# Files zipped into each archive when the archive is not provided
+ARCHIVES = OrderedDict(
+    [
+        (
+            "fits",
+            [
+                "*waves*.png",
+                "*wave_*.png",
+                "*_descending_fit.png",
+                "*_ascending_fit.png",
+            ],
+        ),
+        ("resampled_interferograms", ["*ascending.txt", "*descending.txt"]),
+    ]
+)
+# Files that are already compressed and are stored in archives as they are
+STORED_PATTERNS = ["*.png", "*.zip", "*.kmz", "*.gz"]
+# Files read for the properties that are derived from the fault model
+FAULT_INPUTS = ["*.fsp", "Readlp.das", "synm.str_low", "wave_properties.json"]
+# Properties set from the command line options instead of the input files
+OPTION_PROPERTIES = ["comment", "crustal-model", "model-number", "version"]
 
 
 class WebProduct(object):
@@ -25,13 +54,16 @@ class WebProduct(object):
 
     def __init__(self):
         self._contents = None
+        self._directory_index = None
         self._event = None
         self._grid = None
         self._paths = None
         self._properties = None
         self._segments = None
+        self._slip_grid = None
         self._timeseries_dict = None
         self._timeseries_geojson = None
+        self._timeseries_store = None
 
     @property
     def contents(self):
@@ -52,6 +84,7 @@ class WebProduct(object):
         """
         if self.paths is None:
             self._paths = {}
+        self._getDirectoryIndex(directory, refresh=True)
         contents = etree.Element("contents")
 
         # Look for  and add basemaps
@@ -92,16 +125,7 @@ class WebProduct(object):
         fits = self._checkDownload(directory, "fits.zip")
         zipped = ""
         if len(fits) == 0:
-            zipped = self.zip_files(
-                directory,
-                [
-                    "*waves*.png",
-                    "*wave_*.png",
-                    "*_descending_fit.png",
-                    "*_ascending_fit.png",
-                ],
-                "fits",
-            )
+            zipped = self.zip_files(directory, ARCHIVES["fits"], "fits")
         if len(fits) > 0 or zipped != "":
             self._paths["fits"] = (os.path.join(directory, "fits.zip"), "fits.zip")
             file_attrib, format_attrib = self._getAttributes(
@@ -266,7 +290,7 @@ class WebProduct(object):
         if len(insar_files) == 0:
             zipped = self.zip_files(
                 directory,
-                ["*ascending.txt", "*descending.txt"],
+                ARCHIVES["resampled_interferograms"],
                 "resampled_interferograms",
             )
         if len(insar_files) > 0 or zipped != "":
@@ -291,23 +315,53 @@ class WebProduct(object):
         self._contents = tree
         return tree
 
-    def createTimeseriesGeoJSON(self):
+    def createTimeseriesGeoJSON(self, stations=None, encoding=None, scale=None):
         """
         Create the timerseries geojson file.
+
+        Args:
+            stations (dict): (Longitude, latitude) of each station, as
+                    returned by getStationCoordinates. Stations without
+                    coordinates have empty coordinates. Default is None.
+            encoding (str): Encoding of the waveform arrays, "delta" or
+                    "float32" (see product.waveform_encoding.encode_array).
+                    Default is None, which writes the arrays as lists.
+            scale (float): Scale of the encoded arrays. Default is None,
+                    which uses the default scale of the encoding.
         """
+        if self.timeseries_store is not None:
+            # arrays are only used when they are encoded, so the geojson
+            # holds plain lists that any JSON encoder can serialize
+            timeseries = self.timeseries_store.toDict(as_arrays=encoding is not None)
+        else:
+            timeseries = self.timeseries_dict
+        if stations is None:
+            stations = {}
         station_points = []
-        for key in self.timeseries_dict:
+        for key in timeseries:
             props = {}
             props["station"] = key
-            station = self.timeseries_dict[key]
-            props["data"] = station["data"]
-            props["metadata"] = station["data"]
+            station = timeseries[key]
+            if encoding is None:
+                props["data"] = station["data"]
+            else:
+                props["data"] = []
+                for waveform in station["data"]:
+                    waveform = OrderedDict(waveform)
+                    for field in ARRAY_FIELDS:
+                        if field in waveform:
+                            waveform[field] = encode_array(
+                                waveform[field], encoding, scale
+                            )
+                    props["data"] += [waveform]
+            props["metadata"] = station["metadata"]
+            coordinates = list(stations.get(key, []))
 
             station_points += [
                 {
                     "type": "Feature",
                     "properties": props,
-                    "geometry": {"type": "Point", "coordinates": []},
+                    "geometry": {"type": "Point", "coordinates": coordinates},
                 }
             ]
         geo = {"type": "FeatureCollection", "features": station_points}
@@ -337,9 +391,14 @@ class WebProduct(object):
         """
         Helper to return grid dictionary.
 
+        The dictionary is only created from the slip grid when it is first
+        requested.
+
         Returns:
             dictionary: Grid information.
         """
+        if self._grid is None and self._slip_grid is not None:
+            self._grid = self._slip_grid.toGeoJSON()
         return self._grid
 
     @grid.setter
@@ -350,6 +409,7 @@ class WebProduct(object):
         grid (dictionary): Grid information.
         """
         self._grid = grid
+        self._slip_grid = None
 
     @classmethod
     def fromDirectory(
@@ -362,6 +422,10 @@ class WebProduct(object):
         comment=None,
         version=1,
         suppress_model=False,
+        max_workers=None,
+        incremental=False,
+        columnar_grid=False,
+        timeseries_encoding=None,
     ):
         """
         Create instance based upon a directory and eventid.
@@ -371,6 +435,21 @@ class WebProduct(object):
             eventid (string): Eventid used for file naming. Default is empty
                     string.
             version (int): Product version number. Default is 1.
+            max_workers (int): Number of workers used to process the fault
+                    segments. Default is None, which processes them serially.
+            incremental (bool): Only rebuild the outputs whose inputs changed
+                    since the last incremental build, as recorded in the
+                    manifest of the directory. When the fault model is
+                    unchanged, the event, segments, grid and time series
+                    are not read. Default is False.
+            columnar_grid (bool): Also write the grid in the columnar
+                    FFM_grid.npz file, which is sent with the product.
+                    Default is False.
+            timeseries_encoding (str): Locate the stations of the Readlp.das
+                    file and write timeseries.geojson compactly, with the
+                    waveform arrays in this encoding ("delta" or "float32",
+                    see product.waveform_encoding.encode_array). Default is
+                    None, which does not write the file.
 
         Returns:
             WebProduct: Instance set for information for the web product.
@@ -410,25 +489,120 @@ class WebProduct(object):
             product.writeAnalysis(analysis, directory, eventid)
         except:
             analysis = "Not available yet."
-        fsp_file = glob.glob(directory + "/" + "*.fsp")[0]
-        fault = Fault.fromFiles(fsp_file, directory)
-        product.event = fault.event
-        product.segments = fault.segments
-        fault.createGeoJSON()
-        fault.corners["metadata"]["eventid"] = eventid
-        product.grid = fault.corners
+        fsp_file = product._checkDownload(directory, "*.fsp")[0]
         product.solution = model_number
         product.crustal_model = crustal_model
-        product._properties["version"] = version
         product.comment = comment
         product.suppress_model = suppress_model
-        product._timeseries_dict = fault.timeseries_dict
-        calculated_sizes = fault.segment_sizes
-        product.writeGrid(directory)
-        product.storeProperties(directory, eventsource, eventid, calculated_sizes)
+        product._properties["version"] = version
+        if incremental:
+            manifest = ProductManifest.fromDirectory(directory)
+            options = {"eventid": eventid, "eventsource": eventsource}
+            inputs = list(FAULT_INPUTS)
+            if columnar_grid:
+                options["columnar_grid"] = True
+            if timeseries_encoding is not None:
+                options["timeseries_encoding"] = timeseries_encoding
+                inputs += list(FILE_PATTERNS.values())
+            fault_key = manifest.getFingerprint(
+                product._getInputFiles(directory, inputs), options
+            )
+            fault_current = manifest.isCurrent("fault", fault_key)
+            archive_keys = product._checkArchives(directory, manifest)
+        else:
+            fault_current = False
+        if fault_current:
+            # FFM.geojson is current, so only the options are applied to the
+            # properties that were derived from the fault model
+            product._properties.update(manifest.getData("fault")["properties"])
+            product._properties.update(product._getOptionProperties())
+            if product.paths is None:
+                product._paths = {}
+            product._paths["geojson"] = (
+                os.path.join(directory, "FFM.geojson"),
+                "FFM.geojson",
+            )
+            if columnar_grid:
+                product._paths["columnar_grid"] = (
+                    os.path.join(directory, "FFM_grid.npz"),
+                    "FFM_grid.npz",
+                )
+            if timeseries_encoding is not None:
+                product._paths["timeseries"] = (
+                    os.path.join(directory, "timeseries.geojson"),
+                    "timeseries.geojson",
+                )
+        else:
+            # The location is requested while the fault model is processed
+            location = get_resolver().getLocationAsync(eventsource + eventid)
+            fault = Fault.fromFiles(fsp_file, directory, max_workers=max_workers)
+            product.event = fault.event
+            product.segments = fault.segments
+            # FFM.geojson is written straight from the slip grid, so the
+            # GeoJSON dictionary is not created
+            fault.createGrid(max_workers=max_workers)
+            fault.grid.metadata["eventid"] = eventid
+            product._slip_grid = fault.grid
+            product.timeseries_store = fault.timeseries_store
+            calculated_sizes = fault.segment_sizes
+            product.writeGrid(directory)
+            if columnar_grid:
+                product.writeColumnarGrid(directory)
+            if timeseries_encoding is not None:
+                product.createTimeseriesGeoJSON(
+                    product.getStationCoordinates(directory),
+                    encoding=timeseries_encoding,
+                )
+                product.writeTimeseries(directory, compact=True)
+            product.storeProperties(
+                directory,
+                eventsource,
+                eventid,
+                calculated_sizes,
+                location=location.result(),
+                resolve_location=False,
+            )
         product.writeContents(directory)
+        if incremental:
+            if not fault_current:
+                properties = dict(
+                    (key, value)
+                    for key, value in product.properties.items()
+                    if key not in OPTION_PROPERTIES
+                )
+                outputs = [product.paths["geojson"][0]]
+                if columnar_grid:
+                    outputs += [product.paths["columnar_grid"][0]]
+                if timeseries_encoding is not None:
+                    outputs += [product.paths["timeseries"][0]]
+                manifest.setStage(
+                    "fault", fault_key, outputs, {"properties": properties}
+                )
+            for name, key in archive_keys.items():
+                archive = os.path.join(directory, name + ".zip")
+                if os.path.exists(archive):
+                    manifest.setStage(name, key, [archive])
+            manifest.save()
         return product
 
+    def getStationCoordinates(self, directory):
+        """
+        Locate the stations of the Readlp.das file of a directory.
+
+        Args:
+            directory (str): Path to the directory of FFM data.
+
+        Returns:
+            OrderedDict: (Longitude, latitude) of each station, located from
+                    its distance and azimuth to the epicenter, or an empty
+                    dictionary if the directory has no Readlp.das file.
+        """
+        wave_files = self._checkDownload(directory, "Readlp.das")
+        if len(wave_files) == 0:
+            return OrderedDict()
+        stations = read_readlp(wave_files[0])
+        return get_station_coordinates(stations, self.event["lon"], self.event["lat"])
+
     @property
     def paths(self):
         """
@@ -468,8 +642,24 @@ class WebProduct(object):
         """
         self._segments = segments
 
+    @property
+    def slip_grid(self):
+        """
+        Helper to return the columnar slip grid.
+
+        Returns:
+            SlipGrid: Columnar grid of the subfault polygons.
+        """
+        return self._slip_grid
+
     def storeProperties(
-        self, directory, eventsource, eventsourcecode, calculated_sizes=None
+        self,
+        directory,
+        eventsource,
+        eventsourcecode,
+        calculated_sizes=None,
+        location=None,
+        resolve_location=True,
     ):
         """
         Store PDL properties and creates properties.json.
@@ -479,6 +669,14 @@ class WebProduct(object):
             eventsource (string): Eventid source used for file naming.
             eventsourcecode (string): Eventid code used for file naming.
             calculated_sizes (dict): Dictionary of calculated sizes.
+            location (str): Place description of the event. Default is
+                    None, which requests it with the default location
+                    resolver if resolve_location is True and falls back to
+                    the coordinates of the hypocenter.
+            resolve_location (bool): Request a missing location with the
+                    default location resolver. Default is True. Set it to
+                    False when the location was already requested, so a
+                    failed request is not repeated.
         """
         props = {}
         props["eventsourcecode"] = eventsourcecode
@@ -496,17 +694,11 @@ class WebProduct(object):
                 props["number-longwaves"] = 0
         elif not os.path.exists(os.path.join(directory, "wave_properties.json")):
             props["number-longwaves"] = 0
-        URL_TEMPLATE = (
-            "https://earthquake.usgs.gov/earthquakes/feed/v1.0/detail/[EVENTID].geojson"
-        )
-        url = URL_TEMPLATE.replace("[EVENTID]", eventsource + eventsourcecode)
-        try:
-            fh = urlopen(url)
-            data = fh.read()
-            fh.close()
-            jdict = json.loads(data.decode())
-            locstr = jdict["properties"]["place"]
-        except:
+        if location is None and resolve_location:
+            location = get_resolver().getLocation(eventsource + eventsourcecode)
+        if location is not None:
+            locstr = location
+        else:
             locstr = "%.4f, %.4f" % (self.event["lat"], self.event["lon"])
         props["latitude"] = self.event["lat"]
         props["longitude"] = self.event["lon"]
@@ -548,11 +740,7 @@ class WebProduct(object):
             max_vals["rise"] += [rises[np.argmax(rises)]]
         props["maximum-slip"] = max_vals["slip"][np.argmax(max_vals["slip"])]
         props["maximum-rise"] = max_vals["rise"][np.argmax(max_vals["rise"])]
-        props["crustal-model"] = self.crustal_model
-        if not self.suppress_model:
-            props["model-number"] = self.solution
-        if self.comment is not None:
-            props["comment"] = self.comment
+        props.update(self._getOptionProperties())
         if self.properties is None:
             self._properties = props
         else:
@@ -565,9 +753,14 @@ class WebProduct(object):
         """
         Helper to return time series dictionary.
 
+        The dictionary is created from the time series store the first
+        time it is requested.
+
         Returns:
             dictionary: Dictionary of time series for each station.
         """
+        if self._timeseries_dict is None and self.timeseries_store is not None:
+            self._timeseries_dict = self.timeseries_store.toDict()
         return self._timeseries_dict
 
     @property
@@ -590,6 +783,28 @@ class WebProduct(object):
                 each station.
         """
         self._timeseries_dict = timeseries_dict
+        self._timeseries_store = None
+
+    @property
+    def timeseries_store(self):
+        """
+        Helper to return the time series store.
+
+        Returns:
+            TimeseriesStore: Time series for each station.
+        """
+        return self._timeseries_store
+
+    @timeseries_store.setter
+    def timeseries_store(self, timeseries_store):
+        """
+        Helper to set the time series store.
+
+        Args:
+            timeseries_store (TimeseriesStore): Time series for each station.
+        """
+        self._timeseries_store = timeseries_store
+        self._timeseries_dict = None
 
     def writeAnalysis(self, analysis, directory, eventid):
         """
@@ -601,8 +816,9 @@ class WebProduct(object):
                     written.
         """
         outfile = os.path.join(directory, "analysis.html")
-        with open(outfile, "w") as analysis_file:
-            analysis_file.write(analysis)
+        with replacement_path(outfile) as temp_path:
+            with open(temp_path, "w") as analysis_file:
+                analysis_file.write(analysis)
         if self.paths is None:
             self._paths = {}
         self._paths["analysis"] = (outfile, "analysis.html")
@@ -617,7 +833,8 @@ class WebProduct(object):
         """
         tree = self.createContents(directory)
         outdir = os.path.join(directory, "contents.xml")
-        tree.write(outdir, pretty_print=True, encoding="utf8")
+        with replacement_path(outdir) as temp_path:
+            tree.write(temp_path, pretty_print=True, encoding="utf8")
         if self.paths is None:
             self._paths = {}
         self._paths["contents"] = (outdir, "contents.xml")
@@ -630,67 +847,175 @@ class WebProduct(object):
         # Write property json for review
         prop_file = os.path.join(directory, "properties.json")
         serialized_prop = self._serialize(self.properties)
-        with open(prop_file, "w") as f:
-            json.dump(serialized_prop, f, indent=4, sort_keys=True)
+        with replacement_path(prop_file) as temp_path:
+            with open(temp_path, "w") as f:
+                json.dump(serialized_prop, f, indent=4, sort_keys=True)
         self._paths["properties"] = (prop_file, "properties.json")
 
-    def writeGrid(self, directory):
+    def writeGrid(self, directory, compact=False, decimals=None):
         """
         Writes grid in a GeoJSON format.
 
         Args:
             directory (str): Directory where the file will be written.
+            compact (bool): Write the JSON without indentation. Default is
+                    False.
+            decimals (int): Number of decimals written for every float.
+                    Default is None, which writes the full float.
         """
-        if self.grid is None:
+        if self._grid is None and self.slip_grid is None:
             raise Exception("The FFM grid dictionary has not been set.")
+        indent = None if compact else 4
         write_path = os.path.join(directory, "FFM.geojson")
-        with open(write_path, "w") as outfile:
-            json.dump(self.grid, outfile, indent=4, sort_keys=True)
+        with replacement_path(write_path) as temp_path:
+            with open(temp_path, "w") as outfile:
+                if self.slip_grid is not None:
+                    json_writer.dump_grid(
+                        self.slip_grid, outfile, indent=indent, decimals=decimals
+                    )
+                else:
+                    json_writer.dump(
+                        self.grid, outfile, indent=indent, decimals=decimals
+                    )
         if self.paths is None:
             self._paths = {}
         self._paths["geojson"] = (write_path, "FFM.geojson")
 
-    def writeTimeseries(self, directory):
+    def writeColumnarGrid(self, directory, compressed=False):
         """
-        Writes time series in a JSON format.
+        Writes grid in the columnar NumPy .npz format.
+
+        The file holds flat coordinate, ring offset and property arrays, which
+        can be read with fault.grid.SlipGrid.fromFile.
 
         Args:
             directory (str): Directory where the file will be written.
+            compressed (bool): Compress the arrays. Default is False.
+        """
+        if self.slip_grid is None:
+            raise Exception("The FFM slip grid has not been set.")
+        write_path = os.path.join(directory, "FFM_grid.npz")
+        with replacement_path(write_path) as temp_path:
+            self.slip_grid.save(temp_path, compressed=compressed)
+        if self.paths is None:
+            self._paths = {}
+        self._paths["columnar_grid"] = (write_path, "FFM_grid.npz")
+
+    def writeTimeseries(self, directory, compact=False, decimals=None):
+        """
+        Writes the time series geojson.
+
+        Args:
+            directory (str): Directory where the file will be written.
+            compact (bool): Write the JSON without indentation. Default is
+                    False.
+            decimals (int): Number of decimals written for every float.
+                    Default is None, which writes the full float.
         """
         if self.timeseries_geojson is None:
             raise Exception("The time series geojson has not been set.")
+        indent = None if compact else 4
         write_path = os.path.join(directory, "timeseries.geojson")
-        with open(write_path, "w") as outfile:
-            json.dump(self.timeseries_dict, outfile, indent=4, sort_keys=True)
+        with replacement_path(write_path) as temp_path:
+            with open(temp_path, "w") as outfile:
+                json_writer.dump(
+                    self.timeseries_geojson, outfile, indent=indent, decimals=decimals
+                )
+        if self.paths is None:
+            self._paths = {}
+        self._paths["timeseries"] = (write_path, "timeseries.geojson")
 
-    def zip_files(self, directory, match, filename):
+    def zip_files(
+        self,
+        directory,
+        match,
+        filename,
+        compresslevel=None,
+        stored=STORED_PATTERNS,
+    ):
         """
         Zips up wave plot or insar files.
 
+        The matched files are streamed into the archive in chunks, one at a
+        time, so they are never held in memory whole. Files matching one of
+        the stored patterns, which are already compressed, are stored
+        without compression.
+
         Args:
             directory (str): Directory where the file will be written.
+            match (list): Patterns of the files to zip.
+            filename (str): Name of the archive without the extension.
+            compresslevel (int): Deflate compression level from 0 to 9.
+                    Default is None, which uses the zlib default. Other
+                    levels require Python 3.7 or newer.
+            stored (list): Patterns of the file names stored without
+                    compression. Default is STORED_PATTERNS.
 
         Returns:
             string: path to directory if wave plots are found or '' if they
                     are not.
         """
+        index = self._getDirectoryIndex(directory)
         files = []
+        names = set()
         for m in match:
-            files += glob.glob(os.path.join(directory, m))
-        if len(files) > 0:
-            path = os.path.join(directory, filename)
-            if not os.path.exists(path):
-                os.makedirs(path)
-            for plot_path in files:
-                base_file = os.path.basename(plot_path)
-                new_file = os.path.join(path, base_file)
-                shutil.copy(plot_path, new_file)
-            shutil.make_archive(path, "zip", path)
-            shutil.rmtree(path)
-            print(path + ".zip")
-            return path + ".zip"
-        else:
+            for path in index.getFiles(m):
+                base_file = os.path.basename(path)
+                if base_file not in names:
+                    names.add(base_file)
+                    files += [path]
+        if len(files) == 0:
             return ""
+        path = os.path.join(directory, filename)
+        kwargs = {}
+        if compresslevel is not None:
+            kwargs["compresslevel"] = compresslevel
+        with replacement_path(path + ".zip") as temp_path:
+            with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+                for plot_path in files:
+                    arcname = os.path.basename(plot_path)
+                    if any(fnmatch.fnmatch(arcname, p) for p in stored):
+                        archive.write(
+                            plot_path, arcname, compress_type=zipfile.ZIP_STORED
+                        )
+                    else:
+                        archive.write(
+                            plot_path,
+                            arcname,
+                            compress_type=zipfile.ZIP_DEFLATED,
+                            **kwargs
+                        )
+        index.addFile(filename + ".zip")
+        print(path + ".zip")
+        return path + ".zip"
+
+    def _checkArchives(self, directory, manifest):
+        """
+        Helper to remove archives that were zipped from changed files.
+
+        Archives that were not created by an incremental build are treated
+        as provided and are never removed.
+
+        Args:
+            directory (str): Path to directory.
+            manifest (ProductManifest): Manifest of the directory.
+
+        Returns:
+            dictionary: Key of the zipped files of each archive that is
+                    created by the build, keyed by archive name.
+        """
+        keys = OrderedDict()
+        for name, patterns in ARCHIVES.items():
+            archive = os.path.join(directory, name + ".zip")
+            if os.path.exists(archive) and not manifest.hasStage(name):
+                continue
+            key = manifest.getFingerprint(self._getInputFiles(directory, patterns))
+            if not manifest.isCurrent(name, key):
+                manifest.removeStage(name)
+                if os.path.exists(archive):
+                    os.remove(archive)
+            keys[name] = key
+        return keys
 
     def _checkDownload(self, directory, pattern):
         """
@@ -700,13 +1025,8 @@ class WebProduct(object):
             directory (str): Path to directory.
             pattern (string): File patterns to check.
         """
-        files = []
         # attempt to find file or use default
-        file_paths = glob.glob(os.path.join(directory, pattern))
-        if len(file_paths) > 0:
-            file_path = file_paths[0]
-            files += [file_path]
-        return files
+        return self._getDirectoryIndex(directory).getFiles(pattern)[:1]
 
     def _countWaveforms(self, filename):
         """
@@ -755,11 +1075,8 @@ class WebProduct(object):
                 "Wave File": "Readlp.das",
                 "Shakemap Polygon": "shakemap_polygon.txt",
             }
-        unavailable = []
-        for file_type in required:
-            path = os.path.join(directory, required[file_type])
-            if len(glob.glob(path)) < 1:
-                unavailable += [(file_type, required[file_type])]
+        index = self._getDirectoryIndex(directory, refresh=True)
+        unavailable = index.getMissing(required)
         if len(unavailable) > 0:
             return (True, unavailable)
         else:
@@ -779,6 +1096,61 @@ class WebProduct(object):
         format_attrib = {"href": href, "type": type}
         return file_attrib, format_attrib
 
+    def _getDirectoryIndex(self, directory, refresh=False):
+        """
+        Helper to return the index of the files in a directory.
+
+        The directory is only listed again when it is a different directory
+        or a refresh is requested.
+
+        Args:
+            directory (str): Path to directory.
+            refresh (bool): List the directory again. Default is False.
+
+        Returns:
+            ProductDirectoryIndex: Index of the directory.
+        """
+        index = self._directory_index
+        if index is None or index.directory != directory:
+            self._directory_index = ProductDirectoryIndex.fromDirectory(directory)
+        elif refresh:
+            index.refresh()
+        return self._directory_index
+
+    def _getInputFiles(self, directory, patterns):
+        """
+        Helper to find the files matching any of the patterns.
+
+        Args:
+            directory (str): Path to directory.
+            patterns (list): File patterns to match.
+
+        Returns:
+            list: Paths to the files.
+        """
+        index = self._getDirectoryIndex(directory)
+        files = []
+        for pattern in patterns:
+            for path in index.getFiles(pattern):
+                if path not in files:
+                    files += [path]
+        return files
+
+    def _getOptionProperties(self):
+        """
+        Helper to create the properties that are set from the options.
+
+        Returns:
+            dictionary: Crustal model, model number and comment properties.
+        """
+        props = {}
+        props["crustal-model"] = self.crustal_model
+        if not self.suppress_model:
+            props["model-number"] = self.solution
+        if self.comment is not None:
+            props["comment"] = self.comment
+        return props
+
     def _serialize(self, properties):
         """
         Helper function for making dictionary json serializable.
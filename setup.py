@@ -16,5 +16,7 @@ setup(name='finite-fault-product',
       },
       scripts=['bin/deleteproduct',
                'bin/getproduct',
+               'bin/pdlservice',
+               'bin/sendbatch',
                'bin/sendproduct']
       )
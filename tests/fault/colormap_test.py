@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import json
+import os
+
+# third party imports
+from impactutils.colors.cpalette import ColorPalette
+import numpy as np
+
+# local imports
+from fault.colormap import SlipColormap
+from fault.fault import Fault
+
+
+def test_colormap():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    cptfile = os.path.join(homedir, '..', '..', 'fault', 'fault2.cpt')
+    palette = ColorPalette.fromFile(cptfile)
+    np.random.seed(0)
+    values = np.concatenate([np.random.uniform(-1, 9, 1000),
+                             np.linspace(0, 8, 257), [np.nan]])
+    for vmax in [3.0, 8.0]:
+        palette.vmax = vmax
+        colormap = SlipColormap.fromFile(cptfile, vmax=vmax)
+        target = [palette.getDataColor(value, color_format='hex')
+                  for value in values]
+        np.testing.assert_array_equal(colormap.getHexColors(values), target)
+    # Instances share the lookup table but not the data range
+    other = SlipColormap.fromFile(cptfile)
+    assert other.vmax != colormap.vmax
+    assert other.getHexColors([0.5, 1.5]).shape == (2,)
+
+
+def test_product_colors():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    directory = os.path.join(homedir, '..', 'data', 'products', '000714t')
+    with open(os.path.join(directory, 'FFM.geojson'), 'r') as f:
+        target = [feature['properties']['fill']
+                  for feature in json.load(f)['features']]
+    fault = Fault.fromFiles(os.path.join(directory, 'p000714t.fsp'),
+                            directory)
+    fault.createGeoJSON()
+    fills = [feature['properties']['fill']
+             for feature in fault.corners['features']]
+    assert fills == target
+
+
+if __name__ == '__main__':
+    test_colormap()
+    test_product_colors()
@@ -69,7 +69,17 @@ def test_fromFiles():
     fault = Fault.fromTimeseries(ts_directory)
 
 
+def test_workers():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    fspfile = os.path.join(homedir, '..', 'data', 'fsp',
+            'usp000714t_us_4_p000714t.fsp')
+    fault = Fault.fromFsp(fspfile)
+    parallel_fault = Fault.fromFsp(fspfile, max_workers=2)
+    assert parallel_fault.getNumSegments() == 2
+    assert parallel_fault.segment_sizes == fault.segment_sizes
+    assert parallel_fault.createGeoJSON(max_workers=2) == fault.createGeoJSON()
 
 
 if __name__ == '__main__':
     test_fromFiles()
+    test_workers()
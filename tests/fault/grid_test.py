@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+# stdlib imports
+from collections import OrderedDict
+import os
+import shutil
+import tempfile
+
+# third party imports
+import numpy as np
+
+# local imports
+from fault.grid import SlipGrid
+
+
+def _get_grid(offset=0.0):
+    coordinates = np.array([[0., 0., 0.], [1., 0., 0.], [1., 1., 1000.],
+                            [0., 1., 1000.], [0., 0., 0.]]) + offset
+    properties = OrderedDict()
+    properties['slip'] = np.array([1.5 + offset])
+    properties['fill'] = np.array(['#ffffff'])
+    return SlipGrid(coordinates, [0, 5], properties)
+
+
+def test_grid():
+    grid = SlipGrid.concatenate([_get_grid(), _get_grid(2.)],
+                                {'epicenter': {'depth': 10.0}})
+    assert grid.num_polygons == 2
+    np.testing.assert_array_equal(grid.ring_offsets, [0, 5, 10])
+    geojson = grid.toGeoJSON()
+    assert geojson['metadata'] == {'epicenter': {'depth': 10.0}}
+    assert len(geojson['features']) == 2
+    feature = geojson['features'][1]
+    assert feature['properties'] == {'slip': 3.5, 'fill': '#ffffff'}
+    assert feature['geometry']['coordinates'][0][0] == [2., 2., 2.]
+    assert len(feature['geometry']['coordinates'][0]) == 5
+
+    tempdir = tempfile.mkdtemp()
+    try:
+        for compressed in [False, True]:
+            filename = os.path.join(tempdir, 'grid.npz')
+            grid.save(filename, compressed=compressed)
+            loaded = SlipGrid.fromFile(filename)
+            assert loaded.toGeoJSON() == geojson
+    finally:
+        shutil.rmtree(tempdir)
+
+    try:
+        SlipGrid(np.zeros((4, 3)), [0, 5], {})
+        success = True
+    except ValueError:
+        success = False
+    assert success is False
+
+
+if __name__ == '__main__':
+    test_grid()
@@ -1,11 +1,18 @@
 #!/usr/bin/env python
 
 #stdlib imports
+import io
+import json
 import os
 import glob
+import shutil
+import tempfile
+
+# third party imports
+import numpy as np
 
 # local imports
-from fault.io.fsp import read_from_file
+from fault.io.fsp import FaultModel, FSPCache, read_from_file
 
 
 def test_fsp():
@@ -17,5 +24,132 @@ def test_fsp():
     for fspfile in fsp_locations:
         read_from_file(fspfile)
 
+
+def test_fsp_sources():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    fspfile = os.path.join(homedir, '..', '..', 'data', 'fsp',
+            'usp000714t_us_4_p000714t.fsp')
+    event, segments = read_from_file(fspfile)
+    assert len(segments) == 2
+    assert segments[0]['slip'].shape == (7, 15)
+    assert segments[1]['slip'].shape == (6, 15)
+    assert segments[1]['dip'] == 18.0
+    with open(fspfile, 'r') as f:
+        text = f.read()
+    with open(fspfile, 'r') as f:
+        file_result = read_from_file(f)
+    sources = [file_result, read_from_file(io.StringIO(text)),
+            read_from_file(io.BytesIO(text.encode())),
+            read_from_file(fspfile, memory_map=True)]
+    for source_event, source_segments in sources:
+        assert source_event == event
+        assert len(source_segments) == len(segments)
+        for source_segment, segment in zip(source_segments, segments):
+            assert source_segment.keys() == segment.keys()
+            for key in segment:
+                np.testing.assert_array_equal(source_segment[key],
+                        segment[key])
+
+
+def test_fsp_blank_lines():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    input_directory = os.path.join(homedir, '..', '..', 'data', 'fsp')
+    event, segments = read_from_file(os.path.join(input_directory,
+            'usp000714t_us_4_p000714t.fsp'))
+    # Blank lines inside the blocks and at the end of the file are skipped
+    blank_file = os.path.join(input_directory, 'usp000714t_blank_lines.fsp')
+    for blank_event, blank_segments in [read_from_file(blank_file),
+            read_from_file(blank_file, memory_map=True)]:
+        assert blank_event == event
+        assert len(blank_segments) == len(segments)
+        for blank_segment, segment in zip(blank_segments, segments):
+            for key in segment:
+                np.testing.assert_array_equal(blank_segment[key],
+                        segment[key])
+
+    # Values that are not numbers are not truncated
+    with open(blank_file, 'r') as f:
+        text = f.read()
+    with tempfile.TemporaryDirectory() as tempdir:
+        bad_file = os.path.join(tempdir, 'bad.fsp')
+        with open(bad_file, 'w') as f:
+            f.write(text.replace('9.34e+17', 'x', 1))
+        for memory_map in [False, True]:
+            try:
+                read_from_file(bad_file, memory_map=memory_map)
+                success = True
+            except ValueError:
+                success = False
+            assert success == False
+
+
+def test_fsp_cache():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    input_directory = os.path.join(homedir, '..', '..', 'data', 'fsp')
+    tempdir = tempfile.mkdtemp()
+    try:
+        fspfile = os.path.join(tempdir, 'p000714t.fsp')
+        shutil.copy(os.path.join(input_directory,
+                'usp000714t_us_4_p000714t.fsp'), fspfile)
+        cache = FSPCache(os.path.join(tempdir, 'cache'))
+        assert cache.load(fspfile) is None
+        event, segments = read_from_file(fspfile, cache=cache)
+        cached_event, cached_segments = cache.load(fspfile)
+        assert cached_event == event
+        assert len(cached_segments) == len(segments)
+        for cached_segment, segment in zip(cached_segments, segments):
+            assert cached_segment.keys() == segment.keys()
+            for key in segment:
+                np.testing.assert_array_equal(cached_segment[key],
+                        segment[key])
+
+        # Changed files are parsed again
+        with open(fspfile, 'a') as f:
+            f.write('%\n')
+        assert cache.load(fspfile) is None
+
+        # Least recently used entries are evicted
+        small_cache = FSPCache(os.path.join(tempdir, 'small'), max_size=1)
+        for file_path in glob.glob(input_directory + '/*.fsp'):
+            read_from_file(file_path, cache=small_cache)
+        entries = [name for name in os.listdir(small_cache.directory)
+                if name.endswith('.fspc')]
+        assert len(entries) == 0
+        # The index does not keep the paths of evicted entries
+        with open(os.path.join(small_cache.directory, 'index.json')) as f:
+            assert json.load(f) == {}
+        cache.clear()
+        assert os.listdir(cache.directory) == []
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_fault_model():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    fspfile = os.path.join(homedir, '..', '..', 'data', 'fsp',
+            'usp000714t_us_4_p000714t.fsp')
+    event, segments = read_from_file(fspfile)
+    model = FaultModel.fromFile(fspfile)
+    assert model.event == event
+    assert len(model) == 2
+    for lazy_segment, segment in zip(model, segments):
+        assert list(lazy_segment.keys()) == list(segment.keys())
+        assert lazy_segment['strike'] == segment['strike']
+        assert lazy_segment['dip'] == segment['dip']
+        assert not lazy_segment.loaded
+        np.testing.assert_array_equal(lazy_segment['slip'], segment['slip'])
+        # Only the accessed column is decoded
+        assert 'slip' in repr(lazy_segment)
+        assert 'lat' not in repr(lazy_segment)
+        assert not lazy_segment.loaded
+        for key in segment:
+            np.testing.assert_array_equal(lazy_segment[key], segment[key])
+        assert lazy_segment.loaded
+
+
 if __name__ == '__main__':
     test_fsp()
+    test_fsp_sources()
+    test_fsp_blank_lines()
+    test_fsp_cache()
+    test_fault_model()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import os
+
+# local imports
+from fault.io.stations import get_station_coordinates, read_readlp
+
+
+def test_stations():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    filename = os.path.join(homedir, '..', '..', 'data', 'timeseries',
+                            'Readlp.das')
+    stations = read_readlp(filename)
+    assert len(stations) == 52
+    assert list(stations)[:3] == ['KDAK', 'KBS', 'COLA']
+    assert stations['KDAK'] == {'distance': 38.40, 'azimuth': 2.11}
+
+    # Hawaii epicenter of the test data
+    coordinates = get_station_coordinates(stations, -155.03, 19.37)
+    assert list(coordinates) == list(stations)
+    # Kodiak is at 57.78N, 152.58W
+    lon, lat = coordinates['KDAK']
+    assert abs(lon - -152.58) < 0.1
+    assert abs(lat - 57.78) < 0.1
+    for lon, lat in coordinates.values():
+        assert -180 <= lon < 180
+        assert -90 <= lat <= 90
+    assert get_station_coordinates({}, 0, 0) == {}
+
+
+if __name__ == '__main__':
+    test_stations()
@@ -1,7 +1,10 @@
 #!/usr/bin/env python
 
 #stdlib imports
+from collections import OrderedDict
+import glob
 import os
+import tempfile
 
 # third party imports
 import pandas as pd
@@ -9,7 +12,8 @@ import numpy as np
 
 
 # local imports
-from fault.io.timeseries import read_from_directory
+from fault.io.timeseries import (FILE_PATTERNS, read_file,
+        read_from_directory, scan_directory, TimeseriesStore)
 
 
 def test_timeseries():
@@ -24,5 +28,104 @@ def test_timeseries():
     assert success == False
 
 
+
+def test_scan_directory():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    input_directory = os.path.join(homedir, '..', '..', 'data', 'timeseries')
+    paths = scan_directory(input_directory)
+    for key, pattern in FILE_PATTERNS.items():
+        assert paths[key] == glob.glob(os.path.join(input_directory, pattern))
+    serial = read_from_directory(input_directory)
+    parallel = read_from_directory(input_directory, max_workers=4)
+    assert list(parallel) == list(serial)
+    assert parallel == serial
+
+
+def test_read_file():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    input_directory = os.path.join(homedir, '..', '..', 'data', 'timeseries')
+    for path in glob.glob(os.path.join(input_directory, 'A*.dat')):
+        station, time, displacement = read_file(path)
+        target_time, target_displacement = np.genfromtxt(path,
+                usecols=(0,1), dtype=float, unpack=True)
+        assert station == os.path.basename(path).split('.')[0]
+        np.testing.assert_array_equal(time, target_time)
+        np.testing.assert_array_equal(displacement, target_displacement)
+    # Files that are not plain columns are left to genfromtxt
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, 'TEST.P.dat')
+        with open(path, 'w') as f:
+            f.write('# time displacement\n1 2\n3 nan\n5 6 7\n')
+        station, time, displacement = read_file(path)
+        np.testing.assert_array_equal(time, [1, 3, 5])
+        np.testing.assert_array_equal(displacement, [2, np.nan, 6])
+
+
+def get_station_dict(input_directory, station):
+    """Build the time series dictionary of a station from its files."""
+    data = []
+    for phase, suffix in [('S', 'S'), ('P', 'P'), ('Z', 'Z.swave'),
+                          ('T', 'T.swave')]:
+        path = os.path.join(input_directory, '%s.%s.dat' % (station, suffix))
+        syn_path = path.replace('.dat', '.syn')
+        time, displacement = np.genfromtxt(path, usecols=(0, 1),
+                unpack=True)
+        syn_time, syn_displacement = np.genfromtxt(syn_path,
+                usecols=(0, 1), unpack=True)
+        if phase in ['S', 'P']:
+            waveform_type = 'teleseismic broadband body wave'
+        else:
+            waveform_type = 'long period surface wave'
+        data += [OrderedDict([
+            ('id', station + '_' + phase),
+            ('component', phase),
+            ('waveform-type', waveform_type),
+            ('time', time.tolist()),
+            ('displacement', np.around(displacement, decimals=6).tolist()),
+            ('synthetic-time', syn_time.tolist()),
+            ('synthetic-displacement',
+                np.around(syn_displacement, decimals=6).tolist())])]
+    metadata = OrderedDict([
+        ('station', station),
+        ('time-units', 'seconds'),
+        ('displacement-units', 'micrometers'),
+        ('comments', 'Rounded to 6 decimal places.')])
+    return OrderedDict([('metadata', metadata), ('data', data)])
+
+
+def test_timeseries_store():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    input_directory = os.path.join(homedir, '..', '..', 'data', 'timeseries')
+    store = TimeseriesStore.fromDirectory(input_directory)
+    wave_dict = read_from_directory(input_directory)
+    target_stations = set(os.path.basename(path).split('.')[0]
+            for path in glob.glob(os.path.join(input_directory, '*.dat')))
+    assert set(wave_dict) == target_stations
+    assert store.stations == list(wave_dict)
+    assert wave_dict['ANMO'] == get_station_dict(input_directory, 'ANMO')
+    assert store.toDict()['ANMO'] == wave_dict['ANMO']
+    assert store.nbytes == store.buffer.nbytes
+    assert store.buffer.flags.writeable == False
+
+    station = 'ANMO'
+    assert store.getNumWaveforms(station) == len(wave_dict[station]['data'])
+    assert store.getMetadata(station) == wave_dict[station]['metadata']
+    waveform = store.getWaveform(station, 0, as_arrays=True)
+    assert waveform['id'] == 'ANMO_S'
+    data_file = os.path.join(input_directory, 'ANMO.S.dat')
+    syn_file = os.path.join(input_directory, 'ANMO.S.syn')
+    time, displacement = np.genfromtxt(data_file, unpack=True)
+    syn_time, syn_displacement = np.genfromtxt(syn_file, unpack=True)
+    np.testing.assert_array_equal(store.getArray(station, 0, 'time'), time)
+    np.testing.assert_array_equal(waveform['displacement'],
+            np.around(displacement, decimals=6))
+    np.testing.assert_array_equal(waveform['synthetic-time'], syn_time)
+    np.testing.assert_array_equal(waveform['synthetic-displacement'],
+            np.around(syn_displacement, decimals=6))
+
+
 if __name__ == '__main__':
     test_timeseries()
+    test_scan_directory()
+    test_read_file()
+    test_timeseries_store()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+# third party imports
+import numpy as np
+
+# local imports
+from fault.rupture import (autocorrelate, autocorrelate_profiles,
+                           find_rupture_window, find_rupture_windows,
+                           find_trapz_window, get_rupture_size,
+                           get_rupture_sizes, get_window_indices,
+                           summed_area_table, threshold_slip, trapz_windows)
+
+
+def _loop_window(slip, length, width, dx, dz, fault_length, fault_width):
+    # Sliding window search that the rupture module replaces
+    max_window = (-1, -1, -1, -1)
+    max_area = -1
+    left_location = 0
+    right_location = left_location + length
+    while right_location < fault_length:
+        left_idx = int(np.floor(left_location / dx))
+        right_idx = int(np.floor(right_location / dx))
+        left_location += dx
+        right_location += dx
+        top_location = 0
+        bottom_location = top_location + width
+        while bottom_location < fault_width:
+            top_idx = int(np.floor(top_location / dz))
+            bottom_idx = int(np.floor(bottom_location / dz))
+            top_location += dz
+            bottom_location += dz
+            area = np.sum(slip[top_idx:bottom_idx, left_idx:right_idx])
+            if area > max_area:
+                max_window = (left_idx, right_idx, top_idx, bottom_idx)
+                max_area = area
+    return max_window
+
+
+def _loop_trapz_window(profile, window, dd, length):
+    # Sliding trapz search that the rupture module replaces
+    max_window = (-1, -1)
+    max_area = -1
+    first_location = 0
+    last_location = first_location + window
+    while last_location < length:
+        first_idx = int(np.floor(first_location / dd))
+        last_idx = int(np.floor(last_location / dd))
+        first_location += dd
+        last_location += dd
+        area = np.trapz(profile[first_idx:last_idx], dx=dd)
+        if area > max_area:
+            max_window = (first_idx, last_idx)
+            max_area = area
+    return max_window
+
+
+def test_autocorrelate():
+    np.random.seed(2)
+    profiles = [np.random.rand(num) for num in [1, 2, 7, 127, 128, 300]]
+    results = autocorrelate_profiles(profiles)
+    for profile, result in zip(profiles, results):
+        target = np.correlate(profile, profile, mode='full')
+        target = target[len(profile) // 2:]
+        assert result.shape == target.shape
+        if len(profile) < 128:
+            np.testing.assert_array_equal(result, target)
+        else:
+            np.testing.assert_allclose(result, target, rtol=0,
+                                       atol=1e-12 * target.max())
+    np.testing.assert_array_equal(autocorrelate(profiles[2]), results[2])
+
+
+def test_rupture_sizes():
+    np.random.seed(3)
+    slips = [np.random.rand(5, 9) * 6, np.random.rand(8, 3) * 2,
+             np.random.rand(4, 200) * 10]
+    sizes = get_rupture_sizes(slips, 2.5, 1.5)
+    for slip, size in zip(slips, sizes):
+        thresholded_slip = threshold_slip(slip)
+        rows = autocorrelate(thresholded_slip.sum(axis=0))
+        columns = autocorrelate(thresholded_slip.sum(axis=1))
+        assert size == get_rupture_size(rows, columns, 2.5, 1.5)
+    thresholded_slip = threshold_slip(np.array([[0.4, 0.6], [2.9, 0.1]]))
+    np.testing.assert_array_equal(thresholded_slip, [[0, 0.6], [2.9, 0]])
+
+
+def test_summed_area_table():
+    values = np.arange(12.).reshape(3, 4)
+    table = summed_area_table(values)
+    assert table.shape == (4, 5)
+    assert table[3, 4] == values.sum()
+    assert table[2, 3] == values[:2, :3].sum()
+
+
+def test_rupture_window():
+    np.random.seed(0)
+    for trial in range(300):
+        nz, nx = np.random.randint(1, 15, 2)
+        dx = np.random.choice([0.3, 1.0, 2.5, 15.0])
+        dz = np.random.choice([0.7, 1.0, 10.0])
+        slip = np.random.rand(nz, nx) * 5
+        if trial % 2:
+            # Many equal windows, so the tie breaking matters
+            slip = np.round(slip)
+        fault_length = nx * dx * np.random.uniform(0.5, 1.2)
+        fault_width = nz * dz * np.random.uniform(0.5, 1.2)
+        sizes = [(fault_length * np.random.rand(),
+                  fault_width * np.random.rand()) for i in range(3)]
+        windows = find_rupture_windows(slip, sizes, dx, dz, fault_length,
+                                       fault_width)
+        for size, window in zip(sizes, windows):
+            target = _loop_window(slip, size[0], size[1], dx, dz,
+                                  fault_length, fault_width)
+            assert window == target
+            assert find_rupture_window(slip, size[0], size[1], dx, dz,
+                                       fault_length, fault_width) == target
+    # No window fits
+    window = find_rupture_window(np.ones((2, 2)), 3, 1, 1, 1, 2, 2)
+    assert window == (-1, -1, -1, -1)
+
+
+def test_trapz_window():
+    np.random.seed(1)
+    for trial in range(300):
+        num = np.random.randint(0, 30)
+        dd = np.random.choice([0.3, 1.0, 2.5, 15.0])
+        profile = np.random.rand(num) * 5
+        if trial % 2:
+            profile = np.round(profile)
+        length = num * dd * np.random.uniform(0.5, 1.2)
+        window = length * np.random.rand()
+        target = _loop_trapz_window(profile, window, dd, length)
+        assert find_trapz_window(profile, window, dd, length) == target
+        firsts, lasts = get_window_indices(window, dd, length)
+        areas = trapz_windows(profile, firsts, lasts, dd)
+        for first, last, area in zip(firsts, lasts, areas):
+            np.testing.assert_allclose(
+                area, np.trapz(profile[first:last], dx=dd), atol=1e-10)
+
+
+if __name__ == '__main__':
+    test_autocorrelate()
+    test_rupture_sizes()
+    test_summed_area_table()
+    test_rupture_window()
+    test_trapz_window()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import time
+
+# third party imports
+import pytest
+
+# local imports
+from product.batch import read_manifest, run_batch
+from product.constants import Settings
+from product.sender_service import SenderService
+
+MANIFEST = '''
+products:
+  - eventsource: us
+    source: us
+    eventid: 10004u1y
+    directory: 10004u1y_1
+    solution: 1
+    comment: Nodal plane 1.
+  - eventsource: pt
+    source: us
+    eventid: 000714t
+    directory: 000714t
+    solution: 1
+    version: 2
+    suppress_model: true
+'''
+
+
+def test_read_manifest():
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = os.path.join(tempdir, 'batch.yaml')
+        with open(filename, 'w') as f:
+            f.write(MANIFEST)
+        jobs = read_manifest(filename)
+        assert [job['eventid'] for job in jobs] == ['10004u1y', '000714t']
+        assert jobs[0]['directory'] == os.path.join(tempdir, '10004u1y_1')
+        assert jobs[0]['comment'] == 'Nodal plane 1.'
+        assert jobs[0]['version'] == 1
+        assert jobs[0]['reviewed'] is True
+        assert jobs[1]['suppress_model'] is True
+        assert jobs[1]['version'] == 2
+
+        # JSON is read as well
+        with open(filename, 'w') as f:
+            json.dump([{'eventsource': 'us', 'source': 'us',
+                        'eventid': '10004u1y', 'directory': 'a',
+                        'solution': 2}], f)
+        assert read_manifest(filename)[0]['solution'] == 2
+
+        invalid = [
+            [{'eventsource': 'us', 'source': 'us', 'eventid': 'a',
+              'solution': 1}],
+            [{'eventsource': 'us', 'source': 'us', 'eventid': 'a',
+              'directory': 'a', 'solution': 1, 'versoin': 2}],
+            [{'eventsource': 'us', 'source': 'us', 'eventid': 'a',
+              'directory': 'a', 'solution': 1},
+             {'eventsource': 'us', 'source': 'us', 'eventid': 'b',
+              'directory': 'a', 'solution': 1}],
+            {'products': None},
+        ]
+        for manifest in invalid:
+            with open(filename, 'w') as f:
+                json.dump(manifest, f)
+            with pytest.raises(Exception):
+                read_manifest(filename)
+
+
+def test_run_batch():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    products = os.path.join(homedir, '..', 'data', 'products')
+    with tempfile.TemporaryDirectory() as tempdir:
+        for name in ['10004u1y_1', '000714t']:
+            shutil.copytree(os.path.join(products, name),
+                            os.path.join(tempdir, name))
+        filename = os.path.join(tempdir, 'batch.yaml')
+        with open(filename, 'w') as f:
+            f.write(MANIFEST)
+        jobs = read_manifest(filename)
+        jobs[1]['directory'] = os.path.join(tempdir, 'missing')
+        outdir = os.path.join(tempdir, 'pdl')
+        for max_workers in [None, 2]:
+            summary = run_batch(jobs, max_workers=max_workers, dry_run=True,
+                                base_folder=outdir)
+            json.dumps(summary)
+            first, second = summary['products']
+            assert first['pdlfolder'] == os.path.join(outdir, '10004u1y_1')
+            assert first['properties']['comment'] == 'Nodal plane 1.'
+            assert os.path.exists(os.path.join(first['pdlfolder'],
+                                               'FFM.geojson'))
+            assert first['build_seconds'] > 0
+            assert first['send_seconds'] is not None
+            assert second['pdlfolder'] is None
+            assert second['send_seconds'] is None
+            assert 'Missing required files' in second['error']
+            assert second['status'] == 'failed'
+            assert summary['dry_run'] is True
+            # The test configuration has no PDL client, so the sends fail
+            assert first['status'] == 'failed'
+            assert 'FileNotFoundError' in first['error']
+            assert summary['failed'] == 2
+        # An empty batch does not start any workers
+        summary = run_batch([], max_workers=2, dry_run=True,
+                            base_folder=outdir)
+        assert summary['products'] == []
+        assert summary['failed'] == 0
+
+
+# Stand-in for a PDL worker of the sender service
+WORKER = """
+import json
+import sys
+
+for line in sys.stdin:
+    command = json.loads(line)['command']
+    code = [arg for arg in command if arg.startswith('--code=')][0]
+    reply = {'returncode': 0, 'output': 'via service ' + code}
+    sys.stdout.write(json.dumps(reply) + '\\n')
+    sys.stdout.flush()
+"""
+
+# Stand-in for the java executable used without the sender service
+JAVA = """#!/bin/sh
+echo "via java"
+"""
+
+
+def test_send_batch():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    products = os.path.join(homedir, '..', 'data', 'products')
+    with tempfile.TemporaryDirectory() as tempdir:
+        for name in ['10004u1y_1', '000714t']:
+            shutil.copytree(os.path.join(products, name),
+                            os.path.join(tempdir, name))
+        filename = os.path.join(tempdir, 'batch.yaml')
+        with open(filename, 'w') as f:
+            f.write(MANIFEST)
+        jobs = read_manifest(filename)
+        paths = {}
+        for name, contents in [('java', JAVA), ('worker.py', WORKER),
+                               ('ProductClient.jar', ''),
+                               ('config.ini', ''), ('key', '')]:
+            paths[name] = os.path.join(tempdir, name)
+            with open(paths[name], 'w') as f:
+                f.write(contents)
+        os.chmod(paths['java'], stat.S_IRWXU)
+        socket_path = os.path.join(tempdir, 'pdl.sock')
+        service = SenderService(socket_path,
+                                [sys.executable, paths['worker.py']])
+        thread = threading.Thread(target=service.serve_forever, daemon=True)
+        thread.start()
+        for i in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.05)
+        outdir = os.path.join(tempdir, 'pdl')
+        try:
+            for pdlservice in [socket_path, None]:
+                settings = Settings(outdir, paths['config.ini'],
+                                    paths['ProductClient.jar'], paths['key'],
+                                    pdlservice=pdlservice,
+                                    java=paths['java'])
+                for max_workers in [None, 2]:
+                    summary = run_batch(jobs, max_workers=max_workers,
+                                        max_sends=2, settings=settings)
+                    assert summary['failed'] == 0
+                    for job, result in zip(jobs, summary['products']):
+                        assert result['status'] == 'sent'
+                        assert result['files'] == len(
+                            os.listdir(result['pdlfolder']))
+                        # The products are sent by the service whether
+                        # they are built in this process or in a pool
+                        if pdlservice is not None:
+                            code = job['eventsource'] + job['eventid']
+                            if not job['suppress_model']:
+                                code += '_%i' % job['solution']
+                            assert result['message'] == \
+                                'via service --code=' + code
+                        else:
+                            assert 'via java' in str(result['message'])
+        finally:
+            service.shutdown()
+            thread.join(5)
+
+
+if __name__ == '__main__':
+    test_read_manifest()
+    test_run_batch()
+    test_send_batch()
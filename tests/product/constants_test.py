@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import os
+import tempfile
+
+# third party imports
+import pytest
+import yaml
+
+# local imports
+from product import constants
+from product.constants import Settings, get_settings, set_settings
+
+CONFIG = {
+    'outputfolder': '/data/pdl',
+    'pdl': {
+        'jarfile': '/data/ProductClient.jar',
+        'configfile': '/data/config.ini',
+        'privatekey': '/data/id_rsa',
+    },
+    'email': {
+        'smtp': 'smtp.example.com',
+        'sender': 'sender@example.com',
+        'default_alert_recipients': 'a@example.com,b@example.com',
+    },
+    'fspcache': '/data/fspcache',
+}
+
+
+def test_settings():
+    settings = Settings.fromDict(CONFIG)
+    assert settings.outputfolder == '/data/pdl'
+    assert settings.jarfile == '/data/ProductClient.jar'
+    assert settings.configfile == '/data/config.ini'
+    assert settings.privatekey == '/data/id_rsa'
+    assert settings.smtp_server == 'smtp.example.com'
+    assert settings.email_sender == 'sender@example.com'
+    assert settings.default_alert_recipients == ['a@example.com',
+                                                 'b@example.com']
+    assert settings.fspcache == '/data/fspcache'
+    assert settings.locationcache is None
+
+    config = dict(CONFIG)
+    del config['email']
+    settings = Settings.fromDict(config)
+    assert settings.smtp_server is None
+    assert settings.email_sender is None
+    assert settings.default_alert_recipients is None
+
+    del config['pdl']
+    with pytest.raises(Exception) as e:
+        Settings.fromDict(config)
+    assert 'configuration keys are required' in str(e.value)
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = os.path.join(tempdir, 'config.yaml')
+        with open(filename, 'w') as f:
+            yaml.dump(CONFIG, f)
+        settings = Settings.fromFile(filename)
+        assert settings.privatekey == '/data/id_rsa'
+
+
+def test_set_settings():
+    settings = Settings.fromDict(CONFIG)
+    set_settings(settings)
+    try:
+        assert get_settings() is settings
+        # The module constants are read from the settings
+        assert constants.BASE_PDL_FOLDER == '/data/pdl'
+        assert constants.CFG == '/data/config.ini'
+        assert constants.FSP_CACHE_FOLDER == '/data/fspcache'
+        settings.outputfolder = '/data/other'
+        assert constants.BASE_PDL_FOLDER == '/data/other'
+        with pytest.raises(AttributeError):
+            constants.MISSING
+    finally:
+        set_settings(None)
+
+
+if __name__ == '__main__':
+    test_settings()
+    test_set_settings()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import glob
+import os
+import tempfile
+
+# local imports
+from product.directory_index import ProductDirectoryIndex
+
+
+def test_getFiles():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    directory = os.path.join(homedir, '..', 'data', 'products', '10004u1y_1')
+    index = ProductDirectoryIndex.fromDirectory(directory)
+    patterns = ['*base*.png', '*.kml', '*mr*.png', '*.fsp', '*.html',
+                'shakemap_polygon.txt', 'fits.zip', '*[0-9].fsp', '*']
+    for pattern in patterns:
+        target = glob.glob(os.path.join(directory, pattern))
+        assert index.getFiles(pattern) == target
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        for name in ['.hidden.png', 'a.png', 'b.txt']:
+            with open(os.path.join(tempdir, name), 'w') as f:
+                f.write(name)
+        index = ProductDirectoryIndex.fromDirectory(tempdir)
+        for pattern in ['*.png', '.*', '.hidden.png', 'c.zip']:
+            target = glob.glob(os.path.join(tempdir, pattern))
+            assert index.getFiles(pattern) == target
+        with open(os.path.join(tempdir, 'c.zip'), 'w') as f:
+            f.write('c')
+        assert index.getFiles('*.zip') == []
+        index.addFile('c.zip')
+        assert index.getFiles('*.zip') == [os.path.join(tempdir, 'c.zip')]
+        os.remove(os.path.join(tempdir, 'a.png'))
+        index.refresh()
+        assert index.getFiles('*.png') == []
+        assert sorted(index.names) == ['.hidden.png', 'b.txt', 'c.zip']
+
+    index = ProductDirectoryIndex.fromDirectory(
+        os.path.join(homedir, 'missing'))
+    assert index.getFiles('*') == []
+    required = {'FSP File': '*.fsp', 'Wave File': 'Readlp.das'}
+    assert index.getMissing(required) == [('FSP File', '*.fsp'),
+                                          ('Wave File', 'Readlp.das')]
+
+
+if __name__ == '__main__':
+    test_getFiles()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+# stdlib imports
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# local imports
+from product.download import download_files, summarize_downloads
+
+FILES = {'FFM.geojson': b'{"type": "FeatureCollection"}' * 1000,
+         'basemap.png': os.urandom(50000),
+         'properties.json': b'{}'}
+DELAY = 0.2
+REQUESTS = []
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ContentHandler(BaseHTTPRequestHandler):
+    """Stand-in for the ComCat product archive."""
+
+    def do_GET(self):
+        time.sleep(DELAY)
+        name = os.path.basename(self.path)
+        REQUESTS.append((name, self.headers.get('Range'),
+                         self.headers.get('If-Range'),
+                         self.headers.get('If-None-Match')))
+        if name not in FILES:
+            self.send_error(404)
+            return
+        data = FILES[name]
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = 0
+        if self.headers.get('Range') is not None and \
+                self.headers.get('If-Range') in (None, etag):
+            start = int(self.headers['Range'][6:-1])
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(data) - start))
+        self.end_headers()
+        self.wfile.write(data[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def interrupt(tempdir, name, size, etag):
+    """Leave a file as an interrupted download would."""
+    filename = os.path.join(tempdir, name)
+    os.remove(filename)
+    with open(filename + '.part', 'wb') as f:
+        f.write(FILES[name][:size])
+    if etag is not None:
+        info = {'etag': etag, 'length': len(FILES[name])}
+        with open(os.path.join(tempdir, '.' + name + '.part.json'),
+                  'w') as f:
+            json.dump(info, f)
+
+
+def test_download_files():
+    server = ThreadingServer(('127.0.0.1', 0), ContentHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = 'http://127.0.0.1:%i/product/' % server.server_port
+    try:
+        with tempfile.TemporaryDirectory() as tempdir:
+            downloads = [(url + name, os.path.join(tempdir, name))
+                         for name in sorted(FILES)]
+            start = time.time()
+            stats = download_files(downloads, max_workers=3)
+            assert time.time() - start < 3 * DELAY
+            assert [stat['filename'] for stat in stats] == \
+                [filename for url, filename in downloads]
+            for name in FILES:
+                with open(os.path.join(tempdir, name), 'rb') as f:
+                    assert f.read() == FILES[name]
+            summary = summarize_downloads(stats)
+            assert summary['downloaded'] == 3
+            assert summary['bytes'] == sum(map(len, FILES.values()))
+            assert summary['slowest'] >= DELAY
+
+            # Unchanged files are skipped and interrupted files are resumed
+            # if the remote file has not changed
+            del REQUESTS[:]
+            etag = '"%s"' % hashlib.md5(FILES['basemap.png']).hexdigest()
+            interrupt(tempdir, 'basemap.png', 20000, etag)
+            stats = download_files(downloads, max_workers=3)
+            assert [stat['status'] for stat in stats] == \
+                ['skipped', 'resumed', 'skipped']
+            assert stats[1]['bytes'] == 30000
+            assert sorted(REQUESTS)[1] == ('basemap.png', 'bytes=20000-',
+                                           etag, None)
+            with open(os.path.join(tempdir, 'basemap.png'), 'rb') as f:
+                assert f.read() == FILES['basemap.png']
+
+            # Partial files without an ETag or of a changed remote file are
+            # downloaded again
+            for etag in [None, '"old"']:
+                del REQUESTS[:]
+                interrupt(tempdir, 'basemap.png', 20000, etag)
+                stats = download_files(downloads[1:2], max_workers=None)
+                assert stats[0]['status'] == 'downloaded'
+                assert stats[0]['bytes'] == 50000
+                assert REQUESTS[0][1:3] == ((None, None) if etag is None
+                                            else ('bytes=20000-', etag))
+                with open(os.path.join(tempdir, 'basemap.png'), 'rb') as f:
+                    assert f.read() == FILES['basemap.png']
+
+            # Changed files are downloaded again, and a failed file does
+            # not stop the other files
+            FILES['properties.json'] = b'{"a": 1}'
+            missing = (url + 'missing.json',
+                       os.path.join(tempdir, 'missing.json'))
+            stats = download_files([missing] + downloads, max_workers=None)
+            assert [stat['status'] for stat in stats] == \
+                ['failed', 'skipped', 'skipped', 'downloaded']
+            assert 'HTTPError' in stats[0]['error']
+            assert summarize_downloads(stats)['failed'] == 1
+            assert sorted(os.listdir(tempdir)) == \
+                ['.downloads.json'] + sorted(FILES)
+            with open(os.path.join(tempdir, '.downloads.json'), 'r') as f:
+                assert sorted(json.load(f)) == sorted(FILES)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    test_download_files()
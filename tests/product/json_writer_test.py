@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+# stdlib imports
+from collections import OrderedDict
+import io
+import json
+
+# third party imports
+import numpy as np
+
+# local imports
+from fault.grid import SlipGrid
+from product.json_writer import dump, dump_grid, dumps
+
+
+def test_dumps():
+    obj = OrderedDict()
+    obj['type'] = 'Feature'
+    obj['values'] = [1.5, 2, 0.1 + 0.2, float('nan'), float('-inf')]
+    obj['nested'] = {'b': [[], {}], 'a': [True, None, 'café "x"']}
+    obj['empty'] = {}
+    for indent in [4, 2, 0]:
+        target = json.dumps(obj, indent=indent, sort_keys=True)
+        assert dumps(obj, indent=indent) == target
+    target = json.dumps(obj, separators=(',', ':'))
+    assert dumps(obj, indent=None, sort_keys=False) == target
+
+    arrays = {'x': np.arange(3) / 3, 'y': np.float32(0.5), 'z': np.int64(3)}
+    assert dumps(arrays, indent=None, decimals=3) == \
+        '{"x":[0.000,0.333,0.667],"y":0.500,"z":3}'
+
+    outfile = io.StringIO()
+    dump(obj, outfile)
+    assert outfile.getvalue() == json.dumps(obj, indent=4, sort_keys=True)
+
+
+def test_dump_grid():
+    coordinates = np.array([[0., 0., 0.], [1., 0., 0.], [1., 1., 1000.],
+                            [0., 1., 1000.], [0., 0., 0.]])
+    properties = OrderedDict()
+    properties['slip'] = np.array([1.0 / 3.0])
+    properties['fill'] = np.array(['#ffffff'])
+    properties['fill-opacity'] = np.array([1])
+    grid = SlipGrid(coordinates, [0, 5], properties, {'eventid': 'test'})
+    grid = SlipGrid.concatenate([grid, grid], grid.metadata)
+    for indent in [4, None]:
+        for decimals in [None, 2]:
+            for sort_keys in [True, False]:
+                outfile = io.StringIO()
+                dump_grid(grid, outfile, indent=indent, sort_keys=sort_keys,
+                          decimals=decimals)
+                target = dumps(grid.toGeoJSON(), indent=indent,
+                               sort_keys=sort_keys, decimals=decimals)
+                assert outfile.getvalue() == target
+    outfile = io.StringIO()
+    dump_grid(grid, outfile)
+    assert outfile.getvalue() == json.dumps(grid.toGeoJSON(), indent=4,
+                                            sort_keys=True)
+
+
+if __name__ == '__main__':
+    test_dumps()
+    test_dump_grid()
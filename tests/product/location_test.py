@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+# stdlib imports
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# local imports
+from product.location import LocationResolver, get_resolver, set_resolver
+from product.web_product import WebProduct
+
+PLACES = {'us10004u1y': '205km WSW of Muara Siberut, Indonesia'}
+REQUESTS = []
+
+
+class DetailHandler(BaseHTTPRequestHandler):
+    """Stand-in for the ComCat detail feed."""
+
+    def do_GET(self):
+        eventid = os.path.basename(self.path).replace('.geojson', '')
+        REQUESTS.append(eventid)
+        if eventid == 'usslow':
+            time.sleep(1)
+        if eventid not in PLACES:
+            self.send_error(404)
+            return
+        data = json.dumps({'properties': {'place': PLACES[eventid]}})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(data.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = HTTPServer(('127.0.0.1', 0), DetailHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = 'http://127.0.0.1:%i/detail/[EVENTID].geojson' % server.server_port
+    return server, url
+
+
+def test_resolver():
+    server, url = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tempdir:
+            del REQUESTS[:]
+            resolver = LocationResolver(url, timeout=0.2, cache_folder=tempdir)
+            assert resolver.getLocation('us10004u1y') == PLACES['us10004u1y']
+            assert resolver.getLocation('us10004u1y') == PLACES['us10004u1y']
+            assert resolver.getLocation('usmissing') is None
+            assert REQUESTS == ['us10004u1y', 'usmissing']
+
+            # The feed is not waited for beyond the timeout
+            start = time.time()
+            assert resolver.getLocation('usslow') is None
+            assert time.time() - start < 0.9
+
+            # The cache is shared and expired places are requested again
+            resolver = LocationResolver(url, cache_folder=tempdir, ttl=0)
+            future = resolver.getLocationAsync('us10004u1y')
+            assert future.result() == PLACES['us10004u1y']
+            assert REQUESTS[-1] == 'us10004u1y'
+
+            # Expired places are used when the feed cannot be reached
+            resolver = LocationResolver('http://127.0.0.1:1/[EVENTID]',
+                                        cache_folder=tempdir, ttl=0)
+            assert resolver.getLocation('us10004u1y') == PLACES['us10004u1y']
+            resolver.clear()
+            assert resolver.getLocation('us10004u1y') is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_product_location():
+    server, url = start_server()
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    source = os.path.join(homedir, '..', 'data', 'products', '10004u1y_1')
+    default = get_resolver()
+    try:
+        with tempfile.TemporaryDirectory() as tempdir:
+            directory = os.path.join(tempdir, '10004u1y_1')
+            shutil.copytree(source, directory)
+            set_resolver(LocationResolver(url))
+            product = WebProduct.fromDirectory(directory, 'us', '10004u1y', 1)
+            assert product.properties['location'] == PLACES['us10004u1y']
+            product.storeProperties(directory, 'us', '10004u1y',
+                                    location='Test location')
+            assert product.properties['location'] == 'Test location'
+            # A failed request is not repeated for the properties
+            del REQUESTS[:]
+            product = WebProduct.fromDirectory(directory, 'us', '10004u1z', 1)
+            assert product.properties['location'] == '-4.9050, 94.2360'
+            assert REQUESTS == ['us10004u1z']
+    finally:
+        set_resolver(default)
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    test_resolver()
+    test_product_location()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import os
+import tempfile
+
+# local imports
+from product.manifest import MANIFEST_FILE, ProductManifest, hash_file
+
+
+def test_manifest():
+    with tempfile.TemporaryDirectory() as tempdir:
+        inputs = os.path.join(tempdir, 'model.fsp')
+        output = os.path.join(tempdir, 'FFM.geojson')
+        with open(inputs, 'w') as f:
+            f.write('first')
+        with open(output, 'w') as f:
+            f.write('{}')
+
+        manifest = ProductManifest.fromDirectory(tempdir)
+        key = manifest.getFingerprint([inputs], {'eventid': 'a'})
+        assert not manifest.hasStage('fault')
+        assert not manifest.isCurrent('fault', key)
+        assert key != manifest.getFingerprint([inputs], {'eventid': 'b'})
+        manifest.setStage('fault', key, [output], {'value': 1})
+        manifest.save()
+        assert os.path.exists(os.path.join(tempdir, MANIFEST_FILE))
+
+        manifest = ProductManifest.fromDirectory(tempdir)
+        assert manifest.isCurrent('fault', key)
+        assert manifest.getData('fault') == {'value': 1}
+        assert manifest.getHash(inputs) == hash_file(inputs)
+
+        # Changed inputs change the key
+        with open(inputs, 'w') as f:
+            f.write('second')
+        assert manifest.getFingerprint([inputs], {'eventid': 'a'}) != key
+
+        # Changed or removed outputs must be rebuilt
+        with open(output, 'w') as f:
+            f.write('{"a": 1}')
+        assert not manifest.isCurrent('fault', key)
+        os.remove(output)
+        assert not manifest.isCurrent('fault', key)
+        manifest.removeStage('fault')
+        assert manifest.getData('fault') is None
+
+        # Unreadable manifests are ignored
+        with open(os.path.join(tempdir, MANIFEST_FILE), 'w') as f:
+            f.write('{')
+        assert not ProductManifest.fromDirectory(tempdir).hasStage('fault')
+
+
+if __name__ == '__main__':
+    test_manifest()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# local imports
+from product.sender_service import SenderClient, SenderService
+
+# Stand-in for a worker that answers with its process id
+WORKER = """
+import json
+import os
+import sys
+
+for line in sys.stdin:
+    request = json.loads(line)
+    if request['command'][0] == 'exit':
+        sys.exit(1)
+    output = '%i %s' % (os.getpid(), ' '.join(request['command']))
+    reply = {'returncode': 0, 'output': output}
+    sys.stdout.write(json.dumps(reply) + '\\n')
+    sys.stdout.flush()
+"""
+
+
+def start_service(socket_path, worker_command=None):
+    service = SenderService(socket_path, worker_command=worker_command)
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    for i in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.05)
+    return service, thread
+
+
+def test_worker():
+    with tempfile.TemporaryDirectory() as tempdir:
+        worker = os.path.join(tempdir, 'worker.py')
+        with open(worker, 'w') as f:
+            f.write(WORKER)
+        socket_path = os.path.join(tempdir, 'pdl.sock')
+        client = SenderClient(socket_path, timeout=30)
+        # The caller falls back to PDLSender when the service is not running
+        assert client.run(['--send']) is None
+
+        service, thread = start_service(socket_path,
+                                        [sys.executable, worker])
+        try:
+            first = client.run(['--send', '--code=us1'])
+            second = client.run(['--send', '--code=us2'])
+            assert first['returncode'] == 0
+            assert first['output'].endswith(' --send --code=us1')
+            # The same worker sends both products
+            pid = first['output'].split()[0]
+            assert second['output'].split()[0] == pid
+
+            # A worker that exits is reported and started again
+            reply = client.run(['exit'])
+            assert reply['returncode'] == -1
+            reply = client.run(['--send', '--code=us3'])
+            assert reply['returncode'] == 0
+            assert reply['output'].split()[0] != pid
+        finally:
+            service.shutdown()
+            thread.join(5)
+        assert not os.path.exists(socket_path)
+
+
+def test_process():
+    with tempfile.TemporaryDirectory() as tempdir:
+        socket_path = os.path.join(tempdir, 'pdl.sock')
+        service, thread = start_service(socket_path)
+        try:
+            client = SenderClient(socket_path, timeout=30)
+            command = [sys.executable, '-c', 'print("sent")']
+            reply = client.run(command)
+            assert reply == {'returncode': 0, 'output': 'sent\n'}
+            command = [sys.executable, '-c', 'import sys; sys.exit(3)']
+            assert client.run(command)['returncode'] == 3
+        finally:
+            service.shutdown()
+            thread.join(5)
+
+
+if __name__ == '__main__':
+    test_worker()
+    test_process()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+# stdlib imports
+import os
+import tempfile
+
+# local imports
+from product.staging import replacement_path, stage_product
+
+
+def write_file(path, contents):
+    with open(path, 'w') as f:
+        f.write(contents)
+
+
+def test_stage_product():
+    with tempfile.TemporaryDirectory() as tempdir:
+        source = os.path.join(tempdir, 'product')
+        os.makedirs(source)
+        paths = {}
+        for name in ['FFM.geojson', 'basemap.png']:
+            write_file(os.path.join(source, name), name)
+            paths[name] = (os.path.join(source, name), name)
+        pdlfolder = os.path.join(tempdir, 'pdl', 'us10004u1y_1')
+        os.makedirs(pdlfolder)
+        write_file(os.path.join(pdlfolder, 'old.txt'), 'old')
+
+        stats = stage_product(paths, pdlfolder)
+        assert stats == {'copied': 0, 'linked': 2, 'removed': 1,
+                         'skipped': 0}
+        assert sorted(os.listdir(pdlfolder)) == ['FFM.geojson',
+                                                 'basemap.png']
+        assert os.path.samefile(paths['basemap.png'][0],
+                                os.path.join(pdlfolder, 'basemap.png'))
+        # The record is not sent to PDL
+        assert os.path.exists(os.path.join(tempdir, 'pdl',
+                                           '.us10004u1y_1.staging.json'))
+        stats = stage_product(paths, pdlfolder)
+        assert stats['skipped'] == 2
+
+        # A rewritten product file does not change the staged file until it
+        # is staged again
+        with replacement_path(paths['basemap.png'][0]) as temp_path:
+            write_file(temp_path, 'new')
+        with open(os.path.join(pdlfolder, 'basemap.png'), 'r') as f:
+            assert f.read() == 'basemap.png'
+        stats = stage_product(paths, pdlfolder)
+        assert stats == {'copied': 0, 'linked': 1, 'removed': 0,
+                         'skipped': 1}
+        with open(os.path.join(pdlfolder, 'basemap.png'), 'r') as f:
+            assert f.read() == 'new'
+
+        # Copied files are skipped while their contents do not change
+        stats = stage_product(paths, pdlfolder, link=False)
+        assert stats['copied'] == 2
+        assert not os.path.samefile(paths['basemap.png'][0],
+                                    os.path.join(pdlfolder, 'basemap.png'))
+        os.utime(paths['basemap.png'][0], (0, 0))
+        stats = stage_product(paths, pdlfolder, link=False)
+        assert stats['skipped'] == 2
+        write_file(paths['FFM.geojson'][0], 'changed')
+        stats = stage_product(paths, pdlfolder, link=False)
+        assert stats == {'copied': 1, 'linked': 0, 'removed': 0,
+                         'skipped': 1}
+        with open(os.path.join(pdlfolder, 'FFM.geojson'), 'r') as f:
+            assert f.read() == 'changed'
+
+
+if __name__ == '__main__':
+    test_stage_product()
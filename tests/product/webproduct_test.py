@@ -2,10 +2,12 @@
 
 # stdlib imports
 import glob
+import json
 import os
 import shutil
 import tempfile
 import warnings
+import zipfile
 
 # third party imports
 from lxml import etree
@@ -14,6 +16,8 @@ import pytest
 
 # local imports
 from fault.fault import Fault
+from fault.grid import SlipGrid
+from product.waveform_encoding import decode_array, encode_array
 from product.web_product import WebProduct
 
 
@@ -146,6 +150,227 @@ def test_exceptions():
     product.writeGrid(ts_directory)
 
 
+def test_incremental():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    source = os.path.join(homedir, '..', 'data', 'products', '000714t')
+    with tempfile.TemporaryDirectory() as tempdir:
+        directory = os.path.join(tempdir, '000714t')
+        shutil.copytree(source, directory)
+        plot = os.path.join(directory, 'p000714t_wave_1.png')
+        with open(plot, 'wb') as f:
+            f.write(b'first')
+        target = WebProduct.fromDirectory(directory, 'pt', '000714t', 1)
+        os.remove(os.path.join(directory, 'fits.zip'))
+
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           incremental=True)
+        assert product.event is not None
+        assert product.properties == target.properties
+        assert os.path.exists(os.path.join(directory,
+                                           '.product_manifest.json'))
+
+        # Only the options changed
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 2,
+                                           comment='Nodal plane 1.',
+                                           version=3, incremental=True)
+        assert product.event is None
+        expected = dict(target.properties)
+        expected.update({'comment': 'Nodal plane 1.', 'model-number': 2,
+                         'version': 3})
+        assert product.properties == expected
+        assert sorted(product.paths) == sorted(target.paths)
+        with open(os.path.join(directory, 'properties.json')) as f:
+            assert json.load(f) == expected
+
+        # A changed plot is zipped again
+        with open(plot, 'wb') as f:
+            f.write(b'second')
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           incremental=True)
+        assert product.event is None
+        assert product.properties == target.properties
+        with zipfile.ZipFile(os.path.join(directory, 'fits.zip')) as z:
+            assert z.read('p000714t_wave_1.png') == b'second'
+
+        # A modified output or a new event id rebuilds the fault
+        with open(os.path.join(directory, 'FFM.geojson'), 'a') as f:
+            f.write(' ')
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           incremental=True)
+        assert product.event is not None
+        product = WebProduct.fromDirectory(directory, 'us', '000714t', 1,
+                                           incremental=True)
+        assert product.event is not None
+        assert product.properties['eventsource'] == 'us'
+
+
+def test_columnar_grid():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    source = os.path.join(homedir, '..', 'data', 'products', '000714t')
+    with tempfile.TemporaryDirectory() as tempdir:
+        directory = os.path.join(tempdir, '000714t')
+        shutil.copytree(source, directory)
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           columnar_grid=True)
+        path = os.path.join(directory, 'FFM_grid.npz')
+        assert product.paths['columnar_grid'] == (path, 'FFM_grid.npz')
+        grid = SlipGrid.fromFile(path)
+        assert grid.metadata['eventid'] == '000714t'
+        np.testing.assert_array_equal(grid.coordinates,
+                                      product.slip_grid.coordinates)
+        np.testing.assert_array_equal(grid.ring_offsets,
+                                      product.slip_grid.ring_offsets)
+        assert list(grid.properties) == list(product.slip_grid.properties)
+        for key, value in grid.properties.items():
+            np.testing.assert_array_equal(
+                value, product.slip_grid.properties[key])
+        with open(os.path.join(directory, 'FFM.geojson')) as f:
+            assert json.load(f) == json.loads(json.dumps(grid.toGeoJSON()))
+
+        # The compressed grid is read the same way
+        product.writeColumnarGrid(directory, compressed=True)
+        compressed = SlipGrid.fromFile(path)
+        assert compressed.toGeoJSON() == grid.toGeoJSON()
+
+        # The columnar grid is part of the incremental fault stage
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           incremental=True,
+                                           columnar_grid=True)
+        assert product.event is not None
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           incremental=True,
+                                           columnar_grid=True)
+        assert product.event is None
+        assert product.paths['columnar_grid'] == (path, 'FFM_grid.npz')
+        os.remove(path)
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           incremental=True,
+                                           columnar_grid=True)
+        assert product.event is not None
+        assert os.path.exists(path)
+
+
+def test_timeseries_option():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    source = os.path.join(homedir, '..', 'data', 'products', '000714t')
+    waves = os.path.join(homedir, '..', 'data', 'timeseries')
+    with tempfile.TemporaryDirectory() as tempdir:
+        directory = os.path.join(tempdir, '000714t')
+        shutil.copytree(source, directory)
+        for path in glob.glob(os.path.join(waves, 'ANMO.*')) + \
+                [os.path.join(waves, 'Readlp.das')]:
+            shutil.copy(path, directory)
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           timeseries_encoding='float32')
+        path = os.path.join(directory, 'timeseries.geojson')
+        assert product.paths['timeseries'] == (path, 'timeseries.geojson')
+        with open(path, 'r') as f:
+            features = json.load(f)['features']
+        assert [feature['properties']['station']
+                for feature in features] == ['ANMO']
+        assert len(features[0]['geometry']['coordinates']) == 2
+        waveform = features[0]['properties']['data'][0]
+        assert waveform['displacement']['encoding'] == 'float32'
+
+        # A changed waveform rebuilds the file in incremental builds
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           incremental=True,
+                                           timeseries_encoding='float32')
+        assert product.event is not None
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           incremental=True,
+                                           timeseries_encoding='float32')
+        assert product.event is None
+        assert product.paths['timeseries'] == (path, 'timeseries.geojson')
+        with open(os.path.join(directory, 'ANMO.P.dat'), 'a') as f:
+            f.write('\n')
+        product = WebProduct.fromDirectory(directory, 'pt', '000714t', 1,
+                                           incremental=True,
+                                           timeseries_encoding='float32')
+        assert product.event is not None
+
+
+def test_zip_files():
+    product = WebProduct()
+    with tempfile.TemporaryDirectory() as tempdir:
+        contents = {}
+        for name in ['a_waves_1.png', 'a_wave_2.png', 'b_ascending.txt']:
+            contents[name] = name.encode() * 1000
+            with open(os.path.join(tempdir, name), 'wb') as f:
+                f.write(contents[name])
+        assert product.zip_files(tempdir, ['*.kml'], 'empty') == ''
+        path = product.zip_files(tempdir, ['*wave*.png', '*waves*.png',
+                                           '*.txt'], 'fits')
+        assert path == os.path.join(tempdir, 'fits.zip')
+        with zipfile.ZipFile(path) as archive:
+            infos = archive.infolist()
+            assert sorted(info.filename for info in infos) == \
+                sorted(contents)
+            for info in infos:
+                assert archive.read(info) == contents[info.filename]
+                if info.filename.endswith('.png'):
+                    assert info.compress_type == zipfile.ZIP_STORED
+                else:
+                    assert info.compress_type == zipfile.ZIP_DEFLATED
+        assert not os.path.exists(os.path.join(tempdir, 'fits'))
+        product.zip_files(tempdir, ['*.png'], 'level', compresslevel=9,
+                          stored=[])
+        with zipfile.ZipFile(os.path.join(tempdir, 'level.zip')) as archive:
+            for info in archive.infolist():
+                assert info.compress_type == zipfile.ZIP_DEFLATED
+                assert archive.read(info) == contents[info.filename]
+
+
+def test_timeseries_geojson():
+    homedir = os.path.dirname(os.path.abspath(__file__))
+    directory = os.path.join(homedir, '..', 'data', 'timeseries')
+    fault = Fault.fromFiles(os.path.join(directory, '1000dyad.fsp'),
+                            directory)
+    product = WebProduct()
+    product.event = fault.event
+    product.timeseries_store = fault.timeseries_store
+    stations = product.getStationCoordinates(directory)
+    assert product.getStationCoordinates(homedir) == {}
+    store = fault.timeseries_store
+    station = store.stations[0]
+    displacement = store.getArray(station, 0, 'displacement')
+    sizes = {}
+    with tempfile.TemporaryDirectory() as tempdir:
+        for encoding in [None, 'delta', 'float32']:
+            product.createTimeseriesGeoJSON(stations, encoding=encoding)
+            json.dumps(product.timeseries_geojson)
+            product.writeTimeseries(tempdir, compact=True)
+            filename = os.path.join(tempdir, 'timeseries.geojson')
+            sizes[encoding] = os.path.getsize(filename)
+            with open(filename, 'r') as f:
+                features = json.load(f)['features']
+            assert len(features) == len(store.stations)
+            feature = features[0]
+            assert feature['geometry']['coordinates'] == \
+                list(stations[station])
+            props = feature['properties']
+            assert props['station'] == station
+            assert props['metadata'] == store.getMetadata(station)
+            values = props['data'][0]['displacement']
+            if encoding is not None:
+                assert values['count'] == len(displacement)
+                values = decode_array(values)
+            np.testing.assert_allclose(values, displacement, atol=1e-6)
+    assert sizes['delta'] < sizes[None]
+    assert sizes['float32'] < sizes[None]
+
+    encoded = encode_array([0.5, 0.25, -1.0], 'delta', scale=0.25)
+    assert encoded['values'] == [2, -1, -5]
+    np.testing.assert_array_equal(decode_array(encoded), [0.5, 0.25, -1.0])
+    with pytest.raises(Exception):
+        encode_array([1.0], 'zip')
+
+
 if __name__ == '__main__':
+    test_timeseries_geojson()
+    test_columnar_grid()
+    test_timeseries_option()
+    test_zip_files()
+    test_incremental()
     test_exceptions()
     test_fromDirectory()